@@ -0,0 +1,117 @@
+"""Точность и скорость типов индекса FAISS: recall@k, p50/p99 поиска, память.
+
+На синтетическом корпусе (кластеризованные векторы) или на векторах
+существующего индекса (--index, нужен flat или IDMap2):
+    python -m benchmarks.bench_ann --vectors 200000 --queries 500
+    python -m benchmarks.bench_ann --index swiss_embeddings.index --json ann.json
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from bot_core.ann import build_index, configure_index, unwrap
+
+# Параметр поиска, который перебирается для каждого типа индекса
+SWEEPS = {
+    "flat": [None],
+    "ivf": [1, 4, 16, 64],
+    "hnsw": [16, 64, 256],
+    "ivfpq": [4, 16, 64],
+}
+
+
+def synthetic(count, dim, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(clusters, size=count)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def from_index(path):
+    # read_index уже возвращает конкретный тип индекса
+    index = faiss.read_index(path)
+    if isinstance(index, faiss.IndexFlat):
+        return index.reconstruct_n(0, index.ntotal)
+    if isinstance(index, faiss.IndexIDMap2) and isinstance(unwrap(index), faiss.IndexFlat):
+        ids = faiss.vector_to_array(index.id_map)
+        return np.vstack([index.reconstruct(int(i)) for i in ids])
+    raise SystemExit("Для эталонного поиска нужен flat-индекс")
+
+
+def percentile_ms(values, q):
+    return float(np.percentile(values, q) * 1000)
+
+
+def search(index, queries, truth, k):
+    latencies, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - started)
+        found.append(ids[0])
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return round(float(recall), 4), percentile_ms(latencies, 50), percentile_ms(latencies, 99)
+
+
+def run(kind, vectors, queries, truth, k):
+    """Строит индекс один раз и перебирает для него параметр поиска"""
+    started = time.perf_counter()
+    index = build_index(kind, vectors, np.arange(len(vectors)))
+    build_seconds = time.perf_counter() - started
+    memory_mb = len(faiss.serialize_index(index)) / 2 ** 20
+    for param in SWEEPS[kind]:
+        configure_index(index, nprobe=param or 1, ef_search=param or 16)
+        recall, p50, p99 = search(index, queries, truth, k)
+        yield {
+            "type": kind,
+            "param": param,
+            "recall": recall,
+            "p50_ms": round(p50, 3),
+            "p99_ms": round(p99, 3),
+            "memory_mb": round(memory_mb, 2),
+            "build_s": round(build_seconds, 2),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=7)
+    parser.add_argument("--types", nargs="+", default=list(SWEEPS), choices=list(SWEEPS))
+    parser.add_argument("--index", help="взять векторы из существующего индекса")
+    parser.add_argument("--threads", type=int, default=1, help="потоков OpenMP при поиске")
+    parser.add_argument("--json", help="сохранить результаты в файл")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    vectors = from_index(args.index) if args.index else synthetic(args.vectors, args.dim, args.clusters)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(len(vectors), size=args.queries)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    results = []
+    print(f"{'type':6s} {'param':>6s} {'recall':>7s} {'p50 ms':>8s} {'p99 ms':>8s} {'MiB':>8s} {'build s':>8s}")
+    for kind in args.types:
+        for result in run(kind, vectors, queries, truth, args.k):
+            results.append(result)
+            print(f"{kind:6s} {str(result['param'] or '-'):>6s} {result['recall']:7.3f} {result['p50_ms']:8.3f} "
+                  f"{result['p99_ms']:8.3f} {result['memory_mb']:8.1f} {result['build_s']:8.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"vectors": len(vectors), "dim": vectors.shape[1], "k": args.k, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Холодный старт: время импорта модуля и запуска приложения в свежем процессе.
+
+Каждый прогон — новый интерпретатор с -X importtime, поэтому в отчёт
+попадают и общие тайминги, и самые дорогие импорты:
+    python -m benchmarks.bench_coldstart --runs 10 --json coldstart.json
+    python -m benchmarks.bench_coldstart --module conty --no-start
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Фиктивные токены, чтобы модуль прошёл проверку окружения
+DUMMY_ENV = {
+    "TELEGRAM_TOKEN": "123456:TEST",
+    "TAVILY_API_KEY": "tvly-test",
+    "GROQ_API_KEY": "gsk-test",
+    "DEEPL_API_KEY": "test:fx",
+}
+
+# Код дочернего процесса: импорт модуля и запуск его ASGI-приложения без сети
+CHILD = """
+import asyncio, importlib, json, sys, time
+started = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+app = getattr(module, "app", None)
+if sys.argv[2] == "1" and app is not None and hasattr(app, "start"):
+    async def run():
+        await app.start()
+        ready = time.perf_counter()
+        await app.stop()
+        return ready
+    ready = asyncio.run(run())
+else:
+    ready = imported
+print(json.dumps({"import_s": imported - started, "start_s": ready - imported}))
+"""
+
+
+def parse_importtime(stderr):
+    """Строки «import time: self | cumulative | name» -> {модуль: (self, cumulative)} в секундах"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return modules
+
+
+def run_once(module, start, env):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, module, "1" if start else "0"],
+                            capture_output=True, text=True, env=env)
+    wall = time.perf_counter() - started
+    if result.returncode:
+        raise SystemExit(f"Прогон завершился с ошибкой:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["wall_s"] = wall
+    return timings, parse_importtime(result.stderr)
+
+
+def top_level(modules):
+    """Суммарное время по пакетам верхнего уровня (aiogram, openai, ...)"""
+    packages = {}
+    for name, (self_s, _) in modules.items():
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + self_s
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="api.telegram_webhook")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--no-start", action="store_true", help="только импорт, без app.start()")
+    parser.add_argument("--json", help="сохранить отчёт в файл")
+    args = parser.parse_args()
+
+    env = {**DUMMY_ENV, **os.environ}
+    # Первый прогон прогревает .pyc и файловый кэш, в статистику не входит
+    run_once(args.module, not args.no_start, env)
+    runs, packages = [], {}
+    for _ in range(args.runs):
+        timings, modules = run_once(args.module, not args.no_start, env)
+        runs.append(timings)
+        for package, seconds in top_level(modules).items():
+            packages.setdefault(package, []).append(seconds)
+
+    summary = {}
+    for key in ("import_s", "start_s", "wall_s"):
+        values = [r[key] for r in runs]
+        summary[key] = {"p50": round(float(np.median(values)), 4), "max": round(max(values), 4)}
+        print(f"{key:9s} p50={summary[key]['p50'] * 1000:8.1f} ms  max={summary[key]['max'] * 1000:8.1f} ms")
+
+    heaviest = sorted(((float(np.median(v)), p) for p, v in packages.items()), reverse=True)[:args.top]
+    print("\nСамые дорогие пакеты (self-время импорта, медиана):")
+    for seconds, package in heaviest:
+        print(f"  {package:30s} {seconds * 1000:8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"module": args.module, "runs": args.runs, "summary": summary,
+                       "packages": {p: round(s, 4) for s, p in heaviest}}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
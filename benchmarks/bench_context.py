@@ -0,0 +1,113 @@
+"""Размер промпта и время ответа с этапом сборки контекста и без него.
+
+По умолчанию корпус — чанки из chunks.json, а эмбеддинги считает
+хэширующая модель по словам (похожие тексты дают похожие векторы).
+С --index/--chunks/--real используются настоящие индекс и модель:
+    python -m benchmarks.bench_context --queries benchmarks/queries.txt
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import statistics
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.stubs import GroqStub
+from bot_core.bm25 import BM25Index
+from bot_core.context import assemble_context
+from bot_core.embeddings import EmbeddingService
+from bot_core.llm import GroqClient
+from bot_core.retrieval import HybridRetriever
+from bot_core.storage import load_index, open_bm25, open_chunks
+from bot_core.tokens import chunk_text, count_tokens
+
+
+class HashingModel:
+    """Мешок слов, разложенный хэшированием по dim координатам"""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                bucket = int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "little") % self.dim
+                vectors[row, bucket] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+def synthetic_corpus(model, path="chunks.json"):
+    with open(path, encoding="utf-8") as f:
+        texts = json.load(f)
+    # Дублируем часть чанков с мелкими правками, как бывает при пересекающейся нарезке
+    texts += [text.replace(".", "!", 1) for text in texts[::3]]
+    chunks = [{"content": text} for text in texts]
+    index = faiss.IndexFlatL2(model.dim)
+    index.add(model.encode(texts))
+    return index, chunks, BM25Index.build(range(len(texts)), texts)
+
+
+def build_prompt(query, context):
+    return f'На основе следующего контекста ответьте на вопрос: "{query}"\n\nКонтекст:\n{context}'
+
+
+async def bench(args):
+    if args.real:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    else:
+        model = HashingModel()
+    embedder = EmbeddingService(model)
+    if args.index:
+        index, chunks = load_index(args.index), open_chunks(args.chunks)
+        bm25 = open_bm25(args.bm25, chunks)
+    else:
+        index, chunks, bm25 = synthetic_corpus(model)
+    retriever = HybridRetriever(index, chunks, embedder, bm25=bm25)
+    with open(args.queries, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+
+    async with GroqStub(latency=args.latency, prompt_token_latency=args.prompt_token_latency) as stub:
+        client = GroqClient(api_key="test", base_url=stub.base_url)
+        results = {"baseline": ([], []), "assembled": ([], [])}
+        for query in queries:
+            hits = await retriever.search(query, k=args.k)
+            baseline = build_prompt(query, "\n\n".join(chunk_text(hit.chunk) for hit in hits))
+            context = await assemble_context(hits, retriever, budget=args.budget)
+            assembled = build_prompt(query, context.text)
+            for name, prompt in (("baseline", baseline), ("assembled", assembled)):
+                started = time.perf_counter()
+                await client.complete(prompt)
+                results[name][0].append(count_tokens(prompt))
+                results[name][1].append(time.perf_counter() - started)
+        await client.aclose()
+
+    for name, (tokens, latencies) in results.items():
+        print(f"{name:9s} prompt tokens: mean={statistics.mean(tokens):7.0f}  max={max(tokens):6d}   "
+              f"answer latency: p50={statistics.median(latencies) * 1000:7.1f} ms")
+    reduction = 1 - sum(results["assembled"][0]) / sum(results["baseline"][0])
+    print(f"сокращение промпта: {reduction:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", default="benchmarks/queries.txt")
+    parser.add_argument("--k", type=int, default=7)
+    parser.add_argument("--budget", type=int, default=1500, help="бюджет токенов контекста")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0002,
+                        help="время Groq-заглушки на слово промпта, с")
+    parser.add_argument("--index")
+    parser.add_argument("--chunks", default="swiss_chunks.bin")
+    parser.add_argument("--bm25", default="swiss_bm25.npz")
+    parser.add_argument("--real", action="store_true", help="использовать all-MiniLM-L6-v2")
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
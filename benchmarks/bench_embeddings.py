@@ -0,0 +1,86 @@
+"""Пропускная способность эмбеддингов запросов в зависимости от параллельности.
+
+Сравнивает прежний путь (encode([query]) прямо в обработчике) с
+EmbeddingService. Без --real используется модель-имитация, у которой
+стоимость вызова складывается из накладных расходов и времени на текст:
+    python -m benchmarks.bench_embeddings --queries 500 --repeat-ratio 0.3
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from bot_core.embeddings import EmbeddingService
+
+
+class FakeModel:
+    """Имитация SentenceTransformer: call_cost на вызов плюс item_cost на текст"""
+
+    def __init__(self, call_cost=0.008, item_cost=0.0005, dim=384):
+        self.call_cost = call_cost
+        self.item_cost = item_cost
+        self.dim = dim
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        time.sleep(self.call_cost + self.item_cost * len(texts))
+        return np.random.rand(len(texts), self.dim).astype(np.float32)
+
+
+def make_queries(count, repeat_ratio):
+    queries = []
+    for i in range(count):
+        if queries and random.random() < repeat_ratio:
+            queries.append(random.choice(queries).upper())
+        else:
+            queries.append(f"как развернуть смарт-контракт номер {i}")
+    return queries
+
+
+async def run(embed, queries, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query):
+        async with semaphore:
+            await embed(query)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    return len(queries) / (time.perf_counter() - started)
+
+
+async def bench(args):
+    if args.real:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    else:
+        model = FakeModel()
+
+    async def baseline(query):
+        model.encode([query])
+
+    for concurrency in args.concurrency:
+        queries = make_queries(args.queries, args.repeat_ratio)
+        service = EmbeddingService(model, batch_window=args.window, max_batch_size=args.batch_size)
+        old = await run(baseline, queries, concurrency)
+        new = await run(service.embed, queries, concurrency)
+        stats = service.stats
+        print(f"concurrency={concurrency:4d}  baseline={old:8.1f} q/s  service={new:8.1f} q/s  "
+              f"hit rate={service.hit_rate():.2f}  batches={stats['batches']}  "
+              f"avg batch={stats['encoded'] / max(stats['batches'], 1):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--repeat-ratio", type=float, default=0.3, help="доля повторных запросов")
+    parser.add_argument("--window", type=float, default=0.005, help="окно сбора батча, с")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--real", action="store_true", help="использовать all-MiniLM-L6-v2")
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Загрузка и извлечение текста страниц: старая схема (всё тело + разбор целиком) против PageFetcher.
+
+Страницы отдаёт локальный PageStub с имитацией медленной сети:
+    python -m benchmarks.bench_fetch --sizes 100 1000 5000 --chunk-latency 0.005
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+import tracemalloc
+from html.parser import HTMLParser
+
+import aiohttp
+
+from benchmarks.stubs import PageStub
+from bot_core.fetch import PageFetcher
+
+MAX_CHARS = 5000
+
+
+class FullText(HTMLParser):
+    """Весь текст документа, как soup.get_text(): вместе со script и style"""
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+
+def full_text(html):
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        parser = FullText()
+        parser.feed(html)
+        parser.close()
+        return "".join(parser.parts)
+    return BeautifulSoup(html, "html.parser").get_text()
+
+
+async def baseline(session, url):
+    """Прежний /link: скачать всё, разобрать всё, обрезать до 5000 символов"""
+    async with session.get(url) as response:
+        body = await response.read()
+    text = full_text(body.decode("utf-8", errors="replace"))
+    return text[:MAX_CHARS], len(body)
+
+
+async def measure(fn, repeats):
+    latencies, peaks, result = [], [], None
+    for _ in range(repeats):
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = await fn()
+        latencies.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(latencies), max(peaks), result
+
+
+def run_stub(chunk_latency, ports):
+    """PageStub в отдельном процессе, чтобы его работа не попадала в замеры"""
+    async def serve():
+        stub = await PageStub(chunk_latency=chunk_latency).start()
+        ports.put(stub.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def bench(args):
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_stub, args=(args.chunk_latency, ports), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{ports.get()}"
+    print(f"{'KiB':>6s} {'mode':9s} {'ms':>8s} {'bytes':>10s} {'peak MiB':>9s}  начало текста")
+    try:
+        async with aiohttp.ClientSession() as session:
+            for size in args.sizes:
+                url = f"{base_url}/page/{size}"
+                fetcher = PageFetcher(max_chars=MAX_CHARS, cache_size=0)
+                old = await measure(lambda: baseline(session, url), args.repeats)
+                new = await measure(lambda: fetcher.fetch(url), args.repeats)
+                await fetcher.aclose()
+                old_text, old_bytes = old[2]
+                page = new[2]
+                for mode, (seconds, peak, _), text, read in (("baseline", old, old_text, old_bytes),
+                                                              ("fetcher", new, page.text, page.bytes_read)):
+                    preview = " ".join(text.split())[:40]
+                    print(f"{size:6d} {mode:9s} {seconds * 1000:8.1f} {read:10d} {peak / 2 ** 20:9.2f}  {preview}")
+
+            # Кэш: свежая запись и перепроверка устаревшей по ETag
+            url = f"{base_url}/page/{args.sizes[-1]}"
+            fetcher = PageFetcher(max_chars=MAX_CHARS)
+            await fetcher.fetch(url)
+            hit = await measure(lambda: fetcher.fetch(url), args.repeats)
+            await fetcher.aclose()
+            # С нулевым TTL каждая запись сразу устаревает и перепроверяется по ETag
+            fetcher = PageFetcher(max_chars=MAX_CHARS, cache_ttl=0)
+            await fetcher.fetch(url)
+            revalidated = await measure(lambda: fetcher.fetch(url), args.repeats)
+            await fetcher.aclose()
+            print(f"\nкэш: попадание {hit[0] * 1000:.3f} ms, перепроверка (304) {revalidated[0] * 1000:.1f} ms, "
+                  f"статистика: {fetcher.stats}")
+    finally:
+        server.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="размеры страниц, КиБ")
+    parser.add_argument("--chunk-latency", type=float, default=0.002, help="задержка на кусок 16 КиБ, с")
+    parser.add_argument("--repeats", type=int, default=5)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Пропускная способность generate_response при параллельных апдейтах.
+
+Сравнивает синхронный OpenAI-клиент внутри async-обработчика (как было)
+с асинхронным GroqClient на локальной заглушке Groq:
+    python -m benchmarks.bench_llm --latency 0.2 --updates 200
+"""
+import argparse
+import asyncio
+import time
+
+from openai import OpenAI
+
+from benchmarks.stubs import GroqStub
+from bot_core.llm import GroqClient
+
+
+async def run_updates(handler, updates, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await handler(f"Вопрос номер {i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(updates)))
+    return updates / (time.perf_counter() - started)
+
+
+async def bench(args):
+    stub = GroqStub(latency=args.latency).start_in_thread()
+    try:
+        sync_client = OpenAI(base_url=stub.base_url, api_key="test")
+
+        async def sync_handler(prompt):
+            # Блокирующий вызов занимает event loop на всё время запроса
+            sync_client.chat.completions.create(
+                model="gemma2-9b-it", messages=[{"role": "user", "content": prompt}])
+
+        for concurrency in args.concurrency:
+            client = GroqClient(api_key="test", base_url=stub.base_url,
+                                max_concurrency=concurrency, max_connections=concurrency)
+            baseline = await run_updates(sync_handler, min(args.updates, 20), concurrency)
+            pooled = await run_updates(client.complete, args.updates, concurrency)
+            await client.aclose()
+            print(f"concurrency={concurrency:4d}  sync={baseline:8.1f} upd/s  async={pooled:8.1f} upd/s")
+    finally:
+        stub.stop_thread()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="задержка заглушки, с")
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Память диалогов: байт на чат, стоимость обращения и размер промпта.
+
+Сравнивает ConversationStore с наивным словарём списков сообщений
+(вся история чата в каждом промпте):
+    python -m benchmarks.bench_memory --chats 10000 50000 --turns 30
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.stubs import GroqStub
+from bot_core.llm import GroqClient
+from bot_core.memory import ConversationStore
+from bot_core.tokens import count_tokens
+
+WORDS = ("как", "запустить", "ноду", "swisstronik", "валидатор", "токен", "кошелёк", "контракт",
+         "ошибка", "сеть", "комиссия", "адрес", "транзакция", "почему", "где", "настроить")
+
+
+def phrase(rng, words=20):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+async def fill(store_append, chats, turns, seed=0):
+    rng = random.Random(seed)
+    texts = [phrase(rng) for _ in range(256)]
+    for turn in range(turns):
+        for chat_id in range(chats):
+            await store_append(chat_id, "user" if turn % 2 == 0 else "assistant",
+                               texts[(chat_id + turn) % len(texts)])
+    return texts
+
+
+async def measure_memory(chats, turns, factory):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store, append = factory()
+    await fill(append, chats, turns)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return store, used / chats
+
+
+def naive_factory():
+    history = {}
+
+    async def append(chat_id, role, content):
+        history.setdefault(chat_id, []).append({"role": role, "content": content})
+
+    return history, append
+
+
+def store_factory():
+    store = ConversationStore(max_chats=10 ** 7, idle_ttl=10 ** 9)
+    return store, store.append
+
+
+async def latency_ns(fn, chats, samples=20000, seed=1):
+    rng = random.Random(seed)
+    ids = [rng.randrange(chats) for _ in range(samples)]
+    timings = []
+    for chat_id in ids:
+        started = time.perf_counter_ns()
+        await fn(chat_id)
+        timings.append(time.perf_counter_ns() - started)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+async def measure(chats, turns):
+    """Память и время обращения для наивного словаря и ConversationStore;
+    структуры освобождаются при выходе, до замера следующего размера"""
+    naive, naive_bytes = await measure_memory(chats, turns, naive_factory)
+    store, store_bytes = await measure_memory(chats, turns, store_factory)
+
+    async def read_naive(chat_id):
+        return list(naive[chat_id])
+
+    return {
+        "naive_bytes": naive_bytes,
+        "store_bytes": store_bytes,
+        "naive": await latency_ns(read_naive, chats),
+        "messages": await latency_ns(lambda c: store.messages(c, "вопрос"), chats),
+        "append": await latency_ns(lambda c: store.append(c, "user", "ещё вопрос"), chats),
+    }
+
+
+async def prompt_growth(exchanges, latency):
+    """Размер промпта одного долгого чата: вся история против бюджета со сворачиванием"""
+    rng = random.Random(2)
+    async with GroqStub(latency=latency, reply=phrase(rng, 60)) as stub:
+        client = GroqClient(api_key="test", base_url=stub.base_url)
+        store = ConversationStore(client)
+        naive = []
+        for i in range(1, exchanges + 1):
+            question, answer = phrase(rng), phrase(rng, 80)
+            naive_tokens = sum(count_tokens(m["content"]) for m in naive) + count_tokens(question)
+            store_tokens = sum(count_tokens(m["content"]) for m in await store.messages(1, question))
+            naive += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+            await store.add_exchange(1, question, answer)
+            await asyncio.sleep(latency * 2)  # пользователь читает ответ
+            if i in (1, 10, 50, exchanges):
+                print(f"  обмен {i:4d}: вся история {naive_tokens:6d} токенов, ConversationStore {store_tokens:5d}")
+        print(f"  сворачиваний: {store.stats['compactions']}")
+        await store.aclose()
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--turns", type=int, default=30, help="реплик в каждом чате")
+    parser.add_argument("--exchanges", type=int, default=100, help="обменов в долгом чате")
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    for chats in args.chats:
+        result = asyncio.run(measure(chats, args.turns))
+        naive_p50, naive_p99 = result["naive"]
+        store_p50, store_p99 = result["messages"]
+        append_p50, append_p99 = result["append"]
+        print(f"{chats} чатов по {args.turns} реплик (тексты общие, считается только структура):")
+        print(f"  наивный словарь:   {result['naive_bytes']:8.0f} байт/чат, "
+              f"чтение p50={naive_p50:.0f} нс p99={naive_p99:.0f} нс")
+        print(f"  ConversationStore: {result['store_bytes']:8.0f} байт/чат, messages() p50={store_p50:.0f} нс "
+              f"p99={store_p99:.0f} нс, append() p50={append_p50:.0f} нс p99={append_p99:.0f} нс")
+
+    print("Долгий чат:")
+    asyncio.run(prompt_growth(args.exchanges, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Цена инструментирования: span(), observe(), отрисовка /metrics и логирование.
+
+Сравнивает прежний logger.info(f"...{response}") с ленивым debug("%s"),
+который на уровне INFO не форматирует и не пишет ответ модели:
+    python -m benchmarks.bench_metrics --calls 200000 --series 50
+"""
+import argparse
+import logging
+import os
+import time
+
+from bot_core.metrics import Registry, span
+
+
+def per_call_ns(fn, calls):
+    started = time.perf_counter_ns()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter_ns() - started) / calls
+
+
+def noop():
+    pass
+
+
+def with_span():
+    with span("bench"):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--series", type=int, default=50, help="серий меток в гистограмме для /metrics")
+    parser.add_argument("--response-chars", type=int, default=3000, help="длина логируемого ответа модели")
+    args = parser.parse_args()
+
+    base = per_call_ns(noop, args.calls)
+    print(f"span():                 {per_call_ns(with_span, args.calls) - base:7.0f} нс на замер")
+
+    registry = Registry()
+    histogram = registry.histogram("bench_seconds", "Тест", ["stage"])
+    print(f"Histogram.observe():    {per_call_ns(lambda: histogram.observe(0.03, 'groq'), args.calls) - base:7.0f} нс")
+    for i in range(args.series):
+        histogram.observe(0.1, f"stage{i}")
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"render() {args.series} серий:     {(time.perf_counter() - started) * 1000:7.2f} мс, {len(text)} байт")
+
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    with open(os.devnull, "w") as devnull:
+        logger.addHandler(logging.StreamHandler(devnull))
+        response = "ответ модели " * (args.response_chars // 13)
+        calls = args.calls // 10
+        eager = per_call_ns(lambda: logger.info(f"Сырой ответ от Groq API: {response}"), calls)
+        lazy = per_call_ns(lambda: logger.debug("Сырой ответ от Groq API: %s", response), calls)
+    print(f"Лог ответа ({len(response)} символов): info(f-строка) {eager:.0f} нс, debug(%s) {lazy:.0f} нс")
+
+
+if __name__ == "__main__":
+    main()
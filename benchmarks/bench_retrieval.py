@@ -0,0 +1,87 @@
+"""Стоимость гибридного поиска: построение BM25 и p50/p99 запроса по стадиям.
+
+    python -m benchmarks.bench_retrieval --docs 100000 --queries 300
+"""
+import argparse
+import asyncio
+import time
+
+import faiss
+import numpy as np
+
+from bot_core.bm25 import BM25Index
+from bot_core.retrieval import HybridRetriever, reciprocal_rank_fusion
+
+VOCABULARY = [f"term{i}" for i in range(20000)] + ["deploy", "contract", "--network", "0xabc123", "hardhat.config"]
+
+
+class StaticEmbedder:
+    """Эмбеддинг запроса без модели: случайный вектор, стоимость только поиска"""
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    async def embed(self, text):
+        return np.random.rand(self.dim).astype(np.float32)
+
+
+def make_docs(count, words, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(VOCABULARY) + 1)
+    weights /= weights.sum()
+    return [" ".join(rng.choice(VOCABULARY, words, p=weights)) for _ in range(count)]
+
+
+def percentiles(values):
+    return np.percentile(values, 50) * 1000, np.percentile(values, 99) * 1000
+
+
+async def bench(args):
+    docs = make_docs(args.docs, args.words)
+    started = time.perf_counter()
+    bm25 = BM25Index.build(range(len(docs) - args.increment), docs[:-args.increment])
+    print(f"BM25 build: {time.perf_counter() - started:.2f} s for {len(docs) - args.increment} docs")
+    started = time.perf_counter()
+    bm25.add(range(len(docs) - args.increment, len(docs)), docs[-args.increment:])
+    print(f"BM25 incremental add: {(time.perf_counter() - started) * 1000:.1f} ms for {args.increment} docs")
+    started = time.perf_counter()
+    bm25.compact()
+    print(f"BM25 compact: {time.perf_counter() - started:.2f} s")
+
+    index = faiss.IndexFlatL2(args.dim)
+    index.add(np.random.rand(len(docs), args.dim).astype(np.float32))
+    faiss.omp_set_num_threads(1)
+    retriever = HybridRetriever(index, docs, StaticEmbedder(args.dim), bm25=bm25)
+
+    queries = [" ".join(q.split()[:6]) + " --network 0xabc123" for q in make_docs(args.queries, 6, seed=1)]
+    timings = {"bm25": [], "dense": [], "fusion": [], "total": []}
+    for query in queries:
+        vector = await retriever.embedder.embed(query)
+        t0 = time.perf_counter()
+        sparse = retriever.sparse_search(query, 20)
+        t1 = time.perf_counter()
+        dense = retriever.dense_search(vector, 20)
+        t2 = time.perf_counter()
+        reciprocal_rank_fusion([dense, sparse])
+        t3 = time.perf_counter()
+        await retriever.search(query)
+        t4 = time.perf_counter()
+        for name, value in zip(timings, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            timings[name].append(value)
+    for name, values in timings.items():
+        p50, p99 = percentiles(values)
+        print(f"{name:7s} p50={p50:7.3f} ms  p99={p99:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=150)
+    parser.add_argument("--increment", type=int, default=1000, help="документов в инкрементальной добавке")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=300)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
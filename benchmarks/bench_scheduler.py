@@ -0,0 +1,128 @@
+"""Симуляция смешанной нагрузки: справедливость и хвостовые задержки с Scheduler и без него.
+
+Обычные пользователи шлют короткие (/ts, /ask) и длинные (/ctx) запросы,
+несколько «флудеров» засыпают бота длинными запросами. Бэкенд — пул из
+--slots слотов (лимит провайдера); без планировщика это просто FIFO-семафор,
+как GroqClient. Время симуляции ускоряется в 1/--scale раз:
+    python -m benchmarks.bench_scheduler --duration 60 --flooders 2 --scale 0.05
+"""
+import argparse
+import asyncio
+import random
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+from bot_core.scheduler import FAST, SLOW, QueueFull, RateLimited, Scheduler
+
+SERVICE_TIME = {FAST: 0.4, SLOW: 3.0}
+
+
+class Workload:
+    def __init__(self, args):
+        self.args = args
+        self.latencies = {}
+        self.rejected = {}
+        self.unfinished = {}
+        self.busy = {}
+
+    def record(self, group, key, value=1):
+        getattr(self, key)[group] = getattr(self, key).get(group, 0) + value
+
+
+async def simulate(args, make_slot):
+    scale = args.scale
+    workload = Workload(args)
+    rng = random.Random(0)
+    tasks = []
+
+    async def request(user_id, group, lane):
+        started = asyncio.get_running_loop().time()
+        try:
+            async with make_slot(user_id, lane):
+                service = SERVICE_TIME[lane] * rng.uniform(0.5, 1.5)
+                await asyncio.sleep(service * scale)
+                workload.record(group, "busy", service)
+        except (RateLimited, QueueFull):
+            workload.record(group, "rejected")
+            return
+        except asyncio.CancelledError:
+            workload.record(group, "unfinished")
+            return
+        elapsed = (asyncio.get_running_loop().time() - started) / scale
+        workload.latencies.setdefault(f"{group}/{lane}", []).append(elapsed)
+
+    async def user(user_id, group, interval, fast_share):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + args.duration * scale
+        while loop.time() < deadline:
+            await asyncio.sleep(rng.expovariate(1 / interval) * scale)
+            lane = FAST if rng.random() < fast_share else SLOW
+            tasks.append(asyncio.ensure_future(request(user_id, group, lane)))
+
+    users = [user(i, "обычные", args.interval, 0.5) for i in range(args.users)]
+    users += [user(args.users + i, "флудеры", args.flood_interval, 0.0) for i in range(args.flooders)]
+    await asyncio.gather(*users)
+    # Даём доработать очереди, но не бесконечно
+    _, pending = await asyncio.wait(tasks, timeout=args.duration * scale) if tasks else (None, [])
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return workload
+
+
+def baseline_factory(args):
+    semaphore = asyncio.Semaphore(args.slots)
+
+    @asynccontextmanager
+    async def slot(user_id, lane):
+        async with semaphore:
+            yield
+
+    return slot
+
+
+def scheduler_factory(args):
+    # Ведра пополняются по реальным часам, а время симуляции ускорено
+    rate = args.user_rate / args.scale
+    scheduler = Scheduler(max_concurrency=args.slots, user_rate=rate, user_burst=args.user_burst,
+                          chat_rate=rate * 2, chat_burst=args.user_burst * 2)
+
+    def slot(user_id, lane):
+        return scheduler.slot(user_id, user_id, lane)
+
+    return slot
+
+
+def report(name, workload):
+    print(f"\n{name}:")
+    print(f"  {'группа/очередь':20s} {'готово':>7s} {'p50 с':>7s} {'p95 с':>7s} {'p99 с':>7s}")
+    for key in sorted(workload.latencies):
+        values = workload.latencies[key]
+        print(f"  {key:20s} {len(values):7d} {np.percentile(values, 50):7.2f} {np.percentile(values, 95):7.2f} "
+              f"{np.percentile(values, 99):7.2f}")
+    total = sum(workload.busy.values()) or 1.0
+    for group in sorted(set(workload.busy) | set(workload.rejected) | set(workload.unfinished)):
+        print(f"  {group}: доля времени бэкенда {workload.busy.get(group, 0) / total:5.1%}, "
+              f"отклонено {workload.rejected.get(group, 0)}, не дождались {workload.unfinished.get(group, 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=60, help="длительность нагрузки, с симуляции")
+    parser.add_argument("--users", type=int, default=30)
+    parser.add_argument("--interval", type=float, default=8.0, help="среднее время между запросами пользователя, с")
+    parser.add_argument("--flooders", type=int, default=2)
+    parser.add_argument("--flood-interval", type=float, default=0.1)
+    parser.add_argument("--slots", type=int, default=8)
+    parser.add_argument("--user-rate", type=float, default=0.2)
+    parser.add_argument("--user-burst", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=0.05, help="реальных секунд на секунду симуляции")
+    args = parser.parse_args()
+
+    report("без планировщика (FIFO-семафор)", asyncio.run(simulate(args, baseline_factory(args))))
+    report("Scheduler", asyncio.run(simulate(args, scheduler_factory(args))))
+
+
+if __name__ == "__main__":
+    main()
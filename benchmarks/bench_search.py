@@ -0,0 +1,85 @@
+"""Поиск через SearchGateway против прямых вызовов Tavily на повторяющихся запросах.
+
+Запросы берутся из benchmarks/queries.txt с распределением Ципфа (популярные
+темы спрашивают чаще), Tavily имитирует локальная заглушка:
+    python -m benchmarks.bench_search --requests 400 --concurrency 50 --latency 0.3
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import aiohttp
+import numpy as np
+
+from benchmarks.stubs import TavilyStub
+from bot_core.search import SearchGateway
+
+QUERIES_PATH = os.path.join(os.path.dirname(__file__), "queries.txt")
+
+
+def workload(count, zipf_a, seed=0):
+    with open(QUERIES_PATH, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(zipf_a, size=count), len(queries)) - 1
+    depths = rng.choice(["basic", "advanced"], size=count, p=[0.7, 0.3])
+    return [(queries[r], d) for r, d in zip(ranks, depths)]
+
+
+async def run(calls, search, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(query, depth):
+        async with semaphore:
+            started = time.perf_counter()
+            await search(query, depth)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(q, d) for q, d in calls))
+    return time.perf_counter() - started, latencies
+
+
+async def bench(args):
+    calls = workload(args.requests, args.zipf)
+    async with TavilyStub(latency=args.latency) as stub:
+        async with aiohttp.ClientSession() as session:
+            async def direct(query, depth):
+                payload = {"api_key": "test", "query": query, "search_depth": depth, "max_results": 5}
+                async with session.post(f"{stub.url}/search", json=payload) as response:
+                    return await response.json()
+
+            stub.requests = 0
+            elapsed, latencies = await run(calls, direct, args.concurrency)
+            report("direct", elapsed, latencies, stub.requests)
+
+        gateway = SearchGateway("test", base_url=stub.url, rate=args.rate, burst=args.burst,
+                                max_concurrency=args.max_concurrency)
+        stub.requests = 0
+        elapsed, latencies = await run(calls, lambda q, d: gateway.search(q, search_depth=d), args.concurrency)
+        report("gateway", elapsed, latencies, stub.requests)
+        print(f"  статистика: {gateway.stats}, доля без обращения к API: {gateway.hit_rate():.1%}")
+        await gateway.aclose()
+
+
+def report(mode, elapsed, latencies, api_calls):
+    print(f"{mode:8s} вызовов API: {api_calls:4d}  p50={np.percentile(latencies, 50) * 1000:7.1f} ms  "
+          f"p99={np.percentile(latencies, 99) * 1000:7.1f} ms  всего {elapsed:.2f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3, help="задержка basic-поиска в заглушке, с")
+    parser.add_argument("--zipf", type=float, default=1.3, help="параметр распределения Ципфа")
+    parser.add_argument("--rate", type=float, default=20, help="запросов в секунду к API")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
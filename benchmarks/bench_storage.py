@@ -0,0 +1,86 @@
+"""Холодный старт и память: прежний загрузчик против mmap-хранилища.
+
+Генерирует синтетический корпус (или берёт существующие файлы), затем
+в отдельных процессах загружает индекс и чанки обоими способами и
+выполняет несколько поисков. RssAnon — приватная память процесса,
+RssFile — страницы файлов, которые делят все процессы:
+    python -m benchmarks.bench_storage --chunks 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+LOADER = r"""
+import json, sys, time
+started = time.perf_counter()
+import faiss
+import numpy as np
+mode, index_path, json_path, store_path = sys.argv[1:5]
+if mode == "legacy":
+    index = faiss.read_index(index_path)
+    with open(json_path, encoding="utf-8") as f:
+        chunks = json.load(f)
+else:
+    from bot_core.storage import ChunkStore, load_index
+    index = load_index(index_path)
+    chunks = ChunkStore(store_path)
+loaded = time.perf_counter() - started
+queries = np.random.rand(20, index.d).astype(np.float32)
+for query in queries:
+    _, ids = index.search(query.reshape(1, -1), 7)
+    texts = [chunks[int(i)]["content"] for i in ids[0]]
+status = dict(line.split(":", 1) for line in open("/proc/self/status") if line.startswith(("VmRSS", "RssAnon", "RssFile")))
+print(json.dumps({"load_s": loaded, **{k: int(v.split()[0]) for k, v in status.items()}}))
+"""
+
+
+def make_corpus(directory, count, dim):
+    import faiss
+
+    from bot_core.storage import write_chunk_store
+
+    chunks = [{"content": f"Фрагмент документации номер {i}. " * 20} for i in range(count)]
+    index = faiss.IndexFlatL2(dim)
+    index.add(np.random.rand(count, dim).astype(np.float32))
+    paths = (os.path.join(directory, "bench.index"), os.path.join(directory, "bench_chunks.json"),
+             os.path.join(directory, "bench_chunks.bin"))
+    faiss.write_index(index, paths[0])
+    with open(paths[1], "w", encoding="utf-8") as f:
+        json.dump(chunks, f, ensure_ascii=False)
+    write_chunk_store(paths[2], chunks)
+    return paths
+
+
+def measure(mode, paths):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", LOADER, mode, *paths], check=True,
+                            capture_output=True, text=True, cwd=root).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--paths", nargs=3, metavar=("INDEX", "JSON", "BIN"),
+                        help="готовые файлы вместо синтетического корпуса")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        paths = args.paths or make_corpus(directory, args.chunks, args.dim)
+        print(f"корпус готов за {time.perf_counter() - started:.1f} с")
+        for mode in ("legacy", "mmap"):
+            result = measure(mode, paths)
+            print(f"{mode:7s} load={result['load_s'] * 1000:8.1f} ms  VmRSS={result['VmRSS'] / 1024:7.1f} MiB  "
+                  f"RssAnon={result['RssAnon'] / 1024:7.1f} MiB  RssFile={result['RssFile'] / 1024:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
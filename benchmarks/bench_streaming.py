@@ -0,0 +1,77 @@
+"""Время до первого видимого токена: полный ответ против потоковой выдачи.
+
+Telegram имитируется объектами сообщений, которые запоминают момент
+каждой отправки и правки; Groq — локальной заглушкой:
+    python -m benchmarks.bench_streaming --tokens 400 --token-latency 0.01
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.stubs import GroqStub
+from bot_core.llm import GroqClient
+from bot_core.streaming import StreamingMessage
+
+
+class FakeMessage:
+    """Сообщение Telegram, записывающее время вывода текста"""
+
+    def __init__(self, log, started):
+        self.log = log
+        self.started = started
+
+    def _record(self, text):
+        self.log.append((time.perf_counter() - self.started, len(text)))
+
+    async def answer(self, text):
+        self._record(text)
+        return FakeMessage(self.log, self.started)
+
+    async def edit_text(self, text):
+        self._record(text)
+
+
+async def full_response(client, prompt):
+    log, started = [], time.perf_counter()
+    response = await client.complete(prompt)
+    for i in range(0, len(response), 4000):
+        await FakeMessage(log, started).answer(response[i:i + 4000])
+    return log
+
+
+async def streamed_response(client, prompt, interval):
+    log, started = [], time.perf_counter()
+    await StreamingMessage(FakeMessage(log, started), interval=interval).consume(client.stream(prompt))
+    return log
+
+
+async def bench(args):
+    reply = " ".join(f"слово{i}" for i in range(args.tokens))
+    async with GroqStub(latency=args.latency, token_latency=args.token_latency, reply=reply) as stub:
+        client = GroqClient(api_key="test", base_url=stub.base_url)
+        for name, run in (("full", lambda: full_response(client, "вопрос")),
+                          ("stream", lambda: streamed_response(client, "вопрос", args.interval))):
+            first, total, calls = [], [], []
+            for _ in range(args.repeat):
+                log = await run()
+                first.append(log[0][0])
+                total.append(log[-1][0])
+                calls.append(len(log))
+            print(f"{name:6s}  first visible={statistics.median(first) * 1000:8.1f} ms  "
+                  f"complete={statistics.median(total) * 1000:8.1f} ms  telegram calls={statistics.median(calls):.0f}")
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=400, help="длина ответа в словах")
+    parser.add_argument("--latency", type=float, default=0.2, help="время до первого токена, с")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="время на токен, с")
+    parser.add_argument("--interval", type=float, default=1.0, help="минимальный интервал правок, с")
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
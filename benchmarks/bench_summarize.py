@@ -0,0 +1,80 @@
+"""Суммаризация длинного текста: обрезка до 5000 символов, один большой промпт и map-reduce Summarizer.
+
+Для каждого варианта — время, число вызовов модели и доля входного
+текста, которую модель увидела. Groq имитирует заглушка, время ответа
+которой растёт с длиной промпта:
+    python -m benchmarks.bench_summarize --words 12000 --prompt-token-latency 0.0001
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from benchmarks.stubs import GroqStub
+from bot_core.llm import GroqClient
+from bot_core.summarize import Summarizer
+from bot_core.tokens import count_tokens
+
+QUERIES_PATH = os.path.join(os.path.dirname(__file__), "queries.txt")
+INSTRUCTION = "Summarize the following content in Russian"
+# Окно контекста gemma2-9b-it
+CONTEXT_WINDOW = 8192
+
+
+def long_text(words, seed=0):
+    """Абзацы по ~80 слов из словаря вопросов про Swisstronik"""
+    with open(QUERIES_PATH, encoding="utf-8") as f:
+        vocabulary = f.read().split()
+    rng = random.Random(seed)
+    paragraphs = []
+    for _ in range(max(1, words // 80)):
+        sentences = [" ".join(rng.choice(vocabulary) for _ in range(16)).capitalize() + "." for _ in range(5)]
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+async def timed(coroutine):
+    started = time.perf_counter()
+    result = await coroutine
+    return time.perf_counter() - started, result
+
+
+async def bench(args):
+    text = long_text(args.words)
+    reply = " ".join(["краткое"] * args.reply_words)
+    async with GroqStub(latency=args.latency, token_latency=args.token_latency,
+                        prompt_token_latency=args.prompt_token_latency, reply=reply) as stub:
+        client = GroqClient(api_key="test", base_url=stub.base_url)
+        tokens = count_tokens(text)
+        print(f"вход: {tokens} токенов")
+
+        seconds, _ = await timed(client.complete(f"{INSTRUCTION}:\n\n{text[:5000]}"))
+        print(f"обрезка до 5000 симв.: {seconds:6.2f} с, вызовов  1, модель видит {count_tokens(text[:5000]) / tokens:5.1%}")
+        seconds, _ = await timed(client.complete(f"{INSTRUCTION}:\n\n{text}"))
+        note = f" (больше окна {CONTEXT_WINDOW} токенов)" if tokens > CONTEXT_WINDOW else ""
+        print(f"один промпт:           {seconds:6.2f} с, вызовов  1, модель видит 100.0%{note}")
+
+        summarizer = Summarizer(client, segment_tokens=args.segment_tokens, max_concurrency=args.max_concurrency)
+        for label in ("map-reduce:           ", "map-reduce (повтор):  "):
+            calls = stub.requests
+            seconds, _ = await timed(summarizer.summarize(text, INSTRUCTION))
+            print(f"{label}{seconds:6.2f} с, вызовов {stub.requests - calls:2d}, модель видит 100.0%")
+        print(f"статистика: {summarizer.stats}")
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=12000)
+    parser.add_argument("--segment-tokens", type=int, default=1500)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="время до первого токена, с")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0001, help="на слово промпта, с")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="на слово ответа, с")
+    parser.add_argument("--reply-words", type=int, default=150)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
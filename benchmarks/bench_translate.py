@@ -0,0 +1,96 @@
+"""Перевод /ts: синхронный deepl.Translator в обработчике против TranslationService.
+
+DeepL имитирует локальная заглушка (время ответа растёт с числом символов),
+часть сообщений — повторно пересылаемые одинаковые посты:
+    python -m benchmarks.bench_translate --messages 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import deepl
+import numpy as np
+
+from benchmarks.stubs import DeepLStub
+from bot_core.translate import TranslationService
+
+SENTENCES = ("Swisstronik is a privacy-preserving EVM-compatible blockchain.",
+             "Validators run nodes inside Intel SGX enclaves.",
+             "The testnet faucet gives you tokens to deploy contracts.",
+             "Compliance is handled with on-chain identity verification.",
+             "Transactions are encrypted before they reach the network.")
+
+
+def make_posts(count, unique, seed=0):
+    rng = random.Random(seed)
+    pool = [" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 8))) for _ in range(unique)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+async def run(handler, texts, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(text):
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(text)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(text) for text in texts))
+    return time.perf_counter() - started, latencies
+
+
+def report(name, elapsed, latencies, stub, calls_before):
+    print(f"{name:24s} {elapsed:7.2f} с  p50={np.percentile(latencies, 50) * 1000:7.1f} ms  "
+          f"p99={np.percentile(latencies, 99) * 1000:7.1f} ms  запросов к DeepL: {stub.requests - calls_before}")
+
+
+async def bench(args):
+    stub = DeepLStub(latency=args.latency, char_latency=args.char_latency).start_in_thread()
+    try:
+        translator = deepl.Translator("test:fx", server_url=stub.url)
+        posts = make_posts(args.messages, args.unique)
+
+        async def sync_handler(text):
+            # Как было: блокирующий вызов в обработчике
+            translator.translate_text(text, target_lang="RU")
+
+        calls = stub.requests
+        elapsed, latencies = await run(sync_handler, posts[:min(len(posts), 50)], args.concurrency)
+        report(f"синхронно ({min(len(posts), 50)} сообщ.)", elapsed, latencies, stub, calls)
+
+        service = TranslationService(translator)
+        calls = stub.requests
+        elapsed, latencies = await run(lambda text: service.translate(text, "RU"), posts, args.concurrency)
+        report(f"TranslationService ({len(posts)})", elapsed, latencies, stub, calls)
+        print(f"  статистика: {service.stats}, доля из кэша: {service.hit_rate():.1%}")
+
+        # Нумерация делает предложения разными, иначе одинаковые сегменты схлопнутся в один
+        long_text = " ".join(f"{i}. {SENTENCES[i % len(SENTENCES)]}" for i in range(args.long_chars // 40))
+        for name, fn in (("длинный текст целиком", lambda: asyncio.to_thread(translator.translate_text,
+                                                                               long_text, target_lang="RU")),
+                         ("длинный текст сегментами", lambda: TranslationService(translator).translate(long_text))):
+            calls = stub.requests
+            started = time.perf_counter()
+            await fn()
+            report(name, time.perf_counter() - started, [time.perf_counter() - started], stub, calls)
+    finally:
+        stub.stop_thread()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--unique", type=int, default=40, help="различных постов среди сообщений")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.15, help="базовая задержка DeepL, с")
+    parser.add_argument("--char-latency", type=float, default=0.0001, help="задержка на символ, с")
+    parser.add_argument("--long-chars", type=int, default=20000)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
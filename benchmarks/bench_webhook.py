@@ -0,0 +1,110 @@
+"""Нагрузочный тест вебхука: фейковый Telegram шлёт апдейты в WebhookApp под uvicorn.
+
+Обработчик имитирует работу (await asyncio.sleep) и отвечает через
+заглушку Bot API, поэтому видно и время подтверждения, и реальную
+пропускную способность обработки:
+    python -m benchmarks.bench_webhook --updates 5000 --concurrency 200 --work 0.2
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+import numpy as np
+import uvicorn
+from aiogram import Bot, Dispatcher, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from benchmarks.stubs import TelegramStub
+from bot_core.webhook import WebhookApp
+
+TOKEN = "123456:TEST"
+SECRET = "bench-secret"
+
+
+def make_update(update_id, chat_id):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "text": f"сообщение {update_id}",
+        },
+    }
+
+
+def build_app(telegram_url, work, workers, queue_size):
+    session = AiohttpSession(api=TelegramAPIServer.from_base(telegram_url))
+    bot = Bot(token=TOKEN, session=session)
+    dp = Dispatcher()
+
+    @dp.message()
+    async def echo(message: types.Message):
+        await asyncio.sleep(work)
+        await message.answer("ok")
+
+    return WebhookApp(dp, bot, path="/webhook", secret_token=SECRET, workers=workers, queue_size=queue_size)
+
+
+async def load(url, updates, concurrency):
+    """Фейковый Telegram: отправляет апдейты не более чем concurrency одновременно"""
+    latencies, statuses = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def one(i):
+            async with semaphore:
+                started = time.perf_counter()
+                async with session.post(url, json=make_update(i, 1000 + i % 500),
+                                        headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as resp:
+                    await resp.read()
+                    statuses[resp.status] = statuses.get(resp.status, 0) + 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(updates)))
+        return time.perf_counter() - started, latencies, statuses
+
+
+async def bench(args):
+    async with TelegramStub() as telegram:
+        app = build_app(telegram.url, args.work, args.workers, args.queue_size)
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port,
+                                               log_level="warning", lifespan="on"))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        elapsed, latencies, statuses = await load(f"http://127.0.0.1:{args.port}/webhook",
+                                                  args.updates, args.concurrency)
+        accepted = statuses.get(200, 0)
+        while app.stats["processed"] + app.stats["failed"] < accepted:
+            await asyncio.sleep(0.01)
+        processed_in = time.perf_counter() - started
+
+        server.should_exit = True
+        await serving
+
+    print(f"ack: {args.updates / elapsed:8.1f} upd/s  p50={np.percentile(latencies, 50) * 1000:.1f} ms  "
+          f"p99={np.percentile(latencies, 99) * 1000:.1f} ms  statuses={statuses}")
+    print(f"processed: {accepted / processed_in:8.1f} upd/s  stats={app.stats}  "
+          f"sendMessage calls={telegram.calls.get('sendMessage', 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--work", type=float, default=0.2, help="время обработки апдейта, с")
+    parser.add_argument("--workers", type=int, default=256)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Пропускная способность многопроцессного режима: апдейтов в секунду от числа воркеров.
+
+Фронт раздаёт апдейты WorkerPool по chat_id, обработчик делает CPU-работу
+/link (извлечение текста из HTML-страницы) и отвечает в заглушку Bot API.
+Заодно проверяется, что ответы каждого чата пришли в порядке апдейтов:
+    python -m benchmarks.bench_workers --workers 1 2 4 --updates 400 --page-kb 200
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.stubs import TelegramStub, make_page
+from bot_core.fetch import TextExtractor
+from bot_core.workers import WorkerPool
+
+
+def create_dispatcher(page_kb):
+    """Диспетчер воркера для бенчмарка; page_kb — размер разбираемой страницы"""
+    from aiogram import Dispatcher, Router
+    from aiogram.types import Message
+
+    # aiogram пишет в INFO каждый обработанный апдейт
+    logging.getLogger("aiogram.event").setLevel(logging.WARNING)
+    html = make_page(page_kb).decode("utf-8")
+    router = Router()
+
+    @router.message()
+    async def handler(message: Message):
+        extractor = TextExtractor(max_chars=10 ** 9)
+        extractor.feed(html)
+        extractor.close()
+        await message.answer(message.text)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+def make_updates(count, chats):
+    for update_id in range(count):
+        chat_id = update_id % chats
+        yield {"update_id": update_id, "message": {
+            "message_id": update_id, "date": 0, "text": str(update_id),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "bench"},
+        }}
+
+
+def in_order(sent):
+    last = {}
+    for chat_id, text in sent:
+        if int(text) < last.get(chat_id, -1):
+            return False
+        last[chat_id] = int(text)
+    return True
+
+
+def run(workers, updates, chats, page_kb, stub):
+    pool = WorkerPool(page_kb, workers, factory="benchmarks.bench_workers:create_dispatcher",
+                      token="1:bench", api_url=stub.url).start()
+    stub.sent.clear()
+    started = time.perf_counter()
+    for update in make_updates(updates, chats):
+        pool.dispatch(update)
+    pool.stop()
+    elapsed = time.perf_counter() - started
+    return elapsed, len(stub.sent), in_order(stub.sent)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--updates", type=int, default=400)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--page-kb", type=int, default=200, help="размер страницы, которую разбирает обработчик")
+    args = parser.parse_args()
+
+    extractor = TextExtractor(max_chars=10 ** 9)
+    started = time.perf_counter()
+    extractor.feed(make_page(args.page_kb).decode("utf-8"))
+    print(f"CPU-работа на апдейт: {(time.perf_counter() - started) * 1000:.1f} мс")
+
+    stub = TelegramStub().start_in_thread()
+    try:
+        baseline = None
+        for workers in args.workers:
+            elapsed, sent, ordered = run(workers, args.updates, args.chats, args.page_kb, stub)
+            rate = args.updates / elapsed
+            baseline = baseline or rate
+            print(f"воркеров {workers:2d}: {rate:7.1f} апдейтов/с (x{rate / baseline:.2f}), "
+                  f"ответов {sent}/{args.updates}, порядок в чатах {'сохранён' if ordered else 'НАРУШЕН'}")
+    finally:
+        stub.stop_thread()
+
+
+if __name__ == "__main__":
+    main()
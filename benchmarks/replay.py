@@ -0,0 +1,349 @@
+"""Офлайн-прогон записанных или синтетических апдейтов через настоящий диспетчер бота.
+
+Апдейты идут в create_dispatcher(профиль) с общими обработчиками,
+внешние API — локальные заглушки (Bot API, Groq, Tavily, DeepL) с
+настраиваемой задержкой, эмбеддинги и индекс — хэширующая модель по
+chunks.json. Отчёт: пропускная способность, p50/p95/p99 по командам,
+разбивка по этапам (эмбеддинги, FAISS, BM25, Groq, Tavily, DeepL) и
+запросы к Bot API; результат сохраняется в JSON и сравнивается с базовым:
+
+    python -m benchmarks.replay requests.jsonl --profile conty --output replay.json
+    python -m benchmarks.replay requests.jsonl --profile conty --baseline replay.json
+
+Строки входного файла (JSONL; строка не-JSON считается текстом сообщения):
+  {"update_id": ..., "message": {...}}  — записанный апдейт, как есть;
+  {"text": "/ask ...", "chat_id": 1}    — сообщение с заданным текстом;
+  {"title": ..., "body": ...}           — запись бэклога: из неё по очереди
+                                          собираются команды профиля.
+Лимиты планировщика на пользователя и чат в прогоне по умолчанию сняты
+(с --limits — как в конфигурации). Апдейты, отклонённые планировщиком,
+считаются отдельно и не входят во время обработки команд.
+При регрессии больше --threshold код возврата 1.
+"""
+import argparse
+import asyncio
+import contextvars
+import copy
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+from benchmarks.bench_context import HashingModel, synthetic_corpus
+from benchmarks.stubs import DeepLStub, GroqStub, TavilyStub, TelegramStub
+from bot_core.metrics import LLM_TOKENS, STAGE_SECONDS, TELEGRAM_SECONDS
+from bot_core.scheduler import QueueFull, RateLimited, Scheduler, command_of
+from bot_core.services import Services
+
+TOKEN = "123456:REPLAY"
+
+# Шаблоны команд для записей {"title", "body"}; {title} — заголовок, {body} — начало текста
+TEMPLATES = {
+    "conty": ("/ctx {title}", "/ctxsum {title}", "/ts {body}", "{title}"),
+    "vps": ("/search {title}", "/ask {title}", "/summary {title}", "{title}"),
+    "webhook": ("/search {title}", "/ask {title}", "/summary {title}", "{title}"),
+}
+
+
+# Отметка об отказе планировщика для апдейта, который обрабатывается в текущей задаче
+REJECTED = contextvars.ContextVar("replay_rejected")
+
+
+class ReplayScheduler(Scheduler):
+    """Scheduler, который отмечает апдейты, отклонённые лимитами или переполненной очередью"""
+
+    @asynccontextmanager
+    async def slot(self, *args, **kwargs):
+        admitted = False
+        try:
+            async with super().slot(*args, **kwargs):
+                admitted = True
+                yield
+        except (RateLimited, QueueFull) as e:
+            if not admitted:
+                REJECTED.get({})[type(e).__name__] = True
+            raise
+
+
+class ReplayServices(Services):
+    """Services, у которых внешние API — заглушки, а эмбеддинги и индекс — синтетические"""
+
+    def __init__(self, stubs, corpus, **kwargs):
+        super().__init__(**kwargs)
+        self.stubs = stubs
+        self.corpus = corpus
+
+    def _create_groq(self):
+        from bot_core.llm import GroqClient
+
+        return GroqClient(api_key="replay", model=self.model, base_url=self.stubs["groq"].base_url)
+
+    def _create_search(self):
+        from bot_core.search import SearchGateway
+
+        return self._track("search", SearchGateway(api_key="replay", base_url=self.stubs["tavily"].url))
+
+    def _create_translator(self):
+        import deepl
+
+        from bot_core.translate import TranslationService
+
+        translator = deepl.Translator("replay:fx", server_url=self.stubs["deepl"].url)
+        return self._track("translate", TranslationService(translator))
+
+    def _create_embedder(self):
+        from bot_core.embeddings import EmbeddingService
+
+        return self._track("embeddings", EmbeddingService(HashingModel()))
+
+    def _create_retriever(self):
+        from bot_core.retrieval import HybridRetriever
+
+        index, chunks, bm25 = synthetic_corpus(HashingModel(), self.corpus)
+        return HybridRetriever(index, chunks, self.embedder, bm25=bm25)
+
+
+def make_message(update_id, text, chat_id):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Replay"},
+            "text": text,
+        },
+    }
+
+
+def load_updates(path, profile, chats, body_chars=800):
+    """Апдейты из JSONL; chat_id синтетических сообщений — номер строки по модулю chats"""
+    templates = TEMPLATES[profile]
+    updates = []
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    for number, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = {"text": line}
+        if not isinstance(record, dict):
+            record = {"text": str(record)}
+        chat_id = record.get("chat_id", number % chats + 1)
+        if "message" in record:
+            updates.append({"update_id": number, **record})
+        elif "text" in record:
+            updates.append(make_message(number, record["text"], chat_id))
+        elif "title" in record or "body" in record:
+            title = record.get("title") or record.get("body", "")[:100]
+            body = " ".join(record.get("body", title).split())[:body_chars]
+            text = templates[number % len(templates)].format(title=title, body=body)
+            updates.append(make_message(number, text, chat_id))
+    return updates
+
+
+def command_label(update):
+    command = command_of((update.get("message") or {}).get("text"))
+    return f"/{command}" if command else "message"
+
+
+def percentiles_ms(values):
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+    return {"count": len(values), "mean_ms": float(np.mean(values) * 1000),
+            "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def histogram_summary(histogram):
+    """Сводка серий гистограммы из bot_core.metrics: число, сумма и оценки p50/p95 по корзинам"""
+    summary = {}
+    for labels, count, total in histogram.totals():
+        summary[labels[0]] = {"count": count, "total_s": total, "mean_ms": total / count * 1000 if count else 0.0,
+                              "p50_le_ms": histogram.quantile(0.5, *labels) * 1000,
+                              "p95_le_ms": histogram.quantile(0.95, *labels) * 1000}
+    return summary
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def replay(args):
+    from aiogram.types import Update
+
+    from bot_core.app import PROFILES, create_bot, create_dispatcher
+
+    loaded = load_updates(args.input, args.profile, args.chats)
+    # Каждый повтор — свои копии апдейтов, иначе перенумерация затронет все повторы сразу
+    updates = [copy.deepcopy(update) for _ in range(args.repeat) for update in loaded]
+    for update_id, update in enumerate(updates):
+        update["update_id"] = update_id
+    profile = PROFILES[args.profile]
+
+    stubs = {
+        "telegram": TelegramStub(latency=args.telegram_latency),
+        "groq": GroqStub(latency=args.groq_latency, token_latency=args.groq_token_latency),
+        "tavily": TavilyStub(latency=args.tavily_latency),
+        "deepl": DeepLStub(latency=args.deepl_latency),
+    }
+    for stub in stubs.values():
+        await stub.start()
+    bot = create_bot(TOKEN, api_url=stubs["telegram"].url)
+    services = ReplayServices(stubs, args.corpus, model=profile.model, temperature=profile.temperature)
+    if args.limits:
+        scheduler = ReplayScheduler()
+    else:
+        # Сотни сообщений в секунду из нескольких чатов — штатные лимиты отклонили бы большую часть
+        scheduler = ReplayScheduler(max_queue=len(updates), user_rate=0, chat_rate=0)
+    dp = create_dispatcher(profile, services=services, scheduler=scheduler)
+    await dp.emit_startup(bot=bot)
+
+    latencies, rejected = {}, {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(raw):
+        async with semaphore:
+            update = Update.model_validate(raw, context={"bot": bot})
+            outcome = {}
+            REJECTED.set(outcome)
+            started = time.perf_counter()
+            try:
+                await dp.feed_update(bot, update)
+            finally:
+                label = command_label(raw)
+                if outcome:
+                    rejected[label] = rejected.get(label, 0) + 1
+                else:
+                    latencies.setdefault(label, []).append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(raw) for raw in updates))
+    finally:
+        elapsed = time.perf_counter() - started
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+        for stub in stubs.values():
+            await stub.stop()
+
+    processed = sum(len(values) for values in latencies.values())
+    return {
+        "meta": {
+            "profile": args.profile, "input": args.input, "revision": git_revision(),
+            "python": sys.version.split()[0], "concurrency": args.concurrency, "scheduler_limits": args.limits,
+            "latency": {"telegram": args.telegram_latency, "groq": args.groq_latency,
+                        "groq_token": args.groq_token_latency, "tavily": args.tavily_latency,
+                        "deepl": args.deepl_latency},
+        },
+        "updates": len(updates),
+        "processed": processed,
+        "rejected": {"count": sum(rejected.values()), "commands": dict(sorted(rejected.items())),
+                     "rate_limited": scheduler.stats["rate_limited"], "queue_full": scheduler.stats["rejected"]},
+        "elapsed_s": elapsed,
+        "throughput": processed / elapsed,
+        "commands": {command: percentiles_ms(values) for command, values in sorted(latencies.items())},
+        "stages": histogram_summary(STAGE_SECONDS),
+        "telegram": histogram_summary(TELEGRAM_SECONDS),
+        "backend_requests": {name: stub.requests for name, stub in stubs.items()},
+        "tokens": {f"{model}:{kind}": value for (model, kind), value in LLM_TOKENS.items()},
+    }
+
+
+def print_report(result):
+    print(f"{result['updates']} апдейтов за {result['elapsed_s']:.2f} с: {result['throughput']:.1f} апдейтов/с")
+    if result["rejected"]["count"]:
+        print(f"отклонено планировщиком: {result['rejected']['count']} {result['rejected']['commands']}")
+    print(f"{'команда':12s} {'число':>6s} {'p50, мс':>9s} {'p95, мс':>9s} {'p99, мс':>9s}")
+    for command, stats in result["commands"].items():
+        print(f"{command:12s} {stats['count']:6d} {stats['p50_ms']:9.1f} {stats['p95_ms']:9.1f} {stats['p99_ms']:9.1f}")
+    print(f"{'этап':12s} {'число':>6s} {'всего, с':>9s} {'среднее, мс':>12s} {'p95 ≤, мс':>10s}")
+    for stage, stats in sorted(result["stages"].items(), key=lambda item: -item[1]["total_s"]):
+        print(f"{stage:12s} {stats['count']:6d} {stats['total_s']:9.2f} {stats['mean_ms']:12.2f} "
+              f"{stats['p95_le_ms']:10.0f}")
+    sends = ", ".join(f"{method} {stats['count']}" for method, stats in result["telegram"].items())
+    print(f"Bot API: {sends}")
+    print(f"запросы к заглушкам: {result['backend_requests']}")
+
+
+def compare(result, baseline, threshold, min_delta_ms=1.0):
+    """Сравнение с базовым прогоном; возвращает список регрессий больше threshold.
+    Разница времени меньше min_delta_ms (шум субмиллисекундных этапов) регрессией не считается."""
+    regressions = []
+
+    def check(name, new, old, higher_is_better=False):
+        if not old:
+            return
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        significant = higher_is_better or abs(new - old) >= min_delta_ms
+        mark = "РЕГРЕССИЯ" if worse > threshold and significant else ""
+        print(f"  {name:28s} {old:10.1f} -> {new:10.1f} ({change:+.1%}) {mark}")
+        if mark:
+            regressions.append(name)
+
+    print("Сравнение с базовым прогоном:")
+    rejected, old_rejected = result["rejected"]["count"], baseline.get("rejected", {}).get("count", 0)
+    if rejected > old_rejected:
+        # Отклонённые апдейты не доходят до обработчиков, время остальных с базовым несравнимо
+        print(f"  отклонено планировщиком       {old_rejected:10d} -> {rejected:10d} РЕГРЕССИЯ")
+        regressions.append("отклонено")
+    check("апдейтов/с", result["throughput"], baseline["throughput"], higher_is_better=True)
+    for command, stats in result["commands"].items():
+        old = baseline["commands"].get(command)
+        if old is not None:
+            check(f"{command} p95, мс", stats["p95_ms"], old["p95_ms"])
+    for stage, stats in result["stages"].items():
+        old = baseline["stages"].get(stage)
+        if old is not None:
+            check(f"этап {stage}, мс", stats["mean_ms"], old["mean_ms"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", default="requests.jsonl", help="JSONL с апдейтами или записями")
+    parser.add_argument("--profile", default="conty", choices=sorted(TEMPLATES))
+    parser.add_argument("--repeat", type=int, default=5, help="сколько раз повторить входной файл")
+    parser.add_argument("--chats", type=int, default=1000, help="разных чатов у синтетических сообщений")
+    parser.add_argument("--concurrency", type=int, default=32, help="апдейтов в обработке одновременно")
+    parser.add_argument("--limits", action="store_true",
+                        help="лимиты планировщика на пользователя и чат из конфигурации")
+    parser.add_argument("--corpus", default="chunks.json", help="чанки для синтетического индекса")
+    parser.add_argument("--telegram-latency", type=float, default=0.02)
+    parser.add_argument("--groq-latency", type=float, default=0.3)
+    parser.add_argument("--groq-token-latency", type=float, default=0.005)
+    parser.add_argument("--tavily-latency", type=float, default=0.5)
+    parser.add_argument("--deepl-latency", type=float, default=0.2)
+    parser.add_argument("--output", default="replay-results.json", help="куда сохранить результат")
+    parser.add_argument("--baseline", help="результат прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.1, help="допустимое ухудшение, доля")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="меньшая разница времени — шум")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if not os.path.exists(args.input):
+        parser.error(f"нет файла {args.input}")
+    result = asyncio.run(replay(args))
+    print_report(result)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"результат сохранён в {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"регрессий: {len(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Локальные заглушки внешних API для бенчмарков и офлайн-проверок.
+
+Запуск отдельного сервера:
+    python -m benchmarks.stubs groq --port 8081 --latency 0.3
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+from aiohttp import web
+
+
+class StubServer:
+    """aiohttp-приложение на локальном порту"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.app = web.Application()
+        self.requests = 0
+        self._runner = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self):
+        """Запускает сервер в отдельном потоке со своим event loop,
+        чтобы его не блокировали синхронные клиенты в основном потоке."""
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        self._thread_loop = loop
+        return self
+
+    def stop_thread(self):
+        self._thread_loop.call_soon_threadsafe(self._thread_loop.stop)
+        self._thread.join()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+class GroqStub(StubServer):
+    """Имитация OpenAI-совместимого эндпоинта Groq с настраиваемой задержкой"""
+
+    def __init__(self, latency=0.2, reply="Это тестовый ответ модели.", fail_rate=0.0,
+                 token_latency=0.0, prompt_token_latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        # latency — время до первого токена, token_latency — время на каждый следующий,
+        # prompt_token_latency — время на обработку каждого слова промпта
+        self.latency = latency
+        self.prompt_token_latency = prompt_token_latency
+        self.token_latency = token_latency
+        self.reply = reply
+        self.fail_rate = fail_rate
+        self.app.router.add_post("/openai/v1/chat/completions", self.chat_completions)
+
+    @property
+    def base_url(self):
+        return f"{self.url}/openai/v1"
+
+    async def chat_completions(self, request):
+        self.requests += 1
+        body = await request.json()
+        if self.fail_rate and random.random() < self.fail_rate:
+            return web.json_response({"error": {"message": "overloaded"}}, status=503)
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in body.get("messages", []))
+        if body.get("stream"):
+            return await self._stream(request, body, prompt_tokens)
+        await asyncio.sleep(self.latency + self.prompt_token_latency * prompt_tokens
+                            + self.token_latency * len(self.reply.split()))
+        return web.json_response({
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(self.reply.split()),
+                "total_tokens": prompt_tokens + len(self.reply.split()),
+            },
+        })
+
+    async def _stream(self, request, body, prompt_tokens):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(self.latency + self.prompt_token_latency * prompt_tokens)
+        for i, word in enumerate(self.reply.split(" ")):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            chunk = {
+                "id": f"chatcmpl-{self.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "delta": {"content": (" " if i else "") + word},
+                             "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        # Как Groq: usage приходит в x_groq последнего фрагмента с finish_reason
+        completion_tokens = len(self.reply.split())
+        chunk = {
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"id": f"req-{self.requests}", "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }},
+        }
+        await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+class TelegramStub(StubServer):
+    """Имитация Bot API: принимает любые методы, на отправку и правку сообщений
+    возвращает объект Message. Отправленные тексты копятся в sent: (chat_id, text)."""
+
+    def __init__(self, latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.calls = {}
+        self.sent = []
+        self.app.router.add_post("/bot{token}/{method}", self.method)
+
+    async def method(self, request):
+        method = request.match_info["method"]
+        self.requests += 1
+        self.calls[method] = self.calls.get(method, 0) + 1
+        data = dict(await request.post())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method == "sendMessage":
+            self.sent.append((int(data.get("chat_id", 0)), data.get("text", "")))
+        if method in ("sendMessage", "editMessageText"):
+            result = {
+                "message_id": self.requests,
+                "date": int(time.time()),
+                "chat": {"id": int(data.get("chat_id", 0)), "type": "private"},
+                "text": data.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+
+def make_page(size_kb, seed=0):
+    """HTML-страница примерно size_kb КиБ: скрипты, навигация, статья, подвал"""
+    rng = random.Random(seed)
+    words = ("swisstronik", "validator", "node", "privacy", "compliance", "token", "network",
+             "contract", "enclave", "transaction", "block", "identity", "staking", "bridge")
+    script = "<script>" + "var x=1;" * 2000 + "</script>"
+    nav = "<nav><ul>" + "".join(f'<li><a href="/p{i}">Раздел {i}</a></li>' for i in range(200)) + "</ul></nav>"
+    parts = ["<!DOCTYPE html><html><head><title>Тестовая страница</title>",
+             "<style>" + "p{margin:0}" * 500 + "</style>", script, "</head><body>", nav,
+             "<header><h1>Заголовок сайта</h1></header><main><article>"]
+    size = sum(len(p) for p in parts)
+    while size < size_kb * 1024:
+        paragraph = "<p>" + " ".join(rng.choice(words) for _ in range(120)) + ".</p>\n"
+        parts.append(paragraph)
+        size += len(paragraph)
+    parts.append("</article></main><footer>© Тест</footer>" + script + "</body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+class PageStub(StubServer):
+    """Сайт с большими HTML-страницами: GET /page/{size_kb}.
+
+    Отдаёт тело кусками по chunk_size с задержкой chunk_latency (медленная
+    сеть), поддерживает ETag/Last-Modified и отвечает 304 на условные запросы."""
+
+    LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+    def __init__(self, latency=0.0, chunk_latency=0.0, chunk_size=16 * 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.chunk_size = chunk_size
+        self.bytes_sent = 0
+        self.not_modified = 0
+        self._pages = {}
+        self.app.router.add_get("/page/{size_kb}", self.page)
+
+    async def page(self, request):
+        self.requests += 1
+        size_kb = int(request.match_info["size_kb"])
+        if size_kb not in self._pages:
+            self._pages[size_kb] = make_page(size_kb)
+        body = self._pages[size_kb]
+        etag = f'"page-{size_kb}"'
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        response = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8", "ETag": etag,
+                                               "Last-Modified": self.LAST_MODIFIED})
+        response.content_length = len(body)
+        await response.prepare(request)
+        try:
+            for start in range(0, len(body), self.chunk_size):
+                if self.chunk_latency:
+                    await asyncio.sleep(self.chunk_latency)
+                chunk = body[start:start + self.chunk_size]
+                await response.write(chunk)
+                self.bytes_sent += len(chunk)
+            await response.write_eof()
+        except ConnectionResetError:
+            # Клиент прочитал сколько нужно и закрыл соединение
+            pass
+        return response
+
+
+class TavilyStub(StubServer):
+    """Имитация Tavily POST /search: advanced-поиск вдвое медленнее basic"""
+
+    def __init__(self, latency=0.5, fail_rate=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.queries = {}
+        self.app.router.add_post("/search", self.search)
+
+    async def search(self, request):
+        self.requests += 1
+        body = await request.json()
+        query = body.get("query", "")
+        self.queries[query] = self.queries.get(query, 0) + 1
+        depth = body.get("search_depth", "basic")
+        await asyncio.sleep(self.latency * (2 if depth == "advanced" else 1))
+        if self.fail_rate and random.random() < self.fail_rate:
+            return web.json_response({"detail": {"error": "rate limited"}}, status=429)
+        results = [{
+            "title": f"Результат {i} по запросу «{query}»",
+            "url": f"https://example.com/{i}?q={query.replace(' ', '+')}",
+            "content": f"Фрагмент {i}: {query}. " * 20,
+            "score": round(1 - i / 10, 2),
+        } for i in range(1, int(body.get("max_results", 5)) + 1)]
+        return web.json_response({
+            "query": query,
+            "answer": f"Краткий ответ на «{query}»." if body.get("include_answer") else None,
+            "images": [],
+            "results": results,
+            "response_time": self.latency,
+        })
+
+
+class DeepLStub(StubServer):
+    """Имитация DeepL POST /v2/translate (форма или JSON, несколько text за запрос).
+
+    Для deepl.Translator: server_url=stub.url. «Перевод» — текст с префиксом
+    [RU], время ответа растёт с числом символов."""
+
+    def __init__(self, latency=0.2, char_latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.char_latency = char_latency
+        self.texts = 0
+        self.chars = 0
+        self.app.router.add_post("/v2/translate", self.translate)
+
+    async def translate(self, request):
+        self.requests += 1
+        if request.content_type == "application/json":
+            body = await request.json()
+            texts, target = body.get("text", []), body.get("target_lang", "")
+        else:
+            form = await request.post()
+            texts, target = form.getall("text", []), form.get("target_lang", "")
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts or not target:
+            return web.json_response({"message": "Parameter 'text' or 'target_lang' not specified."}, status=400)
+        chars = sum(len(text) for text in texts)
+        self.texts += len(texts)
+        self.chars += chars
+        await asyncio.sleep(self.latency + self.char_latency * chars)
+        return web.json_response({"translations": [
+            {"detected_source_language": "EN", "text": f"[{target.upper()}] {text}", "billed_characters": len(text)}
+            for text in texts
+        ]})
+
+
+STUBS = {
+    "groq": GroqStub,
+    "telegram": TelegramStub,
+    "pages": PageStub,
+    "tavily": TavilyStub,
+    "deepl": DeepLStub,
+}
+
+
+async def serve(name, port, latency):
+    stub = STUBS[name](latency=latency, port=port)
+    await stub.start()
+    print(f"{name} stub: {stub.url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальные заглушки внешних API")
+    parser.add_argument("name", choices=sorted(STUBS))
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.name, args.port, args.latency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
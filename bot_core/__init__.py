@@ -0,0 +1 @@
+"""Общие компоненты ботов: клиенты внешних API, поиск по контексту, кэши."""
@@ -0,0 +1,127 @@
+"""Типы индекса FAISS: flat, ivf, hnsw, ivfpq.
+
+flat  — точный поиск, время растёт линейно с размером корпуса;
+ivf   — кластеры (nlist), при поиске просматриваются nprobe ближайших;
+hnsw  — граф (M связей), точность поиска задаёт efSearch;
+ivfpq — ivf с PQ-сжатием векторов (pq_m байт на вектор), для больших корпусов.
+"""
+import logging
+import math
+
+import numpy as np
+
+from bot_core import config
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+
+
+def unwrap(index):
+    """Базовый индекс под IndexIDMap/IndexIDMap2/IndexPreTransform"""
+    import faiss
+
+    index = faiss.downcast_index(index)
+    while isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2, faiss.IndexPreTransform)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def index_kind(index):
+    import faiss
+
+    base = unwrap(index)
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def supports_remove(index):
+    """HNSW не умеет удалять векторы, такой индекс перестраивается целиком"""
+    return index_kind(index) != "hnsw"
+
+
+def default_nlist(count):
+    return max(1, min(65536, int(4 * math.sqrt(max(count, 1)))))
+
+
+def effective_kind(kind, count, dim, nlist=config.INDEX_NLIST, pq_m=config.INDEX_PQ_M,
+                   pq_bits=config.INDEX_PQ_BITS):
+    """Тип индекса и nlist, которые build_index выберет для count векторов:
+    на малом корпусе ivfpq становится ivf, а ivf — flat"""
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Неизвестный тип индекса: {kind}")
+    nlist = nlist or default_nlist(count)
+    # Для обучения кластеров нужно заметно больше векторов, чем кластеров
+    if kind in ("ivf", "ivfpq") and count < 39 * nlist:
+        nlist = count // 39
+        if not nlist:
+            kind = "flat"
+    if kind == "ivfpq" and (dim % pq_m or count < 39 * 2 ** pq_bits):
+        kind = "ivf"
+    return kind, nlist
+
+
+def build_index(kind, vectors, ids, nlist=config.INDEX_NLIST, hnsw_m=config.INDEX_HNSW_M,
+                ef_construction=config.INDEX_EF_CONSTRUCTION, pq_m=config.INDEX_PQ_M,
+                pq_bits=config.INDEX_PQ_BITS):
+    """Создаёт, при необходимости обучает и заполняет индекс заданного типа"""
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    ids = np.asarray(ids, dtype=np.int64)
+    count, dim = vectors.shape
+    built, nlist = effective_kind(kind, count, dim, nlist, pq_m, pq_bits)
+    if built != kind:
+        logger.warning("Корпус из %d векторов мал для %s, использую %s", count, kind, built)
+    kind = built
+
+    if kind == "flat":
+        index = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+    elif kind == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, hnsw_m)
+        hnsw.hnsw.efConstruction = ef_construction
+        index = faiss.IndexIDMap2(hnsw)
+    else:
+        quantizer = faiss.IndexFlatL2(dim)
+        if kind == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_bits)
+        index.train(vectors)
+    if count:
+        index.add_with_ids(vectors, ids)
+    return index
+
+
+def configure_index(index, nprobe=config.INDEX_NPROBE, ef_search=config.INDEX_EF_SEARCH):
+    """Параметры точности поиска, которые не хранятся в файле индекса"""
+    import faiss
+
+    base = unwrap(index)
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = min(nprobe, base.nlist)
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search
+    return index
+
+
+def reconstruct(index, ids):
+    """Векторы по ID для перестроения индекса; None, если точно восстановить нельзя"""
+    import faiss
+
+    base = unwrap(index)
+    if isinstance(base, faiss.IndexIVFPQ):
+        return None
+    try:
+        if isinstance(base, faiss.IndexIVF):
+            base.set_direct_map_type(faiss.DirectMap.Hashtable)
+        if not len(ids):
+            return np.zeros((0, index.d), dtype=np.float32)
+        return np.vstack([index.reconstruct(int(i)) for i in ids])
+    except RuntimeError:
+        return None
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from bot_core import config
+
+logger = logging.getLogger(__name__)
+
+
+def context_key(namespace, chunk_ids):
+    """Набор найденных чанков не зависит от порядка выдачи"""
+    return namespace + ":" + ",".join(str(i) for i in sorted(set(int(i) for i in chunk_ids)))
+
+
+class SemanticCache:
+    """Кэш готовых ответов по смыслу запроса.
+
+    Ответ переиспользуется, если найденный контекст (namespace и набор
+    ID чанков) совпадает, а косинусная близость эмбеддингов запросов не
+    ниже threshold. Записи живут ttl секунд, при превышении max_entries
+    вытесняются давно не использованные. Если задан path, кэш
+    загружается из файла и сохраняется в него после autosave_every новых
+    записей: не чаще раза в save_delay секунд и в пуле потоков, чтобы
+    запись JSON не задерживала обработку запросов."""
+
+    def __init__(self, threshold=config.ANSWER_CACHE_THRESHOLD, ttl=config.ANSWER_CACHE_TTL,
+                 max_entries=config.ANSWER_CACHE_SIZE, path=config.ANSWER_CACHE_PATH,
+                 autosave_every=50, save_delay=5.0):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.autosave_every = autosave_every
+        self.save_delay = save_delay
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries = OrderedDict()  # id -> (context, vector, answer, created)
+        self._by_context = {}  # context -> set(id)
+        self._next_id = 0
+        self._unsaved = 0
+        self._save_handle = None
+        self._save_task = None
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, entry_id):
+        context = self._entries.pop(entry_id)[0]
+        ids = self._by_context[context]
+        ids.discard(entry_id)
+        if not ids:
+            del self._by_context[context]
+
+    def _add(self, context, vector, answer, created):
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (context, vector, answer, created)
+        self._by_context.setdefault(context, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, namespace, vector, chunk_ids):
+        """Сохранённый ответ для похожего запроса с тем же контекстом или None"""
+        context = context_key(namespace, chunk_ids)
+        now = time.time()
+        best_id, best_score = None, self.threshold
+        query = self._unit(vector)
+        for entry_id in list(self._by_context.get(context, ())):
+            _, cached_vector, _, created = self._entries[entry_id]
+            if now - created > self.ttl:
+                self._remove(entry_id)
+                continue
+            score = float(np.dot(query, cached_vector))
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+        if best_id is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id][2]
+
+    def put(self, namespace, vector, chunk_ids, answer):
+        self._add(context_key(namespace, chunk_ids), self._unit(vector), answer, time.time())
+        self._unsaved += 1
+        if self.path and self._unsaved >= self.autosave_every:
+            self._schedule_save()
+
+    def _schedule_save(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        # Записи, добавленные до срабатывания таймера, попадут в ту же запись файла
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(self.save_delay, self._start_save)
+
+    def _start_save(self):
+        self._save_handle = None
+        if self._save_task is not None and not self._save_task.done():
+            # Предыдущая запись ещё идёт — повторим после неё
+            self._schedule_save()
+            return
+        entries = list(self._entries.values())
+        self._unsaved = 0
+        self._save_task = asyncio.get_running_loop().create_task(self._save_async(entries))
+
+    async def _save_async(self, entries):
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, entries)
+        except OSError as e:
+            logger.error("Не удалось сохранить кэш ответов %s: %s", self.path, e)
+
+    def _write(self, entries):
+        """Атомарно записывает неистёкшие записи в path"""
+        now = time.time()
+        entries = [
+            {"context": context, "vector": vector.tolist(), "answer": answer, "created": created}
+            for context, vector, answer, created in entries
+            if now - created <= self.ttl
+        ]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def save(self):
+        if not self.path:
+            return
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        self._write(list(self._entries.values()))
+        self._unsaved = 0
+
+    async def flush(self):
+        """Дожидается фоновой записи и сохраняет кэш без блокировки event loop"""
+        if not self.path:
+            return
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._save_task is not None:
+            await self._save_task
+        entries = list(self._entries.values())
+        self._unsaved = 0
+        await self._save_async(entries)
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Не удалось загрузить кэш ответов %s: %s", self.path, e)
+            return
+        now = time.time()
+        for entry in entries:
+            if now - entry["created"] <= self.ttl:
+                self._add(entry["context"], self._unit(entry["vector"]), entry["answer"], entry["created"])
+        logger.info("Загружено %d ответов из кэша %s", len(self._entries), self.path)
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
@@ -0,0 +1,161 @@
+"""Сборка ботов из общих обработчиков: профили, бот, диспетчер и запуск поллинга.
+
+conty.py, vps-bot.py и api/telegram_webhook.py только выбирают профиль.
+aiogram, настройки и клиенты импортируются внутри функций, чтобы модуль
+вебхука оставался лёгким на холодном старте.
+"""
+import importlib
+import logging
+import os
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# routers — модули bot_core.handlers в порядке подключения (chat ловит всё и идёт последним),
+# preload — компоненты Services, которые создаются сразу, а не на первом запросе
+Profile = namedtuple("Profile", "name model temperature required routers preload start_text chat_hint "
+                                "delete_webhook")
+
+PROFILES = {
+    "conty": Profile(
+        name="conty",
+        model="gemma2-9b-it",
+        temperature=0.9,
+        required=("TELEGRAM_TOKEN", "GROQ_API_KEY", "DEEPL_API_KEY"),
+        routers=("start", "context", "translate", "chat"),
+        # Модель эмбеддингов и индекс грузятся при запуске, а не на первом /ctx
+        preload=("retriever", "answer_cache"),
+        start_text="Привет! Я бот, который может помочь с информацией о Swisstronik. Используйте следующие команды:\n"
+                   "/ctx <запрос> - для поиска по контексту\n"
+                   "/ctxsum <запрос> - для суммаризации контекста\n"
+                   "/ts <текст> - для перевода текста на русский",
+        chat_hint="Вы также можете использовать команды /ctx или /ctxsum для работы с контекстом об Anthropic, "
+                  "или /ts для перевода.",
+        delete_webhook=False,
+    ),
+    "vps": Profile(
+        name="vps",
+        model="gemma2-9b-it",
+        temperature=0.95,
+        required=("TELEGRAM_TOKEN", "TAVILY_API_KEY", "GROQ_API_KEY"),
+        routers=("start", "link", "web", "chat"),
+        preload=(),
+        start_text="Привет! Я бот, который может помочь вам с поиском информации и ответами на вопросы. "
+                   "Используйте следующие команды:\n\n"
+                   "/summary - для получения сводки новостей по теме\n"
+                   "/ask - для быстрого ответа на вопрос\n"
+                   "/search - для поиска информации\n"
+                   "/link - для анализа содержимого веб-страницы по URL",
+        chat_hint=None,
+        delete_webhook=True,
+    ),
+    "webhook": Profile(
+        name="webhook",
+        model="mixtral-8x7b-32768",
+        temperature=0.9,
+        required=("TELEGRAM_TOKEN", "TAVILY_API_KEY", "GROQ_API_KEY"),
+        routers=("web", "chat"),
+        preload=(),
+        start_text=None,
+        chat_hint=None,
+        delete_webhook=False,
+    ),
+}
+
+
+def get_profile(profile):
+    """Профиль по имени или сам Profile"""
+    return PROFILES[profile] if isinstance(profile, str) else profile
+
+
+def check_env(profile):
+    """Проверка наличия всех необходимых токенов"""
+    # Переменные из .env загружает bot_core.config, а вебхук мог его ещё не импортировать
+    importlib.import_module("bot_core.config")
+    if not all(os.getenv(name) for name in get_profile(profile).required):
+        raise ValueError("Отсутствуют необходимые переменные окружения")
+
+
+def create_bot(token=None, api_url=None):
+    """Бот с метриками запросов к Bot API; api_url — свой сервер Bot API (по умолчанию TELEGRAM_API_URL)"""
+    from aiogram import Bot
+
+    from bot_core import config
+    from bot_core.monitoring import instrument
+
+    api_url = config.TELEGRAM_API_URL if api_url is None else api_url
+    session = None
+    if api_url:
+        from aiogram.client.session.aiohttp import AiohttpSession
+        from aiogram.client.telegram import TelegramAPIServer
+
+        session = AiohttpSession(api=TelegramAPIServer.from_base(api_url))
+    bot = Bot(token=token or os.getenv('TELEGRAM_TOKEN'), session=session)
+    instrument(bot=bot)
+    return bot
+
+
+def create_dispatcher(profile, services=None, scheduler=None):
+    """Диспетчер с планировщиком, метриками и обработчиками профиля"""
+    from aiogram import Dispatcher
+
+    from bot_core.monitoring import instrument
+    from bot_core.scheduler import Scheduler, SchedulerMiddleware
+    from bot_core.services import Services
+
+    profile = get_profile(profile)
+    if services is None:
+        services = Services(model=profile.model, temperature=profile.temperature)
+    services.preload(*profile.preload)
+
+    # Обработчики получают services аргументом
+    dp = Dispatcher(services=services)
+    # Лимиты на пользователя и чат, общий потолок параллельности и приоритет коротких команд
+    if scheduler is None:
+        scheduler = Scheduler()
+    dp.message.middleware(SchedulerMiddleware(scheduler))
+    instrument(dp, scheduler=scheduler)
+    for name in profile.routers:
+        module = importlib.import_module(f"bot_core.handlers.{name}")
+        dp.include_router(module.create_router(profile))
+    dp.shutdown.register(services.aclose)
+    return dp
+
+
+async def run_polling(profile):
+    """Поллинг в одном процессе"""
+    from bot_core.monitoring import start_metrics_server
+
+    profile = get_profile(profile)
+    bot = create_bot()
+    dp = create_dispatcher(profile)
+    metrics_server = await start_metrics_server()
+    try:
+        if profile.delete_webhook:
+            logger.info("Удаление вебхука...")
+            await bot.delete_webhook()
+            logger.info("Вебхук успешно удален")
+        logger.info("Запуск бота...")
+        await dp.start_polling(bot)
+    finally:
+        if metrics_server is not None:
+            await metrics_server.cleanup()
+
+
+def main(profile, workers=None):
+    """Точка входа бота на поллинге; при workers > 1 (BOT_WORKERS) — фронт и процессы-воркеры"""
+    import asyncio
+
+    from bot_core import config
+
+    check_env(profile)
+    workers = config.BOT_WORKERS if workers is None else workers
+    try:
+        if workers > 1:
+            from bot_core.workers import run_sharded
+
+            asyncio.run(run_sharded(profile, workers))
+        else:
+            asyncio.run(run_polling(profile))
+    except KeyboardInterrupt:
+        logger.info("Бот остановлен")
@@ -0,0 +1,184 @@
+"""Инвертированный индекс BM25 по текстам чанков.
+
+Постинги хранятся сегментами в массивах numpy (CSR: для каждого терма
+срез ID документов и частот), поэтому запрос — это несколько
+векторных операций над постингами своих термов. Новые документы
+добавляются отдельным сегментом, удалённые помечаются и исчезают при
+compact(), которое сливает сегменты в один.
+"""
+import itertools
+import os
+import re
+from collections import defaultdict
+
+import numpy as np
+
+# Простые слова и числа (в том числе адреса 0x...)
+WORD_RE = re.compile(r"[^\W_]+")
+# Кандидаты в составные токены: флаги CLI (--flag), pkg.module, snake_case, kebab-case
+COMPOUND_RE = re.compile(r"[\w.:-]+")
+
+
+def tokenize(text):
+    """Токены в нижнем регистре: все простые слова плюс составные токены целиком"""
+    text = text.lower()
+    compounds = [token.strip(".:") for token in COMPOUND_RE.findall(text) if not token.isalnum()]
+    return WORD_RE.findall(text) + [token for token in compounds if token and not token.isalnum()]
+
+
+class Segment:
+    """Неизменяемая часть индекса: термы, CSR-постинги и длины документов"""
+
+    def __init__(self, terms, offsets, docs, freqs):
+        self.terms = terms  # терм -> номер строки CSR
+        self.offsets = offsets
+        self.docs = docs
+        self.freqs = freqs
+
+    @classmethod
+    def build(cls, doc_numbers, token_lists):
+        # Новый терм получает следующий номер; map с __getitem__ не выходит из C
+        vocabulary = defaultdict()
+        vocabulary.default_factory = vocabulary.__len__
+        tokens = list(itertools.chain.from_iterable(token_lists))
+        term_ids = np.fromiter(map(vocabulary.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+        doc_ids = np.repeat(np.asarray(doc_numbers, dtype=np.int64), [len(t) for t in token_lists])
+
+        # Уникальные пары (терм, документ) с частотами, отсортированные по терму
+        span = int(doc_ids.max(initial=0)) + 1
+        pairs, freqs = np.unique(term_ids * span + doc_ids, return_counts=True)
+        pair_terms, pair_docs = np.divmod(pairs, span)
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pair_terms, minlength=len(vocabulary)), out=offsets[1:])
+        return cls(dict(vocabulary), offsets, pair_docs.astype(np.int64), freqs.astype(np.float32))
+
+    def postings(self, term):
+        row = self.terms.get(term)
+        if row is None:
+            return None, None
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return self.docs[start:end], self.freqs[start:end]
+
+
+class BM25Index:
+    """BM25 с номерами документов 0..n-1, которым соответствуют ID чанков"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.segments = []
+        self._positions = {}
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    @classmethod
+    def build(cls, ids, texts, **kwargs):
+        index = cls(**kwargs)
+        index.add(ids, texts)
+        return index
+
+    def add(self, ids, texts):
+        """Добавляет документы новым сегментом; существующие ID заменяются"""
+        ids = [int(i) for i in ids]
+        self.remove([i for i in ids if i in self._positions])
+        token_lists = [tokenize(text) for text in texts]
+        start = len(self.ids)
+        numbers = np.arange(start, start + len(ids), dtype=np.int64)
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        self.lengths = np.concatenate([self.lengths, np.array([len(t) for t in token_lists], dtype=np.float32)])
+        self.alive = np.concatenate([self.alive, np.ones(len(ids), dtype=bool)])
+        self._positions.update(zip(ids, numbers.tolist()))
+        if ids:
+            self.segments.append(Segment.build(numbers, token_lists))
+
+    def remove(self, ids):
+        for chunk_id in ids:
+            number = self._positions.pop(int(chunk_id), None)
+            if number is not None:
+                self.alive[number] = False
+
+    def compact(self):
+        """Сливает сегменты в один и выбрасывает удалённые документы"""
+        keep = np.flatnonzero(self.alive)
+        renumber = np.full(len(self.ids), -1, dtype=np.int64)
+        renumber[keep] = np.arange(len(keep))
+
+        term_rows, docs, freqs, vocabulary = [], [], [], {}
+        for segment in self.segments:
+            rows = np.repeat(np.arange(len(segment.terms)), np.diff(segment.offsets))
+            names = list(segment.terms)
+            row_ids = np.array([vocabulary.setdefault(name, len(vocabulary)) for name in names], dtype=np.int64)
+            mask = self.alive[segment.docs]
+            term_rows.append(row_ids[rows[mask]])
+            docs.append(renumber[segment.docs[mask]])
+            freqs.append(segment.freqs[mask])
+
+        self.ids, self.lengths = self.ids[keep], self.lengths[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self._positions = {int(chunk_id): n for n, chunk_id in enumerate(self.ids)}
+        self.segments = []
+        if not len(keep):
+            return
+        term_rows = np.concatenate(term_rows)
+        docs, freqs = np.concatenate(docs), np.concatenate(freqs)
+        order = np.lexsort((docs, term_rows))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_rows, minlength=len(vocabulary)), out=offsets[1:])
+        self.segments.append(Segment(vocabulary, offsets, docs[order], freqs[order]))
+
+    def search(self, query, k=20):
+        """ID чанков и оценки BM25 для k лучших документов"""
+        alive_count = len(self)
+        if not alive_count:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        average_length = float(self.lengths[self.alive].mean()) or 1.0
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            postings = [segment.postings(term) for segment in self.segments]
+            postings = [(d, f) for d, f in postings if d is not None]
+            if not postings:
+                continue
+            docs = np.concatenate([d for d, _ in postings])
+            freqs = np.concatenate([f for _, f in postings])
+            live = self.alive[docs]
+            docs, freqs = docs[live], freqs[live]
+            if not len(docs):
+                continue
+            idf = np.log(1 + (alive_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[docs] / average_length)
+            scores[docs] += idf * freqs * (self.k1 + 1) / (freqs + norm)
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return self.ids[candidates], scores[candidates]
+
+    def save(self, path):
+        """Сохраняет индекс (после compact) в один .npz файл"""
+        self.compact()
+        segment = self.segments[0] if self.segments else Segment({}, np.zeros(1, dtype=np.int64),
+                                                                np.zeros(0, dtype=np.int64),
+                                                                np.zeros(0, dtype=np.float32))
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, ids=self.ids, lengths=self.lengths, terms=np.array("\n".join(segment.terms)),
+                     offsets=segment.offsets, docs=segment.docs, freqs=segment.freqs,
+                     params=np.array([self.k1, self.b]))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        index = cls(k1=float(data["params"][0]), b=float(data["params"][1]))
+        index.ids, index.lengths = data["ids"], data["lengths"]
+        index.alive = np.ones(len(index.ids), dtype=bool)
+        index._positions = {int(chunk_id): n for n, chunk_id in enumerate(index.ids)}
+        names = str(data["terms"])
+        terms = {term: row for row, term in enumerate(names.split("\n"))} if names else {}
+        if len(index.ids):
+            index.segments.append(Segment(terms, data["offsets"], data["docs"], data["freqs"]))
+        return index
@@ -0,0 +1,40 @@
+"""LRU-кэш результатов с подсчётом попаданий (эмбеддинги, переводы, векторы чанков)."""
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Не больше maxsize записей, давно не запрошенные вытесняются первыми.
+
+    get() считает попадания и промахи в stats["hits"] и stats["misses"];
+    сервис может передать свой словарь stats, чтобы они публиковались
+    вместе с остальной его статистикой."""
+
+    def __init__(self, maxsize, stats=None):
+        self.maxsize = maxsize
+        self.stats = stats if stats is not None else {}
+        self.stats.setdefault("hits", 0)
+        self.stats.setdefault("misses", 0)
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Значение или None; None не кэшируется"""
+        value = self._data.get(key)
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
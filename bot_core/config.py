@@ -0,0 +1,121 @@
+import os
+
+# Настройки читаются при импорте, поэтому .env загружаем здесь, а не только в скриптах ботов
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+# Настройки Groq API
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL', 'https://api.groq.com/openai/v1')
+GROQ_TIMEOUT = float(os.getenv('GROQ_TIMEOUT', '30'))
+GROQ_MAX_CONCURRENCY = int(os.getenv('GROQ_MAX_CONCURRENCY', '8'))
+GROQ_MAX_RETRIES = int(os.getenv('GROQ_MAX_RETRIES', '3'))
+GROQ_MAX_CONNECTIONS = int(os.getenv('GROQ_MAX_CONNECTIONS', '20'))
+
+# Эмбеддинги запросов
+EMBED_BATCH_WINDOW = float(os.getenv('EMBED_BATCH_WINDOW', '0.005'))
+EMBED_MAX_BATCH_SIZE = int(os.getenv('EMBED_MAX_BATCH_SIZE', '32'))
+EMBED_CACHE_SIZE = int(os.getenv('EMBED_CACHE_SIZE', '4096'))
+
+# Кэш ответов /ctx и /ctxsum
+ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.92'))
+ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', str(24 * 3600)))
+ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '2048'))
+ANSWER_CACHE_PATH = os.getenv('ANSWER_CACHE_PATH', '')
+
+# Индекс FAISS: тип при построении и параметры точности поиска
+INDEX_TYPE = os.getenv('INDEX_TYPE', 'flat')
+INDEX_NLIST = int(os.getenv('INDEX_NLIST', '0'))
+INDEX_NPROBE = int(os.getenv('INDEX_NPROBE', '16'))
+INDEX_HNSW_M = int(os.getenv('INDEX_HNSW_M', '32'))
+INDEX_EF_CONSTRUCTION = int(os.getenv('INDEX_EF_CONSTRUCTION', '80'))
+INDEX_EF_SEARCH = int(os.getenv('INDEX_EF_SEARCH', '64'))
+INDEX_PQ_M = int(os.getenv('INDEX_PQ_M', '16'))
+INDEX_PQ_BITS = int(os.getenv('INDEX_PQ_BITS', '8'))
+
+# Гибридный поиск (FAISS + BM25); RETRIEVAL_K=0 — ограничение только бюджетом токенов
+RETRIEVAL_K = int(os.getenv('RETRIEVAL_K', '7'))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv('RETRIEVAL_TOKEN_BUDGET', '0'))
+RETRIEVAL_CANDIDATES = int(os.getenv('RETRIEVAL_CANDIDATES', '20'))
+RETRIEVAL_RRF_K = int(os.getenv('RETRIEVAL_RRF_K', '60'))
+
+# Сборка контекста: бюджет токенов (0 — по модели) и порог близости дубликатов
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '0'))
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv('CONTEXT_DEDUP_THRESHOLD', '0.95'))
+
+# Загрузка страниц для /link: таймауты, лимит скачиваемых байт и извлекаемого текста
+# (длинный текст суммируется по частям, см. SUMMARY_*)
+FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', '15'))
+FETCH_MAX_BYTES = int(os.getenv('FETCH_MAX_BYTES', str(2 * 1024 * 1024)))
+FETCH_MAX_CHARS = int(os.getenv('FETCH_MAX_CHARS', '50000'))
+FETCH_MAX_CONNECTIONS = int(os.getenv('FETCH_MAX_CONNECTIONS', '20'))
+FETCH_CACHE_SIZE = int(os.getenv('FETCH_CACHE_SIZE', '256'))
+FETCH_CACHE_TTL = float(os.getenv('FETCH_CACHE_TTL', '600'))
+
+# Поиск Tavily: лимиты запросов и кэш (TTL зависит от глубины поиска)
+TAVILY_BASE_URL = os.getenv('TAVILY_BASE_URL', 'https://api.tavily.com')
+TAVILY_TIMEOUT = float(os.getenv('TAVILY_TIMEOUT', '30'))
+TAVILY_MAX_CONCURRENCY = int(os.getenv('TAVILY_MAX_CONCURRENCY', '4'))
+TAVILY_RATE_LIMIT = float(os.getenv('TAVILY_RATE_LIMIT', '2'))
+TAVILY_BURST = int(os.getenv('TAVILY_BURST', '5'))
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '512'))
+SEARCH_CACHE_TTL_BASIC = float(os.getenv('SEARCH_CACHE_TTL_BASIC', '900'))
+SEARCH_CACHE_TTL_ADVANCED = float(os.getenv('SEARCH_CACHE_TTL_ADVANCED', '3600'))
+
+# Map-reduce суммаризация /summary и /link
+SUMMARY_SEGMENT_TOKENS = int(os.getenv('SUMMARY_SEGMENT_TOKENS', '1500'))
+SUMMARY_PARTIAL_TOKENS = int(os.getenv('SUMMARY_PARTIAL_TOKENS', '300'))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv('SUMMARY_MAX_CONCURRENCY', '4'))
+SUMMARY_CACHE_SIZE = int(os.getenv('SUMMARY_CACHE_SIZE', '2048'))
+
+# Память диалогов: реплик на чат, бюджет токенов истории, число чатов в памяти
+MEMORY_MAX_TURNS = int(os.getenv('MEMORY_MAX_TURNS', '40'))
+MEMORY_TOKEN_BUDGET = int(os.getenv('MEMORY_TOKEN_BUDGET', '1500'))
+MEMORY_MAX_CHATS = int(os.getenv('MEMORY_MAX_CHATS', '50000'))
+MEMORY_IDLE_TTL = float(os.getenv('MEMORY_IDLE_TTL', str(24 * 3600)))
+MEMORY_DB_PATH = os.getenv('MEMORY_DB_PATH', '')
+
+# Планировщик запросов к LLM и внешним API: лимиты на пользователя и чат,
+# общий потолок параллельности и длина очереди
+SCHEDULER_MAX_CONCURRENCY = int(os.getenv('SCHEDULER_MAX_CONCURRENCY', '8'))
+SCHEDULER_MAX_QUEUE = int(os.getenv('SCHEDULER_MAX_QUEUE', '200'))
+SCHEDULER_USER_RATE = float(os.getenv('SCHEDULER_USER_RATE', '0.2'))
+SCHEDULER_USER_BURST = int(os.getenv('SCHEDULER_USER_BURST', '3'))
+SCHEDULER_CHAT_RATE = float(os.getenv('SCHEDULER_CHAT_RATE', '0.5'))
+SCHEDULER_CHAT_BURST = int(os.getenv('SCHEDULER_CHAT_BURST', '6'))
+# Об отказе (лимит, перегрузка) пользователь узнаёт не чаще раза в столько секунд
+SCHEDULER_NOTICE_COOLDOWN = float(os.getenv('SCHEDULER_NOTICE_COOLDOWN', '30'))
+
+# Перевод DeepL для /ts: окно и размер пакета, длина сегмента длинного текста, кэш
+DEEPL_SERVER_URL = os.getenv('DEEPL_SERVER_URL') or None
+TRANSLATE_BATCH_WINDOW = float(os.getenv('TRANSLATE_BATCH_WINDOW', '0.02'))
+TRANSLATE_MAX_BATCH_TEXTS = int(os.getenv('TRANSLATE_MAX_BATCH_TEXTS', '50'))
+TRANSLATE_MAX_BATCH_CHARS = int(os.getenv('TRANSLATE_MAX_BATCH_CHARS', '5000'))
+TRANSLATE_SEGMENT_CHARS = int(os.getenv('TRANSLATE_SEGMENT_CHARS', '2000'))
+TRANSLATE_CACHE_SIZE = int(os.getenv('TRANSLATE_CACHE_SIZE', '4096'))
+TRANSLATE_MAX_WORKERS = int(os.getenv('TRANSLATE_MAX_WORKERS', '4'))
+
+# Метрики Prometheus: порт HTTP-сервера для ботов на поллинге (0 — выключен)
+# и путь, на котором их отдают сервер и вебхук-приложение
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+METRICS_PATH = os.getenv('METRICS_PATH', '/metrics')
+
+# Свой сервер Bot API (например, локальный telegram-bot-api); пусто — api.telegram.org
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '')
+
+# Файлы поиска по контексту для /ctx и /ctxsum и модель эмбеддингов
+CONTEXT_INDEX_PATH = os.getenv('CONTEXT_INDEX_PATH', 'swiss_embeddings.index')
+CONTEXT_CHUNKS_PATH = os.getenv('CONTEXT_CHUNKS_PATH', 'swiss_chunks.bin')
+CONTEXT_LEGACY_CHUNKS_PATH = os.getenv('CONTEXT_LEGACY_CHUNKS_PATH', 'swiss_chunks.json')
+CONTEXT_BM25_PATH = os.getenv('CONTEXT_BM25_PATH', 'swiss_bm25.npz')
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+
+# Многопроцессный режим: число воркеров (1 — обычный поллинг в одном процессе),
+# очередь апдейтов на воркер, одновременных апдейтов в воркере, таймаут long polling
+BOT_WORKERS = int(os.getenv('BOT_WORKERS', '1'))
+WORKER_QUEUE_SIZE = int(os.getenv('WORKER_QUEUE_SIZE', '1000'))
+WORKER_MAX_CONCURRENCY = int(os.getenv('WORKER_MAX_CONCURRENCY', '64'))
+POLLING_TIMEOUT = int(os.getenv('POLLING_TIMEOUT', '30'))
@@ -0,0 +1,64 @@
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from bot_core import config
+from bot_core.tokens import chunk_text, count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Бюджет токенов контекста по моделям: остаток окна уходит на вопрос, инструкции и ответ
+MODEL_TOKEN_BUDGETS = {
+    "gemma2-9b-it": 3000,
+    "mixtral-8x7b-32768": 8000,
+}
+DEFAULT_TOKEN_BUDGET = 3000
+
+
+class AssembledContext(namedtuple("AssembledContext", "text hits tokens original_tokens")):
+    @property
+    def saved_tokens(self):
+        return self.original_tokens - self.tokens
+
+
+def token_budget(model):
+    return config.CONTEXT_TOKEN_BUDGET or MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+
+
+async def assemble_context(hits, retriever, model=None, budget=None,
+                           dedup_threshold=config.CONTEXT_DEDUP_THRESHOLD, separator="\n\n"):
+    """Контекст для промпта из найденных чанков.
+
+    Чанки идут в порядке релевантности; почти дубликаты уже взятых
+    (косинус векторов чанков из retriever.chunk_vectors не ниже
+    dedup_threshold) отбрасываются, затем берутся чанки, пока хватает
+    бюджета токенов модели."""
+    budget = budget or token_budget(model)
+    texts = [chunk_text(hit.chunk) for hit in hits]
+    counts = [count_tokens(text) for text in texts]
+    original_tokens = sum(counts)
+
+    vectors = await retriever.chunk_vectors(hits) if len(hits) > 1 else []
+    kept_vectors, kept_hits, kept_texts, used = [], [], [], 0
+    for i, (hit, text, tokens) in enumerate(zip(hits, texts, counts)):
+        if len(vectors):
+            vector = vectors[i] / (np.linalg.norm(vectors[i]) or 1.0)
+            if any(float(np.dot(vector, other)) >= dedup_threshold for other in kept_vectors):
+                continue
+        if used + tokens > budget:
+            if kept_hits:
+                continue
+            # Даже самый релевантный чанк не помещается — берём его начало
+            text = truncate_to_tokens(text, budget)
+            tokens = count_tokens(text)
+        if len(vectors):
+            kept_vectors.append(vector)
+        kept_hits.append(hit)
+        kept_texts.append(text)
+        used += tokens
+
+    context = AssembledContext(separator.join(kept_texts), kept_hits, used, original_tokens)
+    logger.info("Контекст: %d чанков из %d, %d токенов вместо %d (сэкономлено %d)",
+                len(kept_hits), len(hits), used, original_tokens, context.saved_tokens)
+    return context
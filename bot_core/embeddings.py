@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bot_core import config
+from bot_core.cache import LRUCache
+from bot_core.metrics import span
+from bot_core.tokens import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingService:
+    """Эмбеддинги запросов вне event loop.
+
+    Запросы, пришедшие в течение batch_window секунд, кодируются одним
+    вызовом model.encode (не больше max_batch_size за раз), результаты
+    хранятся в LRU-кэше по нормализованному тексту."""
+
+    def __init__(self, model, batch_window=config.EMBED_BATCH_WINDOW,
+                 max_batch_size=config.EMBED_MAX_BATCH_SIZE, cache_size=config.EMBED_CACHE_SIZE,
+                 executor=None):
+        self.model = model
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.cache_size = cache_size
+        # Модель не потокобезопасна при параллельных encode, поэтому один поток по умолчанию
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "batches": 0, "encoded": 0}
+        self._cache = LRUCache(cache_size, self.stats)
+        self._pending = {}
+        self._flush_handle = None
+        self._tasks = set()
+
+    async def embed(self, text):
+        """Вектор (float32, 1-D) для текста запроса"""
+        key = normalize_query(text)
+        vector = self._cache.get(key)
+        if vector is not None:
+            return vector
+
+        # Одинаковые запросы в одном окне ждут общий результат
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(future)
+
+    async def embed_many(self, texts):
+        return await asyncio.gather(*(self.embed(text) for text in texts))
+
+    async def encode(self, texts):
+        """Векторы текстов одним вызовом модели, без кэша запросов (для чанков)"""
+        self.stats["batches"] += 1
+        self.stats["encoded"] += len(texts)
+        with span("embed"):
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._encode, list(texts))
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._encode_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _encode_batch(self, batch):
+        keys = list(batch)
+        self.stats["batches"] += 1
+        self.stats["encoded"] += len(keys)
+        try:
+            with span("embed"):
+                vectors = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self._encode, keys)
+        except Exception as e:
+            logger.error("Ошибка при вычислении эмбеддингов: %s", e)
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, vector in zip(keys, vectors):
+            self._cache.put(key, vector)
+            if not batch[key].done():
+                batch[key].set_result(vector)
+
+    def _encode(self, texts):
+        vectors = self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def hit_rate(self):
+        return self._cache.hit_rate()
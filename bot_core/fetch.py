@@ -0,0 +1,291 @@
+"""Загрузка веб-страниц и извлечение основного текста.
+
+Страница читается потоком через общий пул соединений aiohttp и сразу
+скармливается HTMLParser: как только набрано достаточно текста или
+превышен лимит байт, чтение прекращается. Текст из script, style,
+навигации и прочей обвязки отбрасывается; если на странице есть
+<main> или <article>, берётся их содержимое. Результаты кэшируются по
+URL, устаревшие записи перепроверяются по ETag/Last-Modified.
+
+Кодировка берётся из BOM, charset в Content-Type или <meta charset> в
+начале страницы. Ответ без Content-Type (или application/octet-stream,
+похожий на HTML) разбирается как HTML.
+"""
+import asyncio
+import codecs
+import collections
+import logging
+import re
+import time
+from html.parser import HTMLParser
+
+import aiohttp
+
+from bot_core import config
+from bot_core.lazy import LoopBound, close_session
+from bot_core.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Содержимое этих тегов в текст не попадает
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "form",
+             "nav", "header", "footer", "aside", "button", "select"}
+# Основное содержимое страницы
+MAIN_TAGS = {"main", "article"}
+# Теги, после которых начинается новая строка
+BLOCK_TAGS = {"p", "div", "section", "br", "li", "ul", "ol", "tr", "table", "pre", "blockquote",
+              "h1", "h2", "h3", "h4", "h5", "h6", "main", "article", "dd", "dt"}
+TEXT_TYPES = {"text/html", "application/xhtml+xml", "text/plain"}
+READ_CHUNK_SIZE = 16 * 1024
+# Начало страницы, в котором ищутся <meta charset> и признаки HTML
+SNIFF_BYTES = 4096
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+?charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+HTML_START_RE = re.compile(rb"\s*<(!doctype\s+html|html|head|body|meta|title|!--)", re.IGNORECASE)
+BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+SPACES_RE = re.compile(r"[ \t\r\f\v]+")
+NEWLINES_RE = re.compile(r"\s*\n\s*")
+
+Page = collections.namedtuple("Page", "url title text truncated bytes_read from_cache")
+
+
+class FetchError(Exception):
+    """Страницу нельзя загрузить или в ней нет текста"""
+
+
+def detect_charset(head, declared=None, html=True):
+    """Кодировка по началу документа: BOM, затем charset из заголовка, затем <meta charset>"""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    names = [declared]
+    if html:
+        match = META_CHARSET_RE.search(head[:SNIFF_BYTES])
+        if match:
+            # <meta> прочитан как ASCII, значит, UTF-16 в нём указан ошибочно
+            meta = match.group(1).decode("ascii").lower()
+            names.append("utf-8" if meta.startswith("utf-16") else meta)
+    for name in names:
+        if not name:
+            continue
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+def detect_content_type(response, head):
+    """Тип содержимого; без Content-Type страница считается HTML, двоичный тип — если начало похоже на HTML"""
+    if "Content-Type" not in response.headers:
+        return "text/html"
+    content_type = response.content_type
+    if content_type == "application/octet-stream" and HTML_START_RE.match(head.lstrip(codecs.BOM_UTF8)):
+        return "text/html"
+    return content_type
+
+
+class TextExtractor(HTMLParser):
+    """Инкрементальный извлекатель текста: feed() по кускам, done — текста уже достаточно"""
+
+    def __init__(self, max_chars):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title = ""
+        self._parts = []
+        self._main_parts = []
+        self._length = 0
+        self._main_length = 0
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._in_title = False
+
+    @property
+    def done(self):
+        # Без <main>/<article> обвязка в начале страницы тоже идёт в текст, берём с запасом
+        return self._main_length >= self.max_chars or self._length >= 4 * self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in MAIN_TAGS:
+            self._main_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        if tag in BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in MAIN_TAGS and self._main_depth:
+            self._main_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth and not self.done:
+            self._append(data)
+
+    def _append(self, text):
+        self._parts.append(text)
+        self._length += len(text)
+        if self._main_depth:
+            self._main_parts.append(text)
+            self._main_length += len(text)
+
+    @property
+    def text(self):
+        parts = self._main_parts if self._main_length >= 200 else self._parts
+        text = NEWLINES_RE.sub("\n", SPACES_RE.sub(" ", "".join(parts))).strip()
+        return text[:self.max_chars]
+
+
+class PageFetcher:
+    """Загрузка страниц с общим пулом соединений, лимитами и кэшем по URL"""
+
+    def __init__(self, timeout=config.FETCH_TIMEOUT, max_bytes=config.FETCH_MAX_BYTES,
+                 max_chars=config.FETCH_MAX_CHARS, max_connections=config.FETCH_MAX_CONNECTIONS,
+                 cache_size=config.FETCH_CACHE_SIZE, cache_ttl=config.FETCH_CACHE_TTL,
+                 user_agent="Mozilla/5.0"):
+        self.timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=min(timeout, 5))
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.max_connections = max_connections
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.user_agent = user_agent
+        self.stats = {"requests": 0, "hits": 0, "revalidated": 0, "bytes": 0}
+        self._cache = collections.OrderedDict()
+        # Кэш переживает смену event loop, сессия создаётся в каждом цикле своя
+        self._session = LoopBound(self._create_session, dispose=close_session)
+
+    def _create_session(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector, timeout=self.timeout,
+                                     headers={"User-Agent": self.user_agent})
+
+    def _get_session(self):
+        session = self._session()
+        if session.closed:
+            self._session.reset()
+            session = self._session()
+        return session
+
+    async def fetch(self, url):
+        """Текст страницы (не длиннее max_chars) с заголовком; FetchError при ошибке"""
+        if not url.startswith(("http://", "https://")):
+            raise FetchError(f"Неподдерживаемый URL: {url}")
+
+        entry = self._cache.get(url)
+        if entry is not None and entry["expires"] > time.monotonic():
+            self._cache.move_to_end(url)
+            self.stats["hits"] += 1
+            return entry["page"]._replace(from_cache=True)
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        self.stats["requests"] += 1
+        try:
+            with span("fetch"):
+                async with self._get_session().get(url, headers=headers) as response:
+                    if response.status == 304 and entry is not None:
+                        self.stats["revalidated"] += 1
+                        self._store(url, entry["page"], response, entry)
+                        return entry["page"]._replace(from_cache=True)
+                    if response.status >= 400:
+                        raise FetchError(f"Сервер вернул {response.status}")
+                    page = await self._read(url, response)
+        except aiohttp.ClientError as e:
+            raise FetchError(f"Ошибка загрузки {url}: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise FetchError(f"Таймаут загрузки {url}") from e
+
+        if not page.text:
+            raise FetchError("На странице нет текста")
+        self._store(url, page, response)
+        return page
+
+    async def _read(self, url, response):
+        # Начало страницы нужно, чтобы определить тип и кодировку до разбора
+        head = b""
+        while len(head) < SNIFF_BYTES:
+            chunk = await response.content.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            head += chunk
+        content_type = detect_content_type(response, head)
+        if content_type not in TEXT_TYPES:
+            raise FetchError(f"Неподдерживаемый тип содержимого: {content_type}")
+        plain = content_type == "text/plain"
+        charset = detect_charset(head, response.charset, html=not plain)
+        decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+        extractor = TextExtractor(self.max_chars)
+        plain_parts, plain_length = [], 0
+        bytes_read, truncated = 0, False
+
+        chunk = head
+        while chunk:
+            bytes_read += len(chunk)
+            text = decoder.decode(chunk)
+            if plain:
+                plain_parts.append(text)
+                plain_length += len(text)
+                done = plain_length >= self.max_chars
+            else:
+                extractor.feed(text)
+                done = extractor.done
+            if done or bytes_read >= self.max_bytes:
+                # Остаток страницы не скачиваем: соединение закроется при выходе
+                truncated = True
+                break
+            chunk = await response.content.read(READ_CHUNK_SIZE)
+        self.stats["bytes"] += bytes_read
+
+        if plain:
+            text = "".join(plain_parts)[:self.max_chars].strip()
+            title = ""
+        else:
+            extractor.close()
+            text, title = extractor.text, extractor.title.strip()
+        logger.info("Загружено %s: %d байт, %d символов текста%s", url, bytes_read, len(text),
+                    ", чтение остановлено досрочно" if truncated else "")
+        return Page(url, title, text, truncated, bytes_read, False)
+
+    def _store(self, url, page, response, previous=None):
+        cache_control = response.headers.get("Cache-Control", "")
+        if "no-store" in cache_control or not self.cache_size:
+            return
+        ttl = self.cache_ttl
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if match:
+            ttl = min(ttl, int(match.group(1)))
+        if "no-cache" in cache_control:
+            ttl = 0
+        # В ответе 304 валидаторов может не быть — тогда остаются прежние
+        previous = previous or {}
+        self._cache[url] = {
+            "page": page,
+            "etag": response.headers.get("ETag", previous.get("etag")),
+            "last_modified": response.headers.get("Last-Modified", previous.get("last_modified")),
+            "expires": time.monotonic() + ttl,
+        }
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def aclose(self):
+        if self._session.current is not None:
+            await self._session.current.close()
@@ -0,0 +1,6 @@
+"""Обработчики команд, общие для ботов на поллинге и вебхука.
+
+В каждом модуле create_router(profile) возвращает новый Router: один
+и тот же модуль подключается к диспетчерам разных ботов и воркеров.
+Клиенты обработчики получают через аргумент services (см. bot_core.services).
+"""
@@ -0,0 +1,34 @@
+"""Обычные сообщения: ответ модели с учётом истории чата"""
+import logging
+
+from aiogram import Router
+from aiogram.types import Message
+
+from bot_core.handlers.common import GENERATION_ERROR, REQUEST_ERROR, generate_response
+
+logger = logging.getLogger(__name__)
+
+
+def create_router(profile):
+    """Ловит все сообщения, поэтому подключается последним"""
+    router = Router(name="chat")
+
+    @router.message()
+    async def message_handler(message: Message, services) -> None:
+        """Обработчик всех остальных сообщений"""
+        user_message = message.text
+
+        try:
+            # Вопрос уходит в модель вместе с историей чата
+            memory = services.memory
+            response = await generate_response(services, await memory.messages(message.chat.id, user_message))
+            if response != GENERATION_ERROR:
+                await memory.add_exchange(message.chat.id, user_message, response)
+            await message.answer(response)
+            if profile.chat_hint:
+                await message.answer(profile.chat_hint)
+        except Exception as e:
+            logger.error("Ошибка при обработке сообщения: %s", e)
+            await message.answer(REQUEST_ERROR)
+
+    return router
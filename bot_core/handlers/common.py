@@ -0,0 +1,36 @@
+"""Генерация ответа модели и общие тексты обработчиков"""
+import logging
+
+from bot_core.streaming import StreamingMessage
+
+logger = logging.getLogger(__name__)
+
+GENERATION_ERROR = "Извините, произошла ошибка при генерации ответа."
+REQUEST_ERROR = "Извините, произошла ошибка при обработке вашего запроса."
+
+
+def query_of(message, command):
+    """Текст после команды: "/ask что такое X" -> "что такое X" """
+    return message.text.replace(f"/{command}", "").strip()
+
+
+async def generate_response(services, prompt, stream_to=None):
+    """Ответ Groq API на prompt (строку или список сообщений).
+
+    Если передан stream_to (сообщение бота), ответ выводится в него
+    по мере генерации, а длинный текст продолжается в новых сообщениях."""
+    groq = services.groq
+    try:
+        if stream_to is not None:
+            deltas = groq.stream(prompt, temperature=services.temperature, max_tokens=services.max_tokens)
+            response = await StreamingMessage(stream_to).consume(deltas)
+        else:
+            response = await groq.complete(prompt, temperature=services.temperature, max_tokens=services.max_tokens)
+        # Полный ответ нужен только при отладке; строка форматируется, лишь если DEBUG включён
+        logger.debug("Сырой ответ от Groq API: %s", response)
+        return response
+    except Exception as e:
+        logger.error("Ошибка при обращении к Groq API: %s", e)
+        if stream_to is not None:
+            await stream_to.answer(GENERATION_ERROR)
+        return GENERATION_ERROR
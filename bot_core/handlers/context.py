@@ -0,0 +1,79 @@
+"""/ctx и /ctxsum: ответы по базе знаний (FAISS + BM25) с кэшем готовых ответов"""
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from bot_core.context import assemble_context
+from bot_core.handlers.common import GENERATION_ERROR, generate_response, query_of
+from bot_core.streaming import send_long
+
+FOLLOW_UP = "Если у вас есть дополнительные вопросы или нужны уточнения, не стесняйтесь спрашивать!"
+
+
+def create_router(profile):
+    router = Router(name="context")
+
+    @router.message(Command("ctx"))
+    async def cmd_ctx(message: Message, services):
+        query = query_of(message, "ctx")
+        if not query:
+            await message.answer("Пожалуйста, задайте вопрос после команды /ctx")
+            return
+
+        status = await message.answer("Ищу информацию и формирую ответ...")
+
+        # Один эмбеддинг запроса — и для поиска, и для ключа кэша ответов
+        query_vector = await services.embedder.embed(query)
+        hits = await services.retriever.search(query, query_vector=query_vector)
+        # Чанки без почти дубликатов и в пределах бюджета токенов модели
+        context = await assemble_context(hits, services.retriever, model=services.model)
+        chunk_ids = [hit.chunk_id for hit in context.hits]
+
+        cached = services.answer_cache.get("ctx", query_vector, chunk_ids)
+        if cached is not None:
+            await send_long(status, cached)
+            await message.answer(FOLLOW_UP)
+            return
+
+        prompt = f"""На основе следующего контекста о Swisstronik, пожалуйста, 
+        ответьте на вопрос: "{query}"
+
+        Контекст:
+        {context.text}
+
+        Пожалуйста, дайте подробный и структурированный ответ. Если информации 
+        недостаточно, укажите это. Если вопрос касается создания смарт-контракта, 
+        предоставьте пошаговое руководство с примерами кода, где это уместно."""
+
+        # Ответ выводится в сообщение статуса по мере генерации
+        response = await generate_response(services, prompt, stream_to=status)
+        # Пустой ответ модели не кэшируем, иначе он вернётся на похожие вопросы
+        if response and response.strip() and response != GENERATION_ERROR:
+            services.answer_cache.put("ctx", query_vector, chunk_ids, response)
+
+        await message.answer(FOLLOW_UP)
+
+    @router.message(Command("ctxsum"))
+    async def cmd_ctxsum(message: Message, services):
+        query = query_of(message, "ctxsum")
+        if not query:
+            await message.answer("Пожалуйста, укажите запрос после команды /ctxsum")
+            return
+
+        query_vector = await services.embedder.embed(query)
+        hits = await services.retriever.search(query, query_vector=query_vector)
+        context = await assemble_context(hits, services.retriever, model=services.model, separator="\n")
+        chunk_ids = [hit.chunk_id for hit in context.hits]
+
+        summary = services.answer_cache.get("ctxsum", query_vector, chunk_ids)
+        if summary is None:
+            summary_prompt = (f"Summarize the following context about Swisstronik, related to the query: {query}"
+                              f"\n\nContext:\n{context.text}")
+            summary = await generate_response(services, summary_prompt)
+            if summary and summary.strip() and summary != GENERATION_ERROR:
+                services.answer_cache.put("ctxsum", query_vector, chunk_ids, summary)
+
+        await message.answer(f"Суммаризация контекста для запроса '{query}':")
+        await message.answer(summary)
+
+    return router
@@ -0,0 +1,38 @@
+"""/link: загрузка страницы и её краткое содержание"""
+import logging
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from bot_core.handlers.common import REQUEST_ERROR, query_of
+
+logger = logging.getLogger(__name__)
+
+
+def create_router(profile):
+    router = Router(name="link")
+
+    @router.message(Command("link"))
+    async def command_link_handler(message: Message, services) -> None:
+        """Обработчик команды /link"""
+        url = query_of(message, "link")
+
+        if not url:
+            await message.answer("Пожалуйста, укажите URL после команды /link")
+            return
+
+        status = await message.answer("Анализирую содержимое по ссылке...")
+
+        try:
+            # Загружаем страницу и извлекаем основной текст (не длиннее FETCH_MAX_CHARS)
+            page = await services.fetcher.fetch(url)
+
+            # Длинная страница суммируется по частям, итог выводится в сообщение статуса
+            await services.summarizer.summarize(page.text, "Summarize the following content in Russian",
+                                                stream_to=status, header=f"Краткое содержание страницы {url}:\n\n")
+        except Exception as e:
+            logger.error("Ошибка при анализе ссылки: %s", e)
+            await message.answer(REQUEST_ERROR)
+
+    return router
@@ -0,0 +1,15 @@
+"""/start: приветствие со списком команд бота"""
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+
+def create_router(profile):
+    router = Router(name="start")
+
+    @router.message(Command("start"))
+    async def cmd_start(message: Message):
+        """Обработчик команды /start"""
+        await message.answer(profile.start_text)
+
+    return router
@@ -0,0 +1,34 @@
+"""/ts: перевод текста или сообщения, на которое ответили, на русский"""
+import logging
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from bot_core.handlers.common import query_of
+
+logger = logging.getLogger(__name__)
+
+
+def create_router(profile):
+    router = Router(name="translate")
+
+    @router.message(Command("ts"))
+    async def cmd_translate(message: Message, services):
+        text_to_translate = query_of(message, "ts")
+        if not text_to_translate and message.reply_to_message:
+            text_to_translate = message.reply_to_message.text
+
+        if not text_to_translate:
+            await message.answer("Пожалуйста, укажите текст для перевода после команды /ts "
+                                 "или ответьте на сообщение с текстом")
+            return
+
+        try:
+            translation = await services.translator.translate(text_to_translate, target_lang="RU")
+            await message.answer(f"Перевод:\n{translation}")
+        except Exception as e:
+            logger.error("Ошибка при переводе: %s", e)
+            await message.answer("Извините, произошла ошибка при переводе текста.")
+
+    return router
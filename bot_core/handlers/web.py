@@ -0,0 +1,84 @@
+"""/summary, /ask и /search: поиск Tavily и сводка найденного"""
+import logging
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from bot_core.handlers.common import REQUEST_ERROR, query_of
+
+logger = logging.getLogger(__name__)
+
+
+def create_router(profile):
+    router = Router(name="web")
+
+    @router.message(Command("summary"))
+    async def command_summary_handler(message: Message, services) -> None:
+        """Обработчик команды /summary"""
+        query = query_of(message, "summary")
+
+        if not query:
+            await message.answer("Пожалуйста, укажите тему для поиска новостей после команды /summary")
+            return
+
+        status = await message.answer("Ищу и суммирую последние новости по вашему запросу...")
+
+        try:
+            news_results = await services.search.search(query=query, search_depth="advanced", include_images=False,
+                                                        max_results=5)
+
+            documents = [f"Title: {result.get('title', 'No title')}\nContent: {result.get('content', 'No content')}"
+                         for result in news_results.get('results', [])]
+
+            await services.summarizer.summarize(documents, "Summarize the following news results in Russian",
+                                                stream_to=status,
+                                                header=f"Краткая сводка новостей по запросу '{query}':\n\n")
+        except Exception as e:
+            logger.error("Ошибка при выполнении суммаризации новостей: %s", e)
+            await message.answer(REQUEST_ERROR)
+
+    @router.message(Command("ask"))
+    async def command_ask_handler(message: Message, services) -> None:
+        """Обработчик команды /ask"""
+        query = query_of(message, "ask")
+
+        if not query:
+            await message.answer("Пожалуйста, задайте вопрос после команды /ask")
+            return
+
+        await message.answer("Ищу ответ на ваш вопрос...")
+
+        try:
+            answer = await services.search.qna_search(query=query)
+            await message.answer(f"Ответ на ваш вопрос:\n\n{answer}")
+        except Exception as e:
+            logger.error("Ошибка при выполнении быстрого поиска: %s", e)
+            await message.answer("Извините, произошла ошибка при обработке вашего вопроса.")
+
+    @router.message(Command("search"))
+    async def command_search_handler(message: Message, services) -> None:
+        """Обработчик команды /search"""
+        query = query_of(message, "search")
+
+        if not query:
+            await message.answer("Пожалуйста, укажите запрос для поиска после команды /search")
+            return
+
+        await message.answer("Выполняю поиск...")
+
+        try:
+            search_results = await services.search.search(query=query, search_depth="basic", include_images=False,
+                                                          max_results=5)
+
+            links = f"Результаты поиска по запросу '{query}':\n\n"
+            for i, result in enumerate(search_results.get('results', []), 1):
+                links += f"{i}. {result.get('title', 'Без заголовка')}\n"
+                links += f"🔗 {result.get('url', 'Нет ссылки')}\n\n"
+
+            await message.answer(links)
+        except Exception as e:
+            logger.error("Ошибка при выполнении поиска: %s", e)
+            await message.answer(REQUEST_ERROR)
+
+    return router
@@ -0,0 +1,236 @@
+"""Построение и инкрементальное обновление индекса FAISS и хранилища чанков.
+
+    python -m bot_core.ingest docs/ transcription.txt \\
+        --index swiss_embeddings.index --chunks swiss_chunks.bin --workers 4
+
+Документы (.txt, .md, .rst, .html или JSON-список строк/объектов с полем
+content) режутся на чанки, ID чанка — хэш его содержимого. При повторном
+запуске заново кодируются только новые и изменённые чанки, исчезнувшие
+удаляются из индекса по ID.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+from bot_core import config
+from bot_core.ann import INDEX_TYPES, build_index, effective_kind, index_kind, reconstruct, supports_remove
+from bot_core.bm25 import BM25Index
+from bot_core.storage import ChunkStore, write_chunk_store
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+TEXT_EXTENSIONS = {".txt", ".md", ".rst", ".html", ".htm"}
+
+
+def chunk_id(content):
+    """Стабильный 63-битный ID по содержимому чанка"""
+    digest = hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & ((1 << 63) - 1)
+
+
+def iter_documents(paths):
+    """Отдаёт пары (источник, текст) по одному документу, не читая корпус целиком"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                yield from iter_documents(sorted(os.path.join(root, name) for name in files))
+            continue
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".json":
+            with open(path, 'r', encoding='utf-8') as f:
+                for i, item in enumerate(json.load(f)):
+                    text = item.get("content", "") if isinstance(item, dict) else str(item)
+                    yield f"{path}#{i}", text
+        elif extension in TEXT_EXTENSIONS:
+            with open(path, 'r', encoding='utf-8') as f:
+                yield path, f.read()
+
+
+def split_text(text, chunk_words=200, overlap_words=40):
+    """Режет текст на куски по chunk_words слов с перекрытием, не разрывая абзацы без нужды"""
+    words = []
+    for paragraph in text.split("\n\n"):
+        words.extend(paragraph.split())
+        words.append("\n\n")
+    while words and words[-1] == "\n\n":
+        words.pop()
+
+    step = max(1, chunk_words - overlap_words)
+    for start in range(0, max(len(words) - overlap_words, 1), step):
+        piece = " ".join(words[start:start + chunk_words]).replace(" \n\n ", "\n\n").strip()
+        if piece:
+            yield piece
+
+
+def collect_chunks(paths, chunk_words, overlap_words):
+    records = {}
+    documents = 0
+    for source, text in iter_documents(paths):
+        documents += 1
+        for content in split_text(text, chunk_words, overlap_words):
+            records.setdefault(chunk_id(content), {"content": content, "source": source})
+    return documents, records
+
+
+def embed_texts(model, texts, batch_size=64, workers=1, block_size=2048):
+    """Кодирует тексты блоками, при workers > 1 — в нескольких процессах"""
+    # Запуск пула процессов окупается только на достаточно большом объёме
+    use_pool = workers > 1 and len(texts) > batch_size * workers
+    pool = model.start_multi_process_pool(["cpu"] * workers) if use_pool else None
+    vectors = []
+    started = time.perf_counter()
+    try:
+        for start in range(0, len(texts), block_size):
+            block = texts[start:start + block_size]
+            if pool is not None:
+                vectors.append(model.encode_multi_process(block, pool, batch_size=batch_size))
+            else:
+                vectors.append(model.encode(block, batch_size=batch_size, convert_to_numpy=True))
+            done = start + len(block)
+            elapsed = time.perf_counter() - started
+            logger.info("Закодировано %d/%d чанков, %.1f чанков/с", done, len(texts), done / elapsed)
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+    if not vectors:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    return np.vstack(vectors).astype(np.float32)
+
+
+def supports_updates(index):
+    """Индекс хранит ID чанков (IDMap или IVF), а не позиции"""
+    import faiss
+
+    index = faiss.downcast_index(index)
+    return isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2, faiss.IndexIVF))
+
+
+def write_index(index, path):
+    import faiss
+
+    tmp_path = path + ".tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def update_bm25(path, records, to_add, to_remove, rebuild=False):
+    """Обновляет индекс BM25 теми же добавлениями и удалениями, что и векторный"""
+    if rebuild or not os.path.exists(path):
+        ids = list(records)
+        bm25 = BM25Index.build(ids, [records[i]["content"] for i in ids])
+    else:
+        bm25 = BM25Index.load(path)
+        bm25.remove(to_remove)
+        bm25.add(to_add, [records[i]["content"] for i in to_add])
+    bm25.save(path)
+
+
+def ingest(paths, index_path, chunks_path, model=None, chunk_words=200, overlap_words=40,
+           batch_size=64, workers=1, full=False, kind=config.INDEX_TYPE, bm25_path=None):
+    """Синхронизирует индекс и хранилище чанков с документами из paths, возвращает отчёт.
+
+    Индекс перестраивается целиком, если сменился его тип (с учётом
+    понижения на малом корпусе, см. ann.effective_kind), из HNSW нужно
+    удалить чанки или передан full; векторы неизменившихся чанков при
+    этом по возможности восстанавливаются из старого индекса."""
+    import faiss
+
+    started = time.perf_counter()
+    documents, records = collect_chunks(paths, chunk_words, overlap_words)
+
+    index = None
+    old_ids = set()
+    if not full and os.path.exists(index_path) and os.path.exists(chunks_path):
+        index = faiss.read_index(index_path)
+        if supports_updates(index):
+            store = ChunkStore(chunks_path)
+            old_ids = {int(i) for i in store.ids}
+            store.close()
+        else:
+            logger.warning("Индекс %s создан без ID чанков, выполняю полное перестроение", index_path)
+            index = None
+
+    to_add = [i for i in records if i not in old_ids]
+    to_remove = [i for i in old_ids if i not in records]
+    kept = [i for i in records if i in old_ids]
+
+    # На малом корпусе build_index понижает тип (ivfpq -> ivf -> flat); сравниваем с тем, что он
+    # построил бы сейчас, иначе каждый запуск с тем же --index-type перестраивал бы индекс целиком
+    rebuild = (index is None or index_kind(index) != effective_kind(kind, len(records), index.d)[0]
+               or (to_remove and not supports_remove(index)))
+    kept_vectors = None
+    if rebuild and index is not None:
+        kept_vectors = reconstruct(index, kept)
+    if rebuild and kept_vectors is None:
+        # Восстановить векторы не удалось — кодируем все чанки заново
+        to_add, kept = list(records), []
+
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(MODEL_NAME)
+
+    embed_started = time.perf_counter()
+    vectors = embed_texts(model, [records[i]["content"] for i in to_add], batch_size, workers)
+    embed_seconds = time.perf_counter() - embed_started
+
+    if rebuild:
+        if kept:
+            vectors = np.vstack([kept_vectors, vectors])
+        index = build_index(kind, vectors, kept + to_add)
+    else:
+        if to_remove:
+            index.remove_ids(np.array(to_remove, dtype=np.int64))
+        if to_add:
+            index.add_with_ids(vectors, np.array(to_add, dtype=np.int64))
+
+    if bm25_path:
+        update_bm25(bm25_path, records, to_add, to_remove, rebuild=full or not old_ids)
+
+    write_chunk_store(chunks_path, records)
+    write_index(index, index_path)
+
+    report = {
+        "documents": documents,
+        "chunks": len(records),
+        "added": len(to_add),
+        "removed": len(to_remove),
+        "unchanged": len(records) - len(to_add),
+        "index_type": index_kind(index),
+        "rebuilt": bool(rebuild),
+        "embed_seconds": round(embed_seconds, 3),
+        "chunks_per_second": round(len(to_add) / embed_seconds, 1) if to_add and embed_seconds else 0.0,
+        "total_seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Индексация завершена: %s", report)
+    return report
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Построение индекса FAISS и хранилища чанков")
+    parser.add_argument("paths", nargs="+", help="файлы и каталоги с документами")
+    parser.add_argument("--index", default="swiss_embeddings.index")
+    parser.add_argument("--chunks", default="swiss_chunks.bin")
+    parser.add_argument("--bm25", default="swiss_bm25.npz", help="индекс BM25 (пустая строка — не строить)")
+    parser.add_argument("--chunk-words", type=int, default=200)
+    parser.add_argument("--overlap-words", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="процессов для кодирования")
+    parser.add_argument("--full", action="store_true", help="перекодировать все чанки")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=config.INDEX_TYPE)
+    args = parser.parse_args()
+    report = ingest(args.paths, args.index, args.chunks, chunk_words=args.chunk_words,
+                    overlap_words=args.overlap_words, batch_size=args.batch_size,
+                    workers=args.workers, full=args.full, kind=args.index_type, bm25_path=args.bm25)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
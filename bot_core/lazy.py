@@ -0,0 +1,110 @@
+"""Отложенная инициализация клиентов и тяжёлых модулей.
+
+Объект создаётся при первом обращении и дальше переиспользуется — в
+serverless-функции это значит «один раз на холодный старт», а тёплые
+вызовы получают уже готовый клиент.
+
+Сессии aiohttp/httpx, семафоры и ожидающие futures привязаны к event
+loop, а Vercel может запускать каждый вызов в новом цикле. Клиенты
+держат такие части в LoopBound: при смене цикла создаются только они,
+а кэши и статистика клиента остаются прежними.
+"""
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Lazy:
+    """Значение, которое вычисляет factory() при первом вызове"""
+
+    _unset = object()
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._value = self._unset
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        if self._value is self._unset:
+            with self._lock:
+                if self._value is self._unset:
+                    self._value = self.factory()
+        return self._value
+
+    @property
+    def initialized(self):
+        return self._value is not self._unset
+
+    def reset(self):
+        """Забывает значение; следующий вызов создаст его заново"""
+        self._value = self._unset
+
+
+def resolve(value):
+    """Значение Lazy или сам объект, если он передан напрямую"""
+    return value() if isinstance(value, Lazy) else value
+
+
+class LoopBound:
+    """Часть клиента, привязанная к event loop: сессия, семафор, словарь futures.
+
+    factory() создаёт её в текущем цикле. Если обращение пришло из другого
+    цикла, создаётся новая, а прежняя передаётся в dispose(value, loop) —
+    например, close_session, чтобы закрыть её соединения."""
+
+    def __init__(self, factory, dispose=None):
+        self.factory = factory
+        self.dispose = dispose
+        self._value = None
+        self._loop = None
+
+    def __call__(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            previous, previous_loop = self._value, self._loop
+            self._value, self._loop = self.factory(), loop
+            if previous is not None and self.dispose is not None:
+                self.dispose(previous, previous_loop)
+        return self._value
+
+    @property
+    def current(self):
+        """Значение последнего цикла (None, если его ещё не создавали)"""
+        return self._value
+
+    def reset(self):
+        """Забывает значение, не закрывая его; следующий вызов создаст новое"""
+        self._value = None
+        self._loop = None
+
+
+def close_in_loop(loop, close):
+    """Запускает корутину close() в event loop, к которому привязан закрываемый объект.
+
+    Vercel оставляет цикл прошлого вызова открытым, но остановленным: он
+    ненадолго запускается в отдельном потоке, и соединения закрываются
+    штатно, не задерживая текущий вызов. Для закрытого цикла (asyncio.run)
+    возвращает False."""
+    if loop.is_closed():
+        return False
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(close(), loop)
+        return True
+    threading.Thread(target=loop.run_until_complete, args=(close(),), daemon=True).start()
+    return True
+
+
+def close_session(session, loop):
+    """Закрывает сессию aiohttp (или aiogram), созданную в прежнем event loop"""
+    if getattr(session, "closed", False):
+        return
+    try:
+        if close_in_loop(loop, session.close):
+            return
+    except RuntimeError as e:
+        logger.warning("Не удалось закрыть сессию прежнего event loop: %s", e)
+    # Цикл уже закрыт вместе с транспортами: остаётся пометить сессию закрытой,
+    # для этого прежний цикл не нужен
+    asyncio.ensure_future(session.close())
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import random
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from bot_core import config
+from bot_core.lazy import LoopBound, close_in_loop
+from bot_core.metrics import LLM_TOKENS, span
+from bot_core.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых имеет смысл повторить запрос
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+def to_messages(prompt):
+    """Строка превращается в одно сообщение пользователя, список сообщений передаётся как есть"""
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    return list(prompt)
+
+
+class GroqClient:
+    """Асинхронный клиент Groq API с пулом keep-alive соединений,
+    ограничением параллельных запросов и повторами с экспоненциальной задержкой."""
+
+    def __init__(self, api_key, model="gemma2-9b-it", base_url=config.GROQ_BASE_URL,
+                 timeout=config.GROQ_TIMEOUT, max_concurrency=config.GROQ_MAX_CONCURRENCY,
+                 max_retries=config.GROQ_MAX_RETRIES, max_connections=config.GROQ_MAX_CONNECTIONS,
+                 backoff_base=0.5, backoff_max=8.0):
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Пул соединений и семафор привязаны к event loop: в новом цикле создаются заново
+        self._client = LoopBound(self._connect, dispose=lambda client, loop: close_in_loop(loop, client.close))
+        self._semaphore = LoopBound(lambda: asyncio.Semaphore(max_concurrency))
+
+    def _connect(self):
+        http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+            timeout=httpx.Timeout(self.timeout),
+        )
+        # Повторы делаем сами, чтобы они учитывали общий лимит параллельности
+        return AsyncOpenAI(base_url=self.base_url, api_key=self.api_key, http_client=http, max_retries=0)
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _create(self, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return await self._client().chat.completions.create(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                attempt += 1
+                logger.warning("Groq API: %s, повтор %d через %.2f с", type(e).__name__, attempt, delay)
+                await asyncio.sleep(delay)
+
+    async def complete(self, prompt, model=None, temperature=0.9, max_tokens=750, timeout=None):
+        """Возвращает текст ответа модели на prompt (строку или список сообщений)"""
+        model = model or self.model
+        async with self._semaphore():
+            with span("groq"):
+                response = await self._create(
+                    model=model,
+                    messages=to_messages(prompt),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=timeout or self.timeout,
+                )
+        if response.usage is not None:
+            LLM_TOKENS.inc(response.usage.prompt_tokens, model, "prompt")
+            LLM_TOKENS.inc(response.usage.completion_tokens, model, "completion")
+        return response.choices[0].message.content
+
+    async def stream(self, prompt, model=None, temperature=0.9, max_tokens=750, timeout=None):
+        """Отдаёт фрагменты ответа модели по мере генерации (SSE).
+        Повторы возможны только до получения первого фрагмента."""
+        model = model or self.model
+        messages = to_messages(prompt)
+        parts, usage = [], None
+        async with self._semaphore():
+            try:
+                with span("groq"):
+                    response = await self._create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        timeout=timeout or self.timeout,
+                        stream=True,
+                    )
+                try:
+                    with span("groq_stream"):
+                        async for chunk in response:
+                            # Groq присылает usage в x_groq последнего фрагмента
+                            usage = (getattr(chunk, "x_groq", None) or {}).get("usage") or usage
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                parts.append(chunk.choices[0].delta.content)
+                                yield parts[-1]
+                finally:
+                    # Потребитель мог остановиться раньше: соединение сразу возвращается в пул
+                    await response.response.aclose()
+            finally:
+                if usage is not None:
+                    LLM_TOKENS.inc(usage.get("prompt_tokens", 0), model, "prompt")
+                    LLM_TOKENS.inc(usage.get("completion_tokens", 0), model, "completion")
+                elif parts:
+                    # Поток прервался до последнего фрагмента: оцениваем по тексту промпта и ответа
+                    LLM_TOKENS.inc(sum(count_tokens(m["content"]) for m in messages), model, "prompt")
+                    LLM_TOKENS.inc(count_tokens("".join(parts)), model, "completion")
+
+    async def aclose(self):
+        if self._client.current is not None:
+            await self._client.current.close()
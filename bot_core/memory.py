@@ -0,0 +1,258 @@
+"""Память диалогов по чатам.
+
+Каждый чат — буфер последних реплик плюс краткое содержание более старой
+части разговора. Чаты хранятся в LRU: давно неактивные и лишние сверх
+max_chats вытесняются, а при заданном db_path сохраняются в SQLite и
+подгружаются при следующем сообщении; чтение и запись базы идут в
+отдельном потоке, не блокируя event loop. Когда история превышает бюджет
+токенов или max_turns реплик, старые реплики в фоне сворачиваются моделью
+в краткое содержание — без модели они просто отбрасываются.
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from bot_core import config
+from bot_core.lazy import LoopBound
+from bot_core.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+USER = "user"
+ASSISTANT = "assistant"
+
+COMPACT_PROMPT = ("Update the summary of a conversation between a user and an assistant. "
+                  "Keep facts about the user, their questions and the answers given. "
+                  "Reply with the summary only, in the language of the conversation.\n\n"
+                  "Current summary:\n{summary}\n\nNew messages:\n{turns}")
+
+
+class Conversation:
+    """История одного чата: реплики (роль, текст, токены) и краткое содержание"""
+
+    __slots__ = ("turns", "summary", "summary_tokens", "tokens", "last_active", "compaction")
+
+    def __init__(self, summary=""):
+        # Без maxlen: лишние реплики не выпадают молча, а сворачиваются в краткое содержание
+        self.turns = deque()
+        self.summary = summary
+        self.summary_tokens = count_tokens(summary) if summary else 0
+        self.tokens = 0
+        self.last_active = time.monotonic()
+        self.compaction = None
+
+    def append(self, turn):
+        self.turns.append(turn)
+        self.tokens += turn[2]
+
+    def popleft(self):
+        turn = self.turns.popleft()
+        self.tokens -= turn[2]
+        return turn
+
+    def snapshot(self):
+        """Краткое содержание и реплики для записи в базу из другого потока"""
+        return self.summary, [(role, content) for role, content, _ in self.turns]
+
+
+class ConversationStore:
+    """История чатов для промптов модели с ограничением памяти и размера промпта"""
+
+    def __init__(self, llm=None, max_turns=config.MEMORY_MAX_TURNS, token_budget=config.MEMORY_TOKEN_BUDGET,
+                 max_chats=config.MEMORY_MAX_CHATS, idle_ttl=config.MEMORY_IDLE_TTL,
+                 db_path=config.MEMORY_DB_PATH):
+        # llm — GroqClient для сворачивания истории; без него старые реплики просто отбрасываются
+        self.llm = llm
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.max_chats = max_chats
+        self.idle_ttl = idle_ttl
+        self.stats = {"hits": 0, "loaded": 0, "evicted": 0, "compactions": 0}
+        self._chats = OrderedDict()
+        # Фоновые сворачивания и записи текущего event loop
+        self._tasks = LoopBound(set)
+        self._db = None
+        self._executor = None
+        if db_path:
+            # Один поток: записи и чтения одного чата выполняются в порядке постановки
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory")
+            self._db = self._open_db(db_path)
+
+    def __len__(self):
+        return len(self._chats)
+
+    @staticmethod
+    def _open_db(path):
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS conversations (chat_id INTEGER PRIMARY KEY, summary TEXT)")
+        db.execute("CREATE TABLE IF NOT EXISTS turns (chat_id INTEGER, seq INTEGER, role TEXT, content TEXT, "
+                   "PRIMARY KEY (chat_id, seq))")
+        return db
+
+    def _run(self, func, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _spawn(self, coro):
+        tasks = self._tasks()
+        task = asyncio.ensure_future(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return task
+
+    async def _get(self, chat_id):
+        conversation = self._chats.get(chat_id)
+        if conversation is not None:
+            self._chats.move_to_end(chat_id)
+            self.stats["hits"] += 1
+        else:
+            loaded = await self._load(chat_id)
+            # Пока шло чтение, этот же чат мог загрузить параллельный запрос
+            conversation = self._chats.get(chat_id)
+            if conversation is None:
+                conversation = self._chats[chat_id] = loaded
+                self._evict()
+        conversation.last_active = time.monotonic()
+        return conversation
+
+    def _evict(self):
+        # Самые давно активные чаты — в начале OrderedDict
+        deadline = time.monotonic() - self.idle_ttl
+        evicted = []
+        while self._chats:
+            chat_id, conversation = next(iter(self._chats.items()))
+            if len(self._chats) <= self.max_chats and conversation.last_active >= deadline:
+                break
+            del self._chats[chat_id]
+            evicted.append((chat_id, conversation.snapshot()))
+            self.stats["evicted"] += 1
+        if evicted and self._db is not None:
+            self._spawn(self._save(evicted))
+
+    async def _load(self, chat_id):
+        if self._db is None:
+            return Conversation()
+        row = await self._run(self._read, chat_id)
+        if row is None:
+            return Conversation()
+        summary, turns = row
+        conversation = Conversation(summary=summary or "")
+        for role, content in turns:
+            conversation.append((USER if role == USER else ASSISTANT, content, count_tokens(content)))
+        self.stats["loaded"] += 1
+        return conversation
+
+    def _read(self, chat_id):
+        row = self._db.execute("SELECT summary FROM conversations WHERE chat_id = ?", (chat_id,)).fetchone()
+        if row is None:
+            return None
+        rows = self._db.execute("SELECT role, content FROM turns WHERE chat_id = ? ORDER BY seq DESC LIMIT ?",
+                                (chat_id, self.max_turns)).fetchall()
+        return row[0], rows[::-1]
+
+    async def _save(self, snapshots):
+        try:
+            await self._run(self._write, snapshots)
+        except sqlite3.Error as e:
+            logger.error("Не удалось сохранить историю %d чатов: %s", len(snapshots), e)
+
+    def _write(self, snapshots):
+        with self._db:
+            for chat_id, (summary, turns) in snapshots:
+                self._db.execute("INSERT OR REPLACE INTO conversations (chat_id, summary) VALUES (?, ?)",
+                                 (chat_id, summary))
+                self._db.execute("DELETE FROM turns WHERE chat_id = ?", (chat_id,))
+                self._db.executemany("INSERT INTO turns (chat_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                                     [(chat_id, seq, role, content) for seq, (role, content) in enumerate(turns)])
+
+    async def messages(self, chat_id, prompt, system=None):
+        """Сообщения для модели: system, краткое содержание, история в пределах бюджета и prompt"""
+        conversation = await self._get(chat_id)
+        budget = self.token_budget - conversation.summary_tokens
+        history = []
+        for role, content, tokens in reversed(conversation.turns):
+            budget -= tokens
+            if budget < 0:
+                break
+            history.append({"role": role, "content": content})
+        history.reverse()
+
+        messages = [{"role": "system", "content": system}] if system else []
+        if conversation.summary:
+            messages.append({"role": "system", "content": f"Краткое содержание предыдущего разговора:\n"
+                                                          f"{conversation.summary}"})
+        return messages + history + [{"role": USER, "content": prompt}]
+
+    async def append(self, chat_id, role, content):
+        """Добавляет реплику; при превышении бюджета или max_turns сворачивает историю в фоне"""
+        conversation = await self._get(chat_id)
+        conversation.append((USER if role == USER else ASSISTANT, content, count_tokens(content)))
+        if not self._overflow(conversation) or self._compacting(conversation):
+            return
+        if self.llm is None:
+            self._trim(conversation)
+        else:
+            conversation.compaction = self._spawn(self._compact(chat_id, conversation))
+
+    async def add_exchange(self, chat_id, prompt, response):
+        await self.append(chat_id, USER, prompt)
+        await self.append(chat_id, ASSISTANT, response)
+
+    def _overflow(self, conversation):
+        return (conversation.tokens + conversation.summary_tokens > self.token_budget
+                or len(conversation.turns) > self.max_turns)
+
+    @staticmethod
+    def _compacting(conversation):
+        # Сворачивание, начатое в прежнем event loop (Vercel), уже не завершится
+        task = conversation.compaction
+        return task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop()
+
+    def _trim(self, conversation):
+        while len(conversation.turns) > 2 and (conversation.tokens > self.token_budget
+                                               or len(conversation.turns) > self.max_turns):
+            conversation.popleft()
+
+    def _oldest_turns(self, conversation):
+        """Реплики, после сворачивания которых история займёт не больше половины бюджета и max_turns"""
+        turns, tokens, count = [], conversation.tokens, len(conversation.turns)
+        for turn in list(conversation.turns)[:-2]:
+            if tokens <= self.token_budget // 2 and count <= self.max_turns // 2:
+                break
+            turns.append(turn)
+            tokens -= turn[2]
+            count -= 1
+        return turns
+
+    async def _compact(self, chat_id, conversation):
+        try:
+            turns = self._oldest_turns(conversation)
+            if not turns:
+                return
+            text = "\n".join(f"{role}: {content}" for role, content, _ in turns)
+            prompt = COMPACT_PROMPT.format(summary=conversation.summary or "(нет)", turns=text)
+            summary = await self.llm.complete(prompt, temperature=0.3, max_tokens=self.token_budget // 3)
+            # Пока шёл запрос, в начале буфера могли остаться только часть свёрнутых реплик
+            compacted = {id(turn) for turn in turns}
+            while conversation.turns and id(conversation.turns[0]) in compacted:
+                conversation.popleft()
+            conversation.summary = summary
+            conversation.summary_tokens = count_tokens(summary)
+            self.stats["compactions"] += 1
+        except Exception as e:
+            logger.error("Ошибка при сворачивании истории чата %s: %s", chat_id, e)
+            self._trim(conversation)
+
+    async def aclose(self):
+        """Дожидается фоновых сворачиваний и сохраняет все чаты в SQLite (при остановке бота)"""
+        tasks = self._tasks()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._db is None:
+            return
+        await self._save([(chat_id, conversation.snapshot()) for chat_id, conversation in self._chats.items()])
+        await self._run(self._db.close)
+        self._executor.shutdown()
@@ -0,0 +1,201 @@
+"""Метрики в формате Prometheus без внешних зависимостей.
+
+Гистограммы и счётчики с метками, замер этапов через span() и сбор
+статистики компонентов (кэши, очереди) при каждом запросе /metrics.
+Запись — несколько операций со словарём и bisect, поэтому замеры можно
+держать на горячем пути.
+"""
+import bisect
+import math
+import threading
+import time
+
+# Границы корзин для длительностей, секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Монотонный счётчик с метками"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, *labels):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def items(self):
+        """Пары (метки, значение)"""
+        return list(self._values.items())
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Распределение значений по корзинам с метками"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # метки -> [счётчики корзин..., сумма, количество]
+
+    def observe(self, value, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return series[-1] if series else 0
+
+    def totals(self):
+        """Тройки (метки, число наблюдений, сумма)"""
+        return [(labels, series[-1], series[-2]) for labels, series in list(self._series.items())]
+
+    def quantile(self, q, *labels):
+        """Оценка квантиля по корзинам (верхняя граница корзины)"""
+        series = self._series.get(labels)
+        if not series or not series[-1]:
+            return None
+        target, seen = q * series[-1], 0
+        for bound, count in zip(self.buckets + (math.inf,), series):
+            seen += count
+            if seen >= target:
+                return bound
+        return math.inf
+
+    def samples(self):
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                yield (f"{self.name}_bucket", format_labels(self.labelnames, labels, [("le", format_value(bound))]),
+                       cumulative)
+            yield f"{self.name}_sum", format_labels(self.labelnames, labels), series[-2]
+            yield f"{self.name}_count", format_labels(self.labelnames, labels), series[-1]
+
+
+class ComponentEvents:
+    """Счётчики из словарей stats компонентов (hits, misses, requests, ...)"""
+
+    kind = "counter"
+    name = "bot_component_events_total"
+    documentation = "События компонентов из их stats"
+
+    def __init__(self, components):
+        self.components = components
+
+    def samples(self):
+        for component, source in list(self.components.items()):
+            for event, value in list(source.stats.items()):
+                yield self.name, format_labels(("component", "event"), (component, event)), value
+
+
+class CacheHitRatio:
+    """Доля попаданий в кэш для компонентов с методом hit_rate()"""
+
+    kind = "gauge"
+    name = "bot_cache_hit_ratio"
+    documentation = "Доля попаданий в кэш компонента"
+
+    def __init__(self, components):
+        self.components = components
+
+    def samples(self):
+        for component, source in list(self.components.items()):
+            if hasattr(source, "hit_rate"):
+                yield self.name, format_labels(("component",), (component,)), source.hit_rate()
+
+
+class Registry:
+    """Набор метрик, который отдаётся на /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._components = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_stats(self, component, source):
+        """Публикует source.stats (и source.hit_rate(), если есть) под именем component"""
+        self._components[component] = source
+
+    def render(self):
+        """Текстовый формат Prometheus 0.0.4"""
+        lines = []
+        families = [*self._metrics.values(), ComponentEvents(self._components), CacheHitRatio(self._components)]
+        for metric in families:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {format_value(value)}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("bot_stage_seconds", "Длительность этапов обработки", ["stage"])
+STAGE_ERRORS = REGISTRY.counter("bot_stage_errors_total", "Ошибки этапов обработки", ["stage"])
+HANDLER_SECONDS = REGISTRY.histogram("bot_handler_seconds", "Длительность обработчиков сообщений", ["command"])
+TELEGRAM_SECONDS = REGISTRY.histogram("bot_telegram_request_seconds", "Длительность запросов к Bot API", ["method"])
+LLM_TOKENS = REGISTRY.counter("bot_llm_tokens_total", "Токены запросов к модели", ["model", "kind"])
+
+
+class span:
+    """Замер этапа: with span("faiss"): ... — время попадает в bot_stage_seconds{stage=...}"""
+
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, self.stage)
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            STAGE_ERRORS.inc(1, self.stage)
+        return False
@@ -0,0 +1,82 @@
+"""Метрики aiogram: длительность обработчиков, запросы к Bot API и HTTP-сервер /metrics.
+
+Сами метрики и реестр — в bot_core.metrics, этот модуль только подключает
+их к диспетчеру и сессии бота.
+"""
+import logging
+import time
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+from bot_core import config
+from bot_core.metrics import HANDLER_SECONDS, REGISTRY, STAGE_ERRORS, TELEGRAM_SECONDS
+from bot_core.scheduler import COMMAND_LANES, command_of
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Время от получения сообщения до конца обработчика (с ожиданием в очереди)"""
+
+    def __init__(self, commands=COMMAND_LANES):
+        # Неизвестные команды собираются в одну метку, чтобы не плодить серии
+        self.commands = frozenset(commands)
+
+    async def __call__(self, handler, event, data):
+        command = command_of(getattr(event, "text", None))
+        label = "message" if command is None else command if command in self.commands else "other"
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            STAGE_ERRORS.inc(1, "handler")
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, label)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Время запросов к Bot API по методам (sendMessage, editMessageText, ...)"""
+
+    async def __call__(self, make_request, bot, method):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            STAGE_ERRORS.inc(1, "telegram")
+            raise
+        finally:
+            TELEGRAM_SECONDS.observe(time.perf_counter() - started, method.__api_method__)
+
+
+def instrument(dp=None, bot=None, **components):
+    """Подключает middleware к диспетчеру и сессии бота, а stats компонентов — к /metrics.
+
+    HandlerMetricsMiddleware регистрируется первым, чтобы учитывать и очередь планировщика."""
+    if dp is not None:
+        dp.message.outer_middleware(HandlerMetricsMiddleware())
+    if bot is not None:
+        bot.session.middleware(TelegramMetricsMiddleware())
+    for name, component in components.items():
+        REGISTRY.register_stats(name, component)
+
+
+async def start_metrics_server(port=config.METRICS_PORT, host=config.METRICS_HOST, path=config.METRICS_PATH):
+    """HTTP-сервер с метриками для ботов на поллинге; None, если порт не задан"""
+    if not port:
+        return None
+    from aiohttp import web
+
+    async def metrics(request):
+        return web.Response(body=REGISTRY.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get(path, metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Метрики доступны на http://%s:%d%s", host, port, path)
+    return runner
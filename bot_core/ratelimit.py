@@ -0,0 +1,49 @@
+"""Ограничение частоты запросов алгоритмом token bucket."""
+import asyncio
+import time
+
+from bot_core.lazy import LoopBound
+
+
+class TokenBucket:
+    """rate токенов в секунду, не больше capacity про запас (допустимый всплеск);
+    rate <= 0 — без ограничения"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        # Состояние ведра переживает смену event loop, блокировка создаётся в каждом цикле своя
+        self._lock = LoopBound(asyncio.Lock)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, tokens=1):
+        """Сколько секунд ждать, пока наберётся tokens токенов"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def try_acquire(self, tokens=1):
+        """Забирает токены, если они есть; не ждёт"""
+        if self.delay(tokens):
+            return False
+        self.tokens -= tokens
+        return True
+
+    async def acquire(self, tokens=1):
+        """Ждёт своей очереди; ожидающие обслуживаются по порядку"""
+        async with self._lock():
+            while True:
+                wait = self.delay(tokens)
+                if not wait:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep(wait)
@@ -0,0 +1,95 @@
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from bot_core import config
+from bot_core.ann import reconstruct
+from bot_core.cache import LRUCache
+from bot_core.metrics import span
+from bot_core.tokens import chunk_text, count_tokens
+
+logger = logging.getLogger(__name__)
+
+Hit = namedtuple("Hit", "chunk_id chunk score")
+
+
+def reciprocal_rank_fusion(rankings, rrf_k=60):
+    """Объединяет ранжированные списки ID: score = сумма 1 / (rrf_k + позиция)"""
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRetriever:
+    """Поиск чанков: векторный (FAISS) и лексический (BM25), объединённые через RRF.
+
+    Лексическая часть находит точные совпадения — имена контрактов,
+    адреса, флаги CLI, — которые плохо ловятся эмбеддингами."""
+
+    def __init__(self, index, chunks, embedder, bm25=None, candidates=config.RETRIEVAL_CANDIDATES,
+                 rrf_k=config.RETRIEVAL_RRF_K, vector_cache_size=config.EMBED_CACHE_SIZE):
+        self.index = index
+        self.chunks = chunks
+        self.embedder = embedder
+        self.bm25 = bm25
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.vector_cache_size = vector_cache_size
+        self._vectors = LRUCache(vector_cache_size)  # chunk_id -> вектор, если индекс не восстанавливает векторы
+
+    def dense_search(self, query_vector, k):
+        with span("faiss"):
+            _, ids = self.index.search(np.asarray(query_vector, dtype=np.float32).reshape(1, -1), k)
+        return [int(i) for i in ids[0] if i != -1]
+
+    def sparse_search(self, query, k):
+        if self.bm25 is None:
+            return []
+        with span("bm25"):
+            ids, _ = self.bm25.search(query, k)
+        return ids.tolist()
+
+    async def chunk_vectors(self, hits):
+        """Векторы найденных чанков: из индекса FAISS, а если он их не восстанавливает
+        (IVF-PQ, IndexIDMap без direct map), — эмбеддинги текстов в отдельном LRU-кэше"""
+        vectors = reconstruct(self.index, [hit.chunk_id for hit in hits])
+        if vectors is not None:
+            return vectors
+        found = {hit.chunk_id: self._vectors.get(hit.chunk_id) for hit in hits}
+        missing = [hit for hit in hits if found[hit.chunk_id] is None]
+        if missing:
+            encoded = await self.embedder.encode([chunk_text(hit.chunk) for hit in missing])
+            for hit, vector in zip(missing, encoded):
+                found[hit.chunk_id] = vector
+                self._vectors.put(hit.chunk_id, vector)
+        return np.vstack([found[hit.chunk_id] for hit in hits])
+
+    async def search(self, query, k=config.RETRIEVAL_K, token_budget=config.RETRIEVAL_TOKEN_BUDGET,
+                     query_vector=None):
+        """Лучшие чанки по запросу: не больше k (если задано) и не больше token_budget токенов.
+        query_vector — уже посчитанный эмбеддинг запроса, чтобы не кодировать его второй раз"""
+        if query_vector is None:
+            query_vector = await self.embedder.embed(query)
+        limit = max(self.candidates, k or 0)
+        fused = reciprocal_rank_fusion(
+            [self.dense_search(query_vector, limit), self.sparse_search(query, limit)], self.rrf_k)
+
+        hits, used = [], 0
+        for chunk_id, score in fused:
+            try:
+                chunk = self.chunks[chunk_id]
+            except (KeyError, IndexError):
+                # Индекс и хранилище чанков могут ненадолго разойтись во время переиндексации
+                continue
+            if token_budget:
+                tokens = count_tokens(chunk_text(chunk))
+                if hits and used + tokens > token_budget:
+                    break
+                used += tokens
+            hits.append(Hit(chunk_id, chunk, score))
+            if k and len(hits) >= k:
+                break
+        return hits
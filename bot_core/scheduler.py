@@ -0,0 +1,236 @@
+"""Планировщик тяжёлой работы обработчиков (Groq, Tavily, DeepL).
+
+Перед запуском запрос проходит token bucket пользователя и чата, затем
+ждёт свободный слот из общего пула (потолок под лимиты провайдеров).
+Ожидающие стоят в двух очередях: быстрые команды (/ts, /ask, /search)
+обслуживаются в первую очередь, но каждый fast_weight-й слот отдаётся
+медленной очереди, чтобы длинные генерации не голодали.
+
+Слот занят на всё время обработчика, а не только на вызов API: ответ
+модели стримится правкой сообщения, пока открыт поток Groq, а команды
+вроде /summary делают несколько вызовов подряд (поиск, загрузка,
+суммаризация) и не должны уступать слот посреди работы.
+
+Об отказе пользователь узнаёт один раз за notice_cooldown секунд,
+остальные отклонённые сообщения отбрасываются молча — иначе флуд
+превращается в такой же поток ответов бота.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+
+from bot_core import config
+from bot_core.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+SLOW = "slow"
+
+# Команда -> очередь; None — команда выполняется без планировщика
+COMMAND_LANES = {
+    "start": None,
+    "ts": FAST,
+    "ask": FAST,
+    "search": FAST,
+    "ctx": SLOW,
+    "ctxsum": SLOW,
+    "summary": SLOW,
+    "link": SLOW,
+}
+
+
+class RateLimited(Exception):
+    """Пользователь или чат превысил лимит запросов"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Превышен лимит запросов, повторите через {retry_after:.0f} с")
+        self.retry_after = retry_after
+
+
+class QueueFull(Exception):
+    """Очередь планировщика заполнена"""
+
+
+class Scheduler:
+    """Лимиты на пользователя и чат, общий пул слотов и приоритетные очереди"""
+
+    def __init__(self, max_concurrency=config.SCHEDULER_MAX_CONCURRENCY, max_queue=config.SCHEDULER_MAX_QUEUE,
+                 user_rate=config.SCHEDULER_USER_RATE, user_burst=config.SCHEDULER_USER_BURST,
+                 chat_rate=config.SCHEDULER_CHAT_RATE, chat_burst=config.SCHEDULER_CHAT_BURST,
+                 fast_weight=3, max_buckets=100000):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.user_limit = (user_rate, user_burst)
+        self.chat_limit = (chat_rate, chat_burst)
+        self.fast_weight = fast_weight
+        self.max_buckets = max_buckets
+        self.active = 0
+        self.stats = {"admitted": 0, "rate_limited": 0, "rejected": 0, "queued": 0}
+        self._buckets = OrderedDict()
+        self._lanes = {FAST: deque(), SLOW: deque()}
+        self._fast_streak = 0
+
+    def _bucket(self, key, limit):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(*limit)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(key)
+        return bucket
+
+    def admit(self, user_id, chat_id):
+        """Списывает токены пользователя и чата; RateLimited, если их нет"""
+        user = self._bucket(("user", user_id), self.user_limit)
+        chat = self._bucket(("chat", chat_id), self.chat_limit)
+        # Токен списывается только если его хватает в обоих ведрах
+        wait = max(user.delay(), chat.delay())
+        if wait:
+            self.stats["rate_limited"] += 1
+            raise RateLimited(wait)
+        user.try_acquire()
+        chat.try_acquire()
+
+    def waiting(self):
+        return len(self._lanes[FAST]) + len(self._lanes[SLOW])
+
+    def position(self, lane, waiter):
+        """Номер в очереди с учётом того, что быстрая очередь обслуживается раньше"""
+        ahead = self._lanes[lane].index(waiter) + 1
+        return ahead + len(self._lanes[FAST]) if lane == SLOW else ahead
+
+    def _next_waiter(self):
+        fast, slow = self._lanes[FAST], self._lanes[SLOW]
+        if fast and (not slow or self._fast_streak < self.fast_weight):
+            self._fast_streak += 1
+            return fast.popleft()
+        self._fast_streak = 0
+        return slow.popleft() if slow else None
+
+    def _release(self):
+        while True:
+            waiter = self._next_waiter()
+            if waiter is None:
+                self.active -= 1
+                return
+            if not waiter.done():
+                # Слот переходит ожидающему, счётчик active не меняется
+                waiter.set_result(None)
+                return
+
+    @asynccontextmanager
+    async def slot(self, user_id, chat_id, lane=SLOW, on_queued=None):
+        """Выполнение под лимитами: async with scheduler.slot(user, chat, FAST): ...
+
+        on_queued(position) вызывается, если запросу пришлось встать в очередь."""
+        immediate = self.active < self.max_concurrency and not self.waiting()
+        # Запрос, который всё равно не поместится в очередь, не расходует токены пользователя
+        if not immediate and self.waiting() >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise QueueFull()
+        self.admit(user_id, chat_id)
+        if immediate:
+            self.active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._lanes[lane].append(waiter)
+            self.stats["queued"] += 1
+            try:
+                if on_queued is not None:
+                    await on_queued(self.position(lane, waiter))
+                await waiter
+            except BaseException:
+                if waiter.done() and not waiter.cancelled():
+                    # Слот уже был передан — возвращаем его
+                    self._release()
+                else:
+                    waiter.cancel()
+                    if waiter in self._lanes[lane]:
+                        self._lanes[lane].remove(waiter)
+                raise
+        self.stats["admitted"] += 1
+        try:
+            yield
+        finally:
+            self._release()
+
+
+def command_of(text):
+    """Имя команды без / и @username или None для обычного текста"""
+    if not text or not text.startswith("/"):
+        return None
+    return text.split(maxsplit=1)[0][1:].split("@", 1)[0].lower()
+
+
+class SchedulerMiddleware(BaseMiddleware):
+    """Пропускает сообщения через Scheduler и сообщает пользователю место в очереди.
+
+    Лимиты действуют на все сообщения: у фото и документов команда берётся
+    из подписи, сообщения без текста (стикеры, голосовые) идут в default_lane."""
+
+    def __init__(self, scheduler, lanes=COMMAND_LANES, default_lane=SLOW,
+                 notice_cooldown=config.SCHEDULER_NOTICE_COOLDOWN, max_users=100000):
+        self.scheduler = scheduler
+        self.lanes = lanes
+        self.default_lane = default_lane
+        self.notice_cooldown = notice_cooldown
+        self.max_users = max_users
+        self._notified = OrderedDict()  # user_id -> время последнего сообщения об отказе
+
+    def _should_notify(self, user_id):
+        now = time.monotonic()
+        last = self._notified.get(user_id)
+        if last is not None and now - last < self.notice_cooldown:
+            return False
+        self._notified[user_id] = now
+        self._notified.move_to_end(user_id)
+        if len(self._notified) > self.max_users:
+            self._notified.popitem(last=False)
+        return True
+
+    async def _reject(self, event, user_id, text):
+        if not self._should_notify(user_id):
+            logger.debug("Отказ пользователю %s без ответа: %s", user_id, text)
+            return
+        await event.answer(text)
+
+    async def __call__(self, handler, event, data):
+        command = command_of(getattr(event, "text", None) or getattr(event, "caption", None))
+        lane = self.lanes.get(command, self.default_lane) if command else self.default_lane
+        if lane is None:
+            return await handler(event, data)
+        # Сообщения от имени канала или группы приходят без from_user — лимит на чат
+        user_id = event.from_user.id if event.from_user is not None else event.chat.id
+
+        notice = None
+
+        async def on_queued(position):
+            nonlocal notice
+            try:
+                notice = await event.answer(f"⏳ Запрос в очереди, перед вами: {position - 1}")
+            except TelegramAPIError as e:
+                logger.debug("Не удалось отправить сообщение об очереди: %s", e)
+
+        try:
+            async with self.scheduler.slot(user_id, event.chat.id, lane, on_queued):
+                if notice is not None:
+                    await self._delete(notice)
+                return await handler(event, data)
+        except RateLimited as e:
+            await self._reject(event, user_id,
+                               f"Слишком много запросов. Попробуйте снова через {max(1, round(e.retry_after))} с.")
+        except QueueFull:
+            await self._reject(event, user_id, "Бот сейчас перегружен, попробуйте чуть позже.")
+
+    @staticmethod
+    async def _delete(message):
+        try:
+            await message.delete()
+        except TelegramAPIError as e:
+            logger.debug("Не удалось удалить сообщение об очереди: %s", e)
@@ -0,0 +1,122 @@
+"""Асинхронный шлюз к поиску Tavily.
+
+Запросы идут напрямую в REST API (POST {TAVILY_BASE_URL}/search) через
+общую сессию aiohttp, поэтому event loop не блокируется. Одинаковые
+запросы, пришедшие одновременно, превращаются в один вызов API,
+результаты кэшируются с TTL по глубине поиска, а общий token bucket и
+семафор ограничивают частоту и число параллельных обращений.
+"""
+import asyncio
+import collections
+import logging
+import time
+
+import aiohttp
+
+from bot_core import config
+from bot_core.lazy import LoopBound, close_session
+from bot_core.metrics import span
+from bot_core.ratelimit import TokenBucket
+from bot_core.tokens import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class SearchError(Exception):
+    """Tavily вернул ошибку или не ответил"""
+
+
+class SearchGateway:
+    """Кэширующий клиент Tavily с объединением одинаковых запросов и ограничением нагрузки"""
+
+    def __init__(self, api_key, base_url=config.TAVILY_BASE_URL, timeout=config.TAVILY_TIMEOUT,
+                 max_concurrency=config.TAVILY_MAX_CONCURRENCY, rate=config.TAVILY_RATE_LIMIT,
+                 burst=config.TAVILY_BURST, cache_size=config.SEARCH_CACHE_SIZE,
+                 ttl_basic=config.SEARCH_CACHE_TTL_BASIC, ttl_advanced=config.SEARCH_CACHE_TTL_ADVANCED):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.cache_size = cache_size
+        self.ttls = {"basic": ttl_basic, "advanced": ttl_advanced}
+        self.stats = {"requests": 0, "hits": 0, "coalesced": 0, "errors": 0}
+        self._bucket = TokenBucket(rate, burst)
+        self._cache = collections.OrderedDict()
+        # Кэш и bucket общие для всех event loop, сессия, семафор и запросы в полёте — у каждого свои
+        self._semaphore = LoopBound(lambda: asyncio.Semaphore(max_concurrency))
+        self._inflight = LoopBound(dict)
+        self._session = LoopBound(lambda: aiohttp.ClientSession(timeout=self.timeout), dispose=close_session)
+
+    def _get_session(self):
+        session = self._session()
+        if session.closed:
+            self._session.reset()
+            session = self._session()
+        return session
+
+    async def search(self, query, search_depth="basic", max_results=5, include_answer=False,
+                     include_images=False):
+        """Ответ Tavily /search в виде словаря (results, answer, ...)"""
+        key = (normalize_query(query), search_depth, max_results, include_answer, include_images)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+        inflight = self._inflight()
+        task = inflight.get(key)
+        if task is None:
+            payload = {
+                "api_key": self.api_key,
+                "query": query,
+                "search_depth": search_depth,
+                "max_results": max_results,
+                "include_answer": include_answer,
+                "include_images": include_images,
+            }
+            task = asyncio.ensure_future(self._request(key, payload))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # shield: отмена одного ожидающего не отменяет общий запрос
+        return await asyncio.shield(task)
+
+    async def qna_search(self, query):
+        """Короткий ответ на вопрос, как TavilyClient.qna_search"""
+        response = await self.search(query, search_depth="advanced", include_answer=True)
+        return response.get("answer")
+
+    async def _request(self, key, payload):
+        async with self._semaphore():
+            await self._bucket.acquire()
+            self.stats["requests"] += 1
+            started = time.perf_counter()
+            try:
+                with span("tavily"):
+                    async with self._get_session().post(f"{self.base_url}/search", json=payload) as response:
+                        if response.status != 200:
+                            raise SearchError(f"Tavily вернул {response.status}: {(await response.text())[:200]}")
+                        result = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.stats["errors"] += 1
+                raise SearchError(f"Ошибка запроса к Tavily: {e}") from e
+            except SearchError:
+                self.stats["errors"] += 1
+                raise
+        logger.info("Поиск Tavily (%s) за %.2f с: %s", payload["search_depth"],
+                    time.perf_counter() - started, payload["query"])
+
+        self._cache[key] = (time.monotonic() + self.ttls.get(payload["search_depth"], self.ttls["basic"]), result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["coalesced"] + self.stats["requests"]
+        return (self.stats["hits"] + self.stats["coalesced"]) / total if total else 0.0
+
+    async def aclose(self):
+        if self._session.current is not None:
+            await self._session.current.close()
@@ -0,0 +1,146 @@
+"""Клиенты внешних API и хранилища, общие для обработчиков всех ботов.
+
+Каждый компонент создаётся при первом обращении: бот без /ctx не грузит
+модель эмбеддингов и индекс, а вебхук не тратит на них холодный старт.
+Обработчики получают Services из данных диспетчера (аргумент services).
+"""
+import os
+
+from bot_core import config
+from bot_core.lazy import Lazy
+from bot_core.metrics import REGISTRY
+
+
+class Services:
+    """Ленивый набор клиентов бота и закрытие тех, что успели создать"""
+
+    def __init__(self, model="gemma2-9b-it", temperature=0.9, max_tokens=750):
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self._groq = Lazy(self._create_groq)
+        self._search = Lazy(self._create_search)
+        self._fetcher = Lazy(self._create_fetcher)
+        self._summarizer = Lazy(self._create_summarizer)
+        self._memory = Lazy(self._create_memory)
+        self._translator = Lazy(self._create_translator)
+        self._embedder = Lazy(self._create_embedder)
+        self._retriever = Lazy(self._create_retriever)
+        self._answer_cache = Lazy(self._create_answer_cache)
+
+    @staticmethod
+    def _track(name, component):
+        REGISTRY.register_stats(name, component)
+        return component
+
+    def _create_groq(self):
+        from bot_core.llm import GroqClient
+
+        return GroqClient(api_key=os.getenv('GROQ_API_KEY'), model=self.model)
+
+    def _create_search(self):
+        from bot_core.search import SearchGateway
+
+        return self._track("search", SearchGateway(api_key=os.getenv('TAVILY_API_KEY')))
+
+    def _create_fetcher(self):
+        from bot_core.fetch import PageFetcher
+
+        return self._track("fetch", PageFetcher())
+
+    def _create_summarizer(self):
+        from bot_core.summarize import Summarizer
+
+        return self._track("summarize", Summarizer(self.groq))
+
+    def _create_memory(self):
+        from bot_core.memory import ConversationStore
+
+        # MEMORY_DB_PATH включает сохранение истории в SQLite
+        return self._track("memory", ConversationStore(self.groq))
+
+    def _create_translator(self):
+        import deepl
+
+        from bot_core.translate import TranslationService
+
+        # Переводы кэшируются и отправляются в DeepL пакетами из пула потоков
+        translator = deepl.Translator(os.getenv('DEEPL_API_KEY'), server_url=config.DEEPL_SERVER_URL)
+        return self._track("translate", TranslationService(translator))
+
+    def _create_embedder(self):
+        from sentence_transformers import SentenceTransformer
+
+        from bot_core.embeddings import EmbeddingService
+
+        return self._track("embeddings", EmbeddingService(SentenceTransformer(config.EMBEDDING_MODEL)))
+
+    def _create_retriever(self):
+        from bot_core.retrieval import HybridRetriever
+        from bot_core.storage import load_index, open_bm25, open_chunks
+
+        # Индекс FAISS и чанки открываются через mmap: тексты читаются с диска
+        # только для найденных ID, а страницы общие для всех процессов бота
+        index = load_index(config.CONTEXT_INDEX_PATH)
+        chunks = open_chunks(config.CONTEXT_CHUNKS_PATH, json_path=config.CONTEXT_LEGACY_CHUNKS_PATH)
+        # Векторный поиск дополняется BM25 для точных совпадений (имена, адреса, флаги)
+        return HybridRetriever(index, chunks, self.embedder, bm25=open_bm25(config.CONTEXT_BM25_PATH, chunks))
+
+    def _create_answer_cache(self):
+        from bot_core.answer_cache import SemanticCache
+
+        # Кэш готовых ответов для похожих вопросов с тем же контекстом
+        return self._track("answer_cache", SemanticCache())
+
+    @property
+    def groq(self):
+        return self._groq()
+
+    @property
+    def search(self):
+        return self._search()
+
+    @property
+    def fetcher(self):
+        return self._fetcher()
+
+    @property
+    def summarizer(self):
+        return self._summarizer()
+
+    @property
+    def memory(self):
+        return self._memory()
+
+    @property
+    def translator(self):
+        return self._translator()
+
+    @property
+    def embedder(self):
+        return self._embedder()
+
+    @property
+    def retriever(self):
+        return self._retriever()
+
+    @property
+    def answer_cache(self):
+        return self._answer_cache()
+
+    def preload(self, *names):
+        """Создаёт компоненты заранее, чтобы первый запрос не ждал загрузки модели и индекса"""
+        for name in names:
+            getattr(self, name)
+
+    async def aclose(self):
+        if self._answer_cache.initialized:
+            await self.answer_cache.flush()
+        if self._memory.initialized:
+            await self.memory.aclose()
+        if self._groq.initialized:
+            await self.groq.aclose()
+        if self._fetcher.initialized:
+            await self.fetcher.aclose()
+        if self._search.initialized:
+            await self.search.aclose()
@@ -0,0 +1,151 @@
+"""Хранилище индекса FAISS и текстов чанков, открываемое через mmap.
+
+Формат файла чанков:
+    magic (8 байт) | count (uint64) | ids (int64 x count, по возрастанию)
+    | offsets (uint64 x count+1) | данные (JSON каждого чанка в UTF-8)
+
+Файл только читается через mmap, поэтому несколько процессов бота
+делят одни и те же страницы в page cache, а в память попадают лишь
+чанки, найденные поиском.
+
+Конвертация прежнего JSON-файла:
+    python -m bot_core.storage swiss_chunks.json swiss_chunks.bin
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+from bot_core.ann import configure_index
+from bot_core.bm25 import BM25Index
+from bot_core.tokens import chunk_text
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CHNKSTR1"
+HEADER = struct.Struct("<8sQ")
+
+
+def load_index(path, use_mmap=True):
+    """Открывает индекс FAISS; с use_mmap данные индекса отображаются в память, а не копируются.
+    nprobe/efSearch берутся из конфигурации (INDEX_NPROBE, INDEX_EF_SEARCH)."""
+    import faiss
+
+    if not use_mmap:
+        return configure_index(faiss.read_index(path))
+    # Новые версии faiss умеют отображать в память любые коды (IFC), старые — только списки IVF
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+    return configure_index(faiss.read_index(path, flags))
+
+
+def write_chunk_store(path, records):
+    """Атомарно записывает чанки; records — словарь {id: чанк} или список (id = позиция)"""
+    pairs = records.items() if isinstance(records, dict) else enumerate(records)
+    items = sorted((int(chunk_id), chunk) for chunk_id, chunk in pairs)
+
+    ids = np.array([chunk_id for chunk_id, _ in items], dtype="<i8")
+    blobs = [json.dumps(chunk, ensure_ascii=False).encode("utf-8") for _, chunk in items]
+    offsets = np.zeros(len(blobs) + 1, dtype="<u8")
+    np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(blobs)))
+        f.write(ids.tobytes())
+        f.write(offsets.tobytes())
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class ChunkStore:
+    """Чанки по ID с чтением с диска по требованию"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: неизвестный формат хранилища чанков")
+        self.ids = np.frombuffer(self._mmap, dtype="<i8", count=count, offset=HEADER.size)
+        self._offsets = np.frombuffer(self._mmap, dtype="<u8", count=count + 1,
+                                      offset=HEADER.size + 8 * count)
+        self._data_start = HEADER.size + 8 * count + 8 * (count + 1)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _position(self, chunk_id):
+        position = int(np.searchsorted(self.ids, chunk_id))
+        if position >= len(self.ids) or self.ids[position] != chunk_id:
+            raise KeyError(chunk_id)
+        return position
+
+    def __contains__(self, chunk_id):
+        try:
+            self._position(chunk_id)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, chunk_id):
+        position = self._position(chunk_id)
+        start = self._data_start + int(self._offsets[position])
+        end = self._data_start + int(self._offsets[position + 1])
+        return json.loads(self._mmap[start:end].decode("utf-8"))
+
+    def get_many(self, chunk_ids):
+        """Чанки для найденных ID; отсутствующие (например, после переиндексации) пропускаются"""
+        return [self[i] for i in chunk_ids if i in self]
+
+    def items(self):
+        for chunk_id in self.ids:
+            yield int(chunk_id), self[int(chunk_id)]
+
+    def close(self):
+        # Массивы ids/offsets ссылаются на mmap, их нужно отпустить до закрытия
+        self.ids = self._offsets = None
+        self._mmap.close()
+        self._file.close()
+
+
+def open_chunks(path, json_path=None):
+    """ChunkStore из path, а если его нет — прежний JSON-список (ID = позиция)"""
+    if os.path.exists(path) or json_path is None:
+        return ChunkStore(path)
+    logger.warning("Хранилище %s не найдено, загружаю %s целиком", path, json_path)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def open_bm25(path, chunks):
+    """Индекс BM25 из path; если файла нет, строится по хранилищу чанков"""
+    if os.path.exists(path):
+        return BM25Index.load(path)
+    logger.warning("Индекс BM25 %s не найден, строю по чанкам", path)
+    items = chunks.items() if isinstance(chunks, ChunkStore) else enumerate(chunks)
+    ids, texts = [], []
+    for chunk_id, chunk in items:
+        ids.append(chunk_id)
+        texts.append(chunk_text(chunk))
+    return BM25Index.build(ids, texts)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Использование: python -m bot_core.storage <chunks.json> <chunks.bin>")
+        sys.exit(1)
+    json_path, store_path = sys.argv[1:]
+    with open(json_path, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    write_chunk_store(store_path, chunks)
+    print(f"Записано {len(chunks)} чанков в {store_path}")
+
+
+if __name__ == "__main__":
+    main()
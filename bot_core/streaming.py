@@ -0,0 +1,105 @@
+import asyncio
+import logging
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Лимит Telegram — 4096 символов, оставляем запас
+MAX_MESSAGE_LENGTH = 4000
+
+
+def split_point(text, limit):
+    """Позиция разреза длинного текста: по абзацу, строке или пробелу, иначе ровно по лимиту"""
+    for separator in ("\n\n", "\n", " "):
+        position = text.rfind(separator, limit // 2, limit)
+        if position != -1:
+            return position + len(separator)
+    return limit
+
+
+class StreamingMessage:
+    """Постепенно выводит поток текста в Telegram.
+
+    Фрагменты копятся в буфере, сообщение редактируется не чаще чем раз
+    в interval секунд. При достижении limit текущее сообщение фиксируется
+    и вывод продолжается в новом."""
+
+    def __init__(self, placeholder, interval=1.0, limit=MAX_MESSAGE_LENGTH, cursor=" ▌"):
+        # placeholder — уже отправленное ботом сообщение, которое станет первой частью ответа
+        self._message = placeholder
+        self._previous = placeholder
+        self.interval = interval
+        self.limit = limit
+        self.cursor = cursor
+        self.parts = []
+        self._text = ""
+        self._shown = None
+        self._last_edit = 0.0
+
+    @property
+    def text(self):
+        return "".join(self.parts) + self._text
+
+    async def _call(self, method, *args, **kwargs):
+        while True:
+            try:
+                return await method(*args, **kwargs)
+            except TelegramRetryAfter as e:
+                logger.warning("Telegram просит подождать %s с перед редактированием", e.retry_after)
+                await asyncio.sleep(e.retry_after)
+            except TelegramBadRequest as e:
+                if "message is not modified" in str(e):
+                    return None
+                raise
+
+    async def _render(self, text):
+        if text == self._shown:
+            return
+        if self._message is None:
+            self._message = await self._call(self._previous.answer, text)
+        else:
+            await self._call(self._message.edit_text, text)
+        self._shown = text
+        self._last_edit = asyncio.get_running_loop().time()
+
+    async def _rollover(self):
+        # Фиксируем заполненное сообщение и переходим к новому
+        while len(self._text) > self.limit:
+            cut = split_point(self._text, self.limit)
+            head, self._text = self._text[:cut], self._text[cut:]
+            await self._render(head)
+            self.parts.append(head)
+            self._previous, self._message, self._shown = self._message, None, None
+
+    async def write(self, delta):
+        self._text += delta
+        if len(self._text) > self.limit:
+            await self._rollover()
+        now = asyncio.get_running_loop().time()
+        if self._text.strip() and now - self._last_edit >= self.interval:
+            await self._render(self._text[:self.limit - len(self.cursor)] + self.cursor)
+
+    async def finish(self):
+        """Выводит остаток буфера без курсора и возвращает весь текст"""
+        await self._rollover()
+        if self._text.strip():
+            await self._render(self._text)
+        return self.text
+
+    async def consume(self, chunks):
+        try:
+            async for delta in chunks:
+                await self.write(delta)
+        finally:
+            # При ошибке записи генератор закрывается сразу и освобождает слот и соединение Groq
+            if hasattr(chunks, "aclose"):
+                await chunks.aclose()
+        return await self.finish()
+
+
+async def send_long(placeholder, text):
+    """Выводит готовый текст в placeholder, продолжая в новых сообщениях при превышении лимита"""
+    writer = StreamingMessage(placeholder, interval=float("inf"))
+    await writer.write(text)
+    return await writer.finish()
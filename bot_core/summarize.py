@@ -0,0 +1,151 @@
+"""Map-reduce суммаризация длинных текстов.
+
+Вход режется на сегменты не длиннее segment_tokens (по абзацам, затем
+по предложениям и словам), сегменты суммируются параллельно (map),
+частичные саммари объединяются группами, пока не уложатся в один
+сегмент (reduce), и финальный ответ выводится потоком. Саммари
+сегментов кэшируются по хэшу содержимого, поэтому повторная обработка
+той же страницы или статьи почти ничего не стоит.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+
+from bot_core import config
+from bot_core.lazy import LoopBound
+from bot_core.streaming import StreamingMessage
+from bot_core.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+MAP_PROMPT = ("Summarize the following part of a longer text in Russian. "
+              "Keep the key facts, names, numbers and dates:\n\n{text}")
+REDUCE_PROMPT = ("Combine the following partial summaries of one text into a single summary in Russian, "
+                 "removing repetitions:\n\n{text}")
+SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+")
+
+
+def split_pieces(text, max_tokens):
+    """Абзацы текста; слишком длинные режутся по предложениям, а те — по словам"""
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) <= max_tokens:
+            yield paragraph
+            continue
+        for sentence in SENTENCE_RE.split(paragraph):
+            while count_tokens(sentence) > max_tokens:
+                head = truncate_to_tokens(sentence, max_tokens) or sentence.split(" ", 1)[0]
+                yield head
+                sentence = sentence[len(head):].lstrip()
+            if sentence:
+                yield sentence
+
+
+def pack(pieces, max_tokens, separator="\n"):
+    """Жадно склеивает соседние куски в сегменты не длиннее max_tokens"""
+    segments, current, used = [], [], 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if current and used + tokens > max_tokens:
+            segments.append(separator.join(current))
+            current, used = [], 0
+        current.append(piece)
+        used += tokens
+    if current:
+        segments.append(separator.join(current))
+    return segments
+
+
+def split_segments(documents, max_tokens):
+    """Сегменты для map-шага; короткие документы объединяются, длинные режутся"""
+    pieces = []
+    for document in documents:
+        pieces.extend(split_pieces(document, max_tokens))
+        pieces.append("")  # граница документов: пустая строка при склейке
+    while pieces and not pieces[-1]:
+        pieces.pop()
+    return [segment.strip() for segment in pack(pieces, max_tokens)]
+
+
+class Summarizer:
+    """Суммаризация произвольно длинных текстов через GroqClient"""
+
+    def __init__(self, llm, segment_tokens=config.SUMMARY_SEGMENT_TOKENS,
+                 partial_tokens=config.SUMMARY_PARTIAL_TOKENS,
+                 max_concurrency=config.SUMMARY_MAX_CONCURRENCY, cache_size=config.SUMMARY_CACHE_SIZE,
+                 temperature=0.95, max_tokens=750):
+        self.llm = llm
+        self.segment_tokens = segment_tokens
+        self.partial_tokens = partial_tokens
+        self.cache_size = cache_size
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.stats = {"segments": 0, "hits": 0, "calls": 0, "reduce_rounds": 0}
+        self._semaphore = LoopBound(lambda: asyncio.Semaphore(max_concurrency))
+        self._cache = OrderedDict()
+
+    def _key(self, template, text):
+        payload = f"{self.llm.model}\0{self.partial_tokens}\0{template}\0{text}"
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    async def _summarize_part(self, template, text):
+        key = self._key(template, text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return cached
+        async with self._semaphore():
+            self.stats["calls"] += 1
+            summary = await self.llm.complete(template.format(text=text), temperature=0.3,
+                                              max_tokens=self.partial_tokens)
+        self._cache[key] = summary
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return summary
+
+    async def _map(self, template, texts):
+        return list(await asyncio.gather(*(self._summarize_part(template, text) for text in texts)))
+
+    async def condense(self, documents):
+        """Текст, укладывающийся в один сегмент: исходный или свёрнутый map-reduce"""
+        if isinstance(documents, str):
+            documents = [documents]
+        segments = split_segments(documents, self.segment_tokens)
+        self.stats["segments"] += len(segments)
+        if len(segments) <= 1:
+            return segments[0] if segments else ""
+
+        parts = await self._map(MAP_PROMPT, segments)
+        while len(parts) > 1 and count_tokens("\n\n".join(parts)) > self.segment_tokens:
+            groups = pack(parts, self.segment_tokens, separator="\n\n")
+            if len(groups) == len(parts):
+                # Саммари крупнее полусегмента: объединяем попарно, чтобы уровень точно сократился
+                groups = ["\n\n".join(parts[i:i + 2]) for i in range(0, len(parts), 2)]
+            self.stats["reduce_rounds"] += 1
+            parts = await self._map(REDUCE_PROMPT, groups)
+        logger.info("Суммаризация: %d сегментов свёрнуто до %d токенов", len(segments),
+                    count_tokens("\n\n".join(parts)))
+        return truncate_to_tokens("\n\n".join(parts), self.segment_tokens)
+
+    async def summarize(self, documents, instruction, stream_to=None, header=""):
+        """Итоговое саммари документов (строка или список строк).
+
+        instruction — задание для финального запроса, например
+        "Summarize the following content in Russian". Если передан
+        stream_to (сообщение бота), ответ выводится в него по мере
+        генерации после header."""
+        text = await self.condense(documents)
+        prompt = f"{instruction}:\n\n{text}"
+        if stream_to is None:
+            summary = await self.llm.complete(prompt, temperature=self.temperature, max_tokens=self.max_tokens)
+            return header + summary
+        writer = StreamingMessage(stream_to)
+        if header:
+            await writer.write(header)
+        deltas = self.llm.stream(prompt, temperature=self.temperature, max_tokens=self.max_tokens)
+        return await writer.consume(deltas)
@@ -0,0 +1,41 @@
+import re
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # пакет не установлен или словарь недоступен офлайн
+    _encoding = None
+
+# Слова и отдельные знаки препинания; длинные слова токенизатор модели режет на части
+PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """Число токенов текста для оценки размера промпта.
+    С tiktoken — точный подсчёт по cl100k_base, без него — оценка по словам."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return sum(1 + len(piece) // 6 for piece in PIECE_RE.findall(text))
+
+
+def normalize_query(text):
+    """Ключ кэша запроса: регистр и лишние пробелы не влияют ни на эмбеддинг, ни на поиск"""
+    return " ".join(text.lower().split())
+
+
+def chunk_text(chunk):
+    """Текст чанка: в хранилище лежат словари с полем content или просто строки"""
+    return chunk["content"] if isinstance(chunk, dict) else chunk
+
+
+def truncate_to_tokens(text, budget):
+    """Обрезает текст по границе слова, чтобы он уложился в budget токенов"""
+    words = text.split(" ")
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle])) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
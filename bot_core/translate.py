@@ -0,0 +1,160 @@
+"""Перевод через DeepL вне event loop с кэшем и пакетной отправкой.
+
+Тексты, пришедшие в течение batch_window секунд, уходят в DeepL одним
+запросом с несколькими text (отдельно для каждого языка перевода).
+Длинный текст режется по границам предложений на сегменты; пакет
+ограничен max_batch_chars символов, поэтому сегменты уходят несколькими
+параллельными запросами и затем склеиваются обратно. Переводы кэшируются
+по (хэш текста, язык).
+"""
+import asyncio
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from bot_core import config
+from bot_core.cache import LRUCache
+from bot_core.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Предложение вместе с завершающими пробелами; отдельная строка — тоже граница
+SENTENCE_RE = re.compile(r"[^.!?…\n]*(?:[.!?…]+|\n|$)\s*")
+
+
+def split_sentences(text, max_chars):
+    """Сегменты не длиннее max_chars по границам предложений; их конкатенация равна text"""
+    segments, current = [], ""
+    for sentence in SENTENCE_RE.findall(text):
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            # Предложение длиннее сегмента режем по последнему пробелу
+            cut = sentence.rfind(" ", 0, max_chars) + 1 or max_chars
+            if current:
+                segments.append(current)
+                current = ""
+            segments.append(sentence[:cut])
+            sentence = sentence[cut:]
+        if len(current) + len(sentence) > max_chars:
+            segments.append(current)
+            current = ""
+        current += sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+def text_key(text, target_lang):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest(), target_lang.upper()
+
+
+class TranslationService:
+    """Асинхронная обёртка над deepl.Translator с кэшем, пакетами и сегментацией"""
+
+    def __init__(self, translator, batch_window=config.TRANSLATE_BATCH_WINDOW,
+                 max_batch_texts=config.TRANSLATE_MAX_BATCH_TEXTS, max_batch_chars=config.TRANSLATE_MAX_BATCH_CHARS,
+                 segment_chars=config.TRANSLATE_SEGMENT_CHARS, cache_size=config.TRANSLATE_CACHE_SIZE,
+                 max_workers=config.TRANSLATE_MAX_WORKERS, executor=None):
+        self.translator = translator
+        self.batch_window = batch_window
+        self.max_batch_texts = max_batch_texts
+        self.max_batch_chars = max_batch_chars
+        self.segment_chars = segment_chars
+        self.cache_size = cache_size
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deepl")
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "batches": 0, "translated": 0, "chars": 0}
+        self._cache = LRUCache(cache_size, self.stats)
+        # язык -> {ключ: (текст, future)} и отложенная отправка для каждого языка
+        self._pending = {}
+        self._pending_chars = {}
+        self._flush_handles = {}
+        self._tasks = set()
+
+    async def translate(self, text, target_lang="RU"):
+        """Перевод текста любой длины на target_lang"""
+        if len(text) <= self.segment_chars:
+            return await self._translate_segment(text, target_lang)
+
+        key = text_key(text, target_lang)
+        translation = self._cache.get(key)
+        if translation is not None:
+            return translation
+        segments = split_sentences(text, self.segment_chars)
+        logger.info("Перевод длинного текста: %d символов, %d сегментов", len(text), len(segments))
+        parts = await asyncio.gather(*(self._translate_segment(segment, target_lang) for segment in segments))
+        translation = "".join(parts)
+        self._cache.put(key, translation)
+        return translation
+
+    async def _translate_segment(self, text, target_lang):
+        # Пробелы и переводы строк по краям DeepL не сохраняет — возвращаем их сами
+        stripped = text.strip()
+        if not stripped:
+            return text
+        leading = text[:len(text) - len(text.lstrip())]
+        trailing = text[len(text.rstrip()):]
+
+        key = text_key(stripped, target_lang)
+        translation = self._cache.get(key)
+        if translation is not None:
+            return leading + translation + trailing
+
+        # Одинаковые тексты в одном окне ждут общий результат
+        lang = key[1]
+        pending = self._pending.setdefault(lang, {})
+        entry = pending.get(key)
+        if entry is None:
+            future = asyncio.get_running_loop().create_future()
+            pending[key] = (stripped, future)
+            self._pending_chars[lang] = self._pending_chars.get(lang, 0) + len(stripped)
+            if len(pending) >= self.max_batch_texts or self._pending_chars[lang] >= self.max_batch_chars:
+                self._flush(lang)
+            elif lang not in self._flush_handles:
+                self._flush_handles[lang] = asyncio.get_running_loop().call_later(
+                    self.batch_window, self._flush, lang)
+        else:
+            self.stats["coalesced"] += 1
+            future = entry[1]
+        return leading + await asyncio.shield(future) + trailing
+
+    def _flush(self, lang):
+        handle = self._flush_handles.pop(lang, None)
+        if handle is not None:
+            handle.cancel()
+        batch = self._pending.pop(lang, {})
+        self._pending_chars.pop(lang, None)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._translate_batch(lang, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _translate_batch(self, lang, batch):
+        keys = list(batch)
+        texts = [batch[key][0] for key in keys]
+        self.stats["batches"] += 1
+        self.stats["translated"] += len(texts)
+        self.stats["chars"] += sum(len(text) for text in texts)
+        try:
+            with span("deepl"):
+                translations = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self._translate, texts, lang)
+        except Exception as e:
+            logger.error("Ошибка при переводе DeepL: %s", e)
+            for _, future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, translation in zip(keys, translations):
+            self._cache.put(key, translation)
+            future = batch[key][1]
+            if not future.done():
+                future.set_result(translation)
+
+    def _translate(self, texts, lang):
+        results = self.translator.translate_text(texts, target_lang=lang)
+        return [result.text for result in results]
+
+    def hit_rate(self):
+        return self._cache.hit_rate()
@@ -0,0 +1,218 @@
+"""ASGI-приложение для вебхука Telegram.
+
+Апдейт проверяется (секретный токен, JSON), ставится в ограниченную
+очередь и сразу подтверждается ответом 200; обработку через
+dp.feed_update ведут фоновые воркеры. При переполнении очереди
+возвращается 503, и Telegram повторит доставку позже.
+
+Если задан metrics_path, по GET на него отдаются метрики Prometheus.
+
+В serverless-окружении (Vercel) фоновые задачи замораживаются после
+ответа, поэтому там используется inline=True — обработка до ответа.
+
+Диспетчер и бот можно передать как Lazy: тогда они (и aiogram) создаются
+при запуске, а не при импорте модуля с приложением. Если вызовы приходят
+в разных event loop (Vercel), бот остаётся прежним, а его сессия aiohttp
+закрывается и создаётся заново в новом цикле.
+"""
+import asyncio
+import hmac
+import json
+import logging
+
+from bot_core.lazy import LoopBound, close_session, resolve
+from bot_core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = b"x-telegram-bot-api-secret-token"
+MAX_BODY_SIZE = 1024 * 1024
+METRICS_CONTENT_TYPE = b"text/plain; version=0.0.4; charset=utf-8"
+
+
+async def send_response(send, status, body=b"", headers=(), content_type=b"text/plain; charset=utf-8"):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def read_body(receive, limit=MAX_BODY_SIZE):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+class WebhookApp:
+    """ASGI-приложение: приём апдейтов Telegram и их обработка в фоне"""
+
+    def __init__(self, dp, bot, path="/api/telegram_webhook", secret_token=None,
+                 workers=32, queue_size=1000, inline=False, shutdown_timeout=10.0, metrics_path=None):
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret_token = secret_token
+        self.workers = workers
+        self.queue_size = queue_size
+        self.inline = inline
+        self.shutdown_timeout = shutdown_timeout
+        self.metrics_path = metrics_path
+        self.stats = {"received": 0, "processed": 0, "failed": 0, "rejected": 0}
+        REGISTRY.register_stats("webhook", self)
+        self._update_type = None
+        self._queue = None
+        self._tasks = []
+        self._started = False
+        self._accepting = False
+        self._start_lock = LoopBound(asyncio.Lock)
+        self._loop = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.start()
+                except Exception as e:
+                    logger.exception("Ошибка при запуске вебхука")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _authorized(self, scope):
+        if not self.secret_token:
+            return True
+        token = dict(scope.get("headers", ())).get(SECRET_HEADER, b"")
+        return hmac.compare_digest(token, self.secret_token.encode())
+
+    async def _http(self, scope, receive, send):
+        if self.metrics_path and scope["path"] == self.metrics_path and scope["method"] == "GET":
+            await send_response(send, 200, REGISTRY.render().encode(), content_type=METRICS_CONTENT_TYPE)
+            return
+        if scope["path"].rstrip("/") != self.path.rstrip("/"):
+            await send_response(send, 404, b"Not Found")
+            return
+        if scope["method"] != "POST":
+            await send_response(send, 405, b"Method Not Allowed", [(b"allow", b"POST")])
+            return
+        if not self._authorized(scope):
+            await send_response(send, 401, b"Unauthorized")
+            return
+
+        body = await read_body(receive)
+        if body is None:
+            await send_response(send, 413, b"Payload Too Large")
+            return
+        self._bind_loop()
+        if not self._started:
+            # Сервер без поддержки lifespan: запускаемся при первом запросе
+            await self.start()
+        try:
+            update = self._update_type.model_validate(json.loads(body), context={"bot": self.bot})
+        except ValueError as e:
+            logger.warning("Некорректный апдейт: %s", e)
+            await send_response(send, 400, b"Bad Request")
+            return
+        self.stats["received"] += 1
+
+        if self.inline:
+            await self._process(update)
+            await send_response(send, 200, b"OK")
+            return
+        if not self._accepting:
+            await send_response(send, 503, b"Shutting Down", [(b"retry-after", b"5")])
+            return
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            await send_response(send, 503, b"Busy", [(b"retry-after", b"1")])
+            return
+        await send_response(send, 200, b"OK")
+
+    async def _process(self, update):
+        try:
+            await self.dp.feed_update(self.bot, update)
+            self.stats["processed"] += 1
+        except Exception:
+            self.stats["failed"] += 1
+            logger.exception("Ошибка при обработке апдейта %s", update.update_id)
+
+    async def _worker(self):
+        while True:
+            update = await self._queue.get()
+            try:
+                await self._process(update)
+            finally:
+                self._queue.task_done()
+
+    def _bind_loop(self):
+        """Закрывает сессию бота, оставшуюся от прежнего event loop"""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        if self._loop is not None and self._started:
+            # aiogram создаёт сессию aiohttp заново, если её нет
+            session = self.bot.session
+            previous, session._session = getattr(session, "_session", None), None
+            if previous is not None:
+                logger.info("Сменился event loop, закрываю сессию бота")
+                close_session(previous, self._loop)
+        self._loop = loop
+
+    async def start(self):
+        # Одновременные первые запросы ждут, пока запуск закончится
+        async with self._start_lock():
+            if self._started:
+                return
+            from aiogram.types import Update
+
+            self._update_type = Update
+            self.dp, self.bot = resolve(self.dp), resolve(self.bot)
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            await self.dp.emit_startup(bot=self.bot)
+            if not self.inline:
+                self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            self._started = True
+            self._accepting = True
+        logger.info("Вебхук запущен: %s, воркеров: %d", self.path, 0 if self.inline else self.workers)
+
+    async def stop(self):
+        """Перестаёт принимать апдейты, дорабатывает очередь и закрывает клиентов"""
+        if not self._started:
+            return
+        self._accepting = False
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Не дождались обработки %d апдейтов", self._queue.qsize())
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+        await self.dp.emit_shutdown(bot=self.bot)
+        await self.bot.session.close()
+        self._started = False
+        logger.info("Вебхук остановлен: %s", self.stats)
@@ -0,0 +1,228 @@
+"""Многопроцессный режим: фронт получает апдейты и раздаёт их воркерам по chat_id.
+
+Фронт (один процесс) делает long polling и кладёт апдейт в очередь
+воркера chat_id % N, поэтому все апдейты чата попадают в один процесс.
+Воркер — отдельный процесс со своим диспетчером, клиентами и event loop;
+CPU-работа (эмбеддинги, разбор HTML, BM25) идёт на нескольких ядрах.
+Внутри воркера апдейты одного чата обрабатываются строго по порядку,
+разных чатов — параллельно. Индекс FAISS и чанки открываются через mmap,
+так что их страницы в памяти общие для всех воркеров.
+
+    BOT_WORKERS=4 python conty.py
+"""
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import queue
+import signal
+from collections import deque
+
+from bot_core import config
+
+logger = logging.getLogger(__name__)
+
+DISPATCHER_FACTORY = "bot_core.app:create_dispatcher"
+
+
+def chat_id_of(update):
+    """ID чата апдейта в виде словаря; для inline_query, poll_answer и т. п. — ID пользователя,
+    0, если нет ни того, ни другого"""
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        user = value.get("from") or value.get("user")
+        if user:
+            return user["id"]
+    return 0
+
+
+def shard_of(chat_id, workers):
+    return chat_id % workers
+
+
+def import_factory(path):
+    """Функция по пути вида "package.module:function" """
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+class ChatSequencer:
+    """Апдейты одного чата — по очереди, разных чатов — параллельно (не больше max_concurrency).
+
+    max_pending ограничивает число принятых, но не обработанных апдейтов:
+    submit() ждёт, и воркер перестаёт забирать апдейты из очереди фронта."""
+
+    def __init__(self, handle, max_concurrency=config.WORKER_MAX_CONCURRENCY, max_pending=None):
+        self.handle = handle
+        self._pending = {}  # chat_id -> deque апдейтов
+        self._tasks = set()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._capacity = asyncio.Semaphore(max_pending or max_concurrency * 4)
+
+    async def submit(self, chat_id, update):
+        await self._capacity.acquire()
+        pending = self._pending.get(chat_id)
+        if pending is not None:
+            pending.append(update)
+            return
+        self._pending[chat_id] = deque([update])
+        task = asyncio.get_running_loop().create_task(self._drain(chat_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self, chat_id):
+        pending = self._pending[chat_id]
+        try:
+            while pending:
+                update = pending.popleft()
+                try:
+                    async with self._semaphore:
+                        await self.handle(update)
+                except Exception:
+                    logger.exception("Ошибка при обработке апдейта чата %s", chat_id)
+                finally:
+                    self._capacity.release()
+        finally:
+            del self._pending[chat_id]
+
+    async def join(self):
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def serve_worker(index, profile, updates, ready, factory=DISPATCHER_FACTORY, token=None,
+                       api_url=config.TELEGRAM_API_URL):
+    """Цикл воркера: апдейты из очереди фронта в диспетчер до получения None"""
+    from aiogram.types import Update
+
+    from bot_core.app import create_bot
+    from bot_core.monitoring import start_metrics_server
+
+    bot = create_bot(token, api_url)
+    dp = import_factory(factory)(profile)
+    await dp.emit_startup(bot=bot)
+    # Метрики воркера i — на METRICS_PORT + 1 + i, у фронта METRICS_PORT
+    metrics_server = await start_metrics_server(port=config.METRICS_PORT and config.METRICS_PORT + 1 + index)
+
+    async def handle(raw):
+        await dp.feed_update(bot, Update.model_validate(raw, context={"bot": bot}))
+
+    sequencer = ChatSequencer(handle)
+    loop = asyncio.get_running_loop()
+    ready.put(index)
+    try:
+        while True:
+            raw = await loop.run_in_executor(None, updates.get)
+            if raw is None:
+                break
+            await sequencer.submit(chat_id_of(raw), raw)
+        await sequencer.join()
+    finally:
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+        if metrics_server is not None:
+            await metrics_server.cleanup()
+
+
+def run_worker(index, profile, updates, ready, factory, token, api_url):
+    # Ctrl+C получает вся группа процессов; воркер завершается по None от фронта, доработав очередь
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s - worker {index} - %(levelname)s - %(message)s")
+    asyncio.run(serve_worker(index, profile, updates, ready, factory, token, api_url))
+
+
+class WorkerPool:
+    """Процессы-воркеры и раздача им апдейтов по chat_id"""
+
+    def __init__(self, profile, workers=config.BOT_WORKERS, queue_size=config.WORKER_QUEUE_SIZE,
+                 factory=DISPATCHER_FACTORY, token=None, api_url=config.TELEGRAM_API_URL, start_timeout=120.0):
+        self.profile = profile
+        self.workers = workers
+        self.queue_size = queue_size
+        self.factory = factory
+        self.token = token
+        self.api_url = api_url
+        self.start_timeout = start_timeout
+        self.stats = {"dispatched": 0}
+        # spawn: воркер не наследует потоки и event loop фронта
+        self._context = multiprocessing.get_context("spawn")
+        self._queues = []
+        self._processes = []
+
+    def start(self):
+        """Запускает воркеры и ждёт, пока каждый создаст диспетчер и клиентов"""
+        ready = self._context.Queue()
+        for index in range(self.workers):
+            updates = self._context.Queue(maxsize=self.queue_size)
+            process = self._context.Process(
+                target=run_worker, name=f"bot-worker-{index}", daemon=True,
+                args=(index, self.profile, updates, ready, self.factory, self.token, self.api_url))
+            process.start()
+            self._queues.append(updates)
+            self._processes.append(process)
+        for _ in range(self.workers):
+            try:
+                ready.get(timeout=self.start_timeout)
+            except queue.Empty:
+                self.stop(timeout=0)
+                raise RuntimeError("Воркеры не запустились за отведённое время")
+        logger.info("Запущено воркеров: %d", self.workers)
+        return self
+
+    def dispatch(self, update):
+        """Кладёт апдейт (словарь) в очередь воркера его чата; ждёт, если очередь заполнена"""
+        self._queues[shard_of(chat_id_of(update), self.workers)].put(update)
+        self.stats["dispatched"] += 1
+
+    async def submit(self, update):
+        """dispatch() без блокировки event loop фронта"""
+        await asyncio.get_running_loop().run_in_executor(None, self.dispatch, update)
+
+    def stop(self, timeout=30.0):
+        """Воркеры дорабатывают свои очереди и завершаются"""
+        for updates in self._queues:
+            updates.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning("Воркер %s не завершился, останавливаю", process.name)
+                process.terminate()
+        self._queues, self._processes = [], []
+
+
+async def run_sharded(profile, workers=config.BOT_WORKERS):
+    """Фронт: long polling и раздача апдейтов воркерам"""
+    from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+
+    from bot_core.app import create_bot, get_profile
+    from bot_core.monitoring import start_metrics_server
+
+    profile = get_profile(profile)
+    pool = WorkerPool(profile.name, workers)
+    await asyncio.get_running_loop().run_in_executor(None, pool.start)
+    bot = create_bot()
+    metrics_server = await start_metrics_server()
+    offset = None
+    try:
+        if profile.delete_webhook:
+            await bot.delete_webhook()
+        logger.info("Запуск фронта, воркеров: %d", workers)
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=config.POLLING_TIMEOUT)
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.warning("Ошибка получения апдейтов: %s, повтор через 1 с", e)
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                await pool.submit(update.model_dump(mode="json", by_alias=True, exclude_unset=True))
+                offset = update.update_id + 1
+    finally:
+        await asyncio.get_running_loop().run_in_executor(None, pool.stop)
+        await bot.session.close()
+        if metrics_server is not None:
+            await metrics_server.cleanup()
@@ -0,0 +1,24 @@
+"""LRUCache: вытеснение давно не запрошенных записей и статистика в словаре сервиса"""
+from bot_core.cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_hits_and_misses_go_to_shared_stats():
+    stats = {"batches": 0}
+    cache = LRUCache(10, stats)
+    cache.get("x")
+    cache.put("x", "перевод")
+    cache.get("x")
+    cache.get("x")
+    assert stats == {"batches": 0, "hits": 2, "misses": 1}
+    assert cache.hit_rate() == 2 / 3
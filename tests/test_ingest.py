@@ -0,0 +1,38 @@
+"""Инкрементальная индексация: понижение типа индекса на малом корпусе не вызывает перестроения"""
+import pytest
+
+from benchmarks.bench_context import HashingModel
+from bot_core.ann import effective_kind
+from bot_core.ingest import ingest
+
+pytest.importorskip("faiss")
+
+
+def write_docs(directory, count):
+    for i in range(count):
+        (directory / f"doc{i}.txt").write_text(f"Документ {i} о сети Swisstronik и валидаторе номер {i}.",
+                                               encoding="utf-8")
+
+
+@pytest.mark.parametrize("kind, count", [("ivf", 30), ("ivfpq", 50)])
+def test_downgraded_index_is_updated_incrementally(tmp_path, kind, count):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    write_docs(docs, count)
+    paths = dict(index_path=str(tmp_path / "index.faiss"), chunks_path=str(tmp_path / "chunks.bin"))
+
+    first = ingest([str(docs)], model=HashingModel(), kind=kind, **paths)
+    write_docs(docs, count + 2)
+    second = ingest([str(docs)], model=HashingModel(), kind=kind, **paths)
+
+    assert first["index_type"] == effective_kind(kind, count, HashingModel().dim)[0] != kind
+    assert not second["rebuilt"]
+    assert second["added"] == 2
+    assert second["chunks"] == count + 2
+
+
+def test_effective_kind_downgrades_small_corpora():
+    assert effective_kind("ivf", 10, 384)[0] == "flat"
+    assert effective_kind("ivfpq", 1000, 384, nlist=8)[0] == "ivf"
+    assert effective_kind("ivfpq", 100000, 384, nlist=8) == ("ivfpq", 8)
+    assert effective_kind("hnsw", 10, 384)[0] == "hnsw"
@@ -0,0 +1,90 @@
+"""GroqClient.stream: прерванный поток освобождает слот и соединение, токены считаются
+по usage из x_groq или по тексту (против GroqStub)"""
+import asyncio
+
+import pytest
+
+from benchmarks.stubs import GroqStub
+from bot_core.llm import GroqClient
+from bot_core.metrics import LLM_TOKENS
+from bot_core.streaming import StreamingMessage
+from bot_core.tokens import count_tokens
+
+LONG_REPLY = " ".join(["слово"] * 50)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_breaking_out_of_stream_releases_slot_and_connection():
+    async def scenario():
+        async with GroqStub(latency=0, token_latency=0.05, reply=LONG_REPLY) as stub:
+            client = GroqClient(api_key="test", base_url=stub.base_url, max_concurrency=1)
+            stream = client.stream("вопрос")
+            async for _ in stream:
+                break
+            held = client._semaphore.current.locked()
+            await stream.aclose()
+            # Слот свободен, а соединение вернулось в пул httpx, а не занято недочитанным ответом
+            pool = client._client.current._client._transport._pool
+            released = not client._semaphore.current.locked() and all(c.is_idle() for c in pool.connections)
+            # Остаток прерванного ответа шёл бы ещё 2,5 с; следующий поток получает слот сразу
+            second = client.stream("ещё вопрос")
+            first = await asyncio.wait_for(second.__anext__(), 1)
+            await second.aclose()
+            await client.aclose()
+            return held, released, first
+
+    held, released, first = run(scenario())
+    assert held
+    assert released
+    assert first == "слово"
+
+
+class FailingMessage:
+    async def edit_text(self, text):
+        raise RuntimeError("Telegram недоступен")
+
+
+def test_consumer_error_closes_stream():
+    async def scenario():
+        async with GroqStub(latency=0, token_latency=0.05, reply=LONG_REPLY) as stub:
+            client = GroqClient(api_key="test", base_url=stub.base_url, max_concurrency=1)
+            with pytest.raises(RuntimeError):
+                await StreamingMessage(FailingMessage(), interval=0).consume(client.stream("вопрос"))
+            released = not client._semaphore.current.locked()
+            await client.aclose()
+            return released
+
+    assert run(scenario())
+
+
+def test_stream_counts_tokens_from_groq_usage():
+    async def scenario():
+        async with GroqStub(latency=0, reply=LONG_REPLY) as stub:
+            client = GroqClient(api_key="test", base_url=stub.base_url, model="usage-test")
+            text = "".join([part async for part in client.stream("один два три")])
+            await client.aclose()
+            return text
+
+    assert run(scenario()) == LONG_REPLY
+    # Значения из x_groq.usage заглушки: слова промпта и ответа, а не число фрагментов
+    assert LLM_TOKENS.value("usage-test", "prompt") == 3
+    assert LLM_TOKENS.value("usage-test", "completion") == 50
+
+
+def test_interrupted_stream_counts_received_text():
+    async def scenario():
+        async with GroqStub(latency=0, reply="раз два три четыре пять") as stub:
+            client = GroqClient(api_key="test", base_url=stub.base_url, model="fallback-test")
+            stream = client.stream("вопрос")
+            parts = [await stream.__anext__(), await stream.__anext__()]
+            await stream.aclose()
+            await client.aclose()
+            return "".join(parts)
+
+    received = run(scenario())
+    assert received == "раз два"
+    assert LLM_TOKENS.value("fallback-test", "completion") == count_tokens(received)
+    assert LLM_TOKENS.value("fallback-test", "prompt") == count_tokens("вопрос")
@@ -0,0 +1,64 @@
+"""ConversationStore: сворачивание лишних реплик и сохранение чатов в SQLite"""
+import asyncio
+
+from bot_core.memory import ASSISTANT, USER, ConversationStore
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class RecordingLLM:
+    model = "test"
+
+    def __init__(self):
+        self.prompts = []
+
+    async def complete(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return f"краткое содержание {len(self.prompts)}"
+
+
+def test_turns_over_max_turns_are_summarized_not_dropped():
+    llm = RecordingLLM()
+
+    async def scenario():
+        store = ConversationStore(llm, max_turns=6, token_budget=10 ** 6, db_path="")
+        for i in range(4):
+            await store.add_exchange(1, f"вопрос {i}", f"ответ {i}")
+        await store.aclose()
+        return await store.messages(1, "ещё вопрос")
+
+    messages = run(scenario())
+    # Самые первые реплики попали в модель, а не выпали из буфера
+    assert "вопрос 0" in llm.prompts[0] and "ответ 0" in llm.prompts[0]
+    assert messages[0]["content"].endswith("краткое содержание 1")
+    history = [m["content"] for m in messages[1:-1]]
+    assert "вопрос 0" not in history
+    assert history[-1] == "ответ 3"
+
+
+def test_evicted_chats_are_saved_and_loaded(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+
+    async def fill():
+        store = ConversationStore(max_chats=1, db_path=db_path)
+        await store.add_exchange(1, "как запустить ноду?", "через docker")
+        await store.append(2, USER, "другой чат")
+        evicted = store.stats["evicted"]
+        await store.aclose()
+        return evicted
+
+    async def reopen():
+        store = ConversationStore(db_path=db_path)
+        first = await store.messages(1, "а дальше?")
+        second = await store.messages(2, "привет")
+        await store.aclose()
+        return first, second, store.stats["loaded"]
+
+    assert run(fill()) == 1
+    first, second, loaded = run(reopen())
+    assert [(m["role"], m["content"]) for m in first] == [
+        (USER, "как запустить ноду?"), (ASSISTANT, "через docker"), (USER, "а дальше?")]
+    assert [m["content"] for m in second] == ["другой чат", "привет"]
+    assert loaded == 2
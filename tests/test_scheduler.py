@@ -0,0 +1,85 @@
+"""Scheduler: токены не списываются при полной очереди, об отказе — один ответ за cooldown,
+лимиты действуют и на подписи, и на сообщения без текста"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bot_core.scheduler import QueueFull, Scheduler, SchedulerMiddleware
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_full_queue_does_not_spend_rate_tokens():
+    async def scenario():
+        scheduler = Scheduler(max_concurrency=1, max_queue=0, user_rate=0.001, user_burst=1,
+                              chat_rate=0, chat_burst=1)
+        async with scheduler.slot(1, 1):
+            with pytest.raises(QueueFull):
+                async with scheduler.slot(2, 2):
+                    pass
+        # Пользователь 2 получил отказ из-за очереди, его единственный токен остался
+        async with scheduler.slot(2, 2):
+            pass
+        return scheduler.stats
+
+    stats = run(scenario())
+    assert stats["rejected"] == 1
+    assert stats["rate_limited"] == 0
+    assert stats["admitted"] == 2
+
+
+class Message(SimpleNamespace):
+    async def answer(self, text):
+        self.replies.append(text)
+
+
+def test_rejections_are_answered_once_per_cooldown():
+    async def scenario():
+        scheduler = Scheduler(user_rate=0.001, user_burst=1, chat_rate=0)
+        middleware = SchedulerMiddleware(scheduler, notice_cooldown=60)
+        replies, handled = [], []
+
+        async def handler(event, data):
+            handled.append(event.text)
+
+        for user_id in (1, 1, 1, 1, 2, 2):
+            event = Message(text="/ctx вопрос", from_user=SimpleNamespace(id=user_id),
+                            chat=SimpleNamespace(id=user_id), replies=replies)
+            await middleware(handler, event, {})
+        return handled, replies, scheduler.stats
+
+    handled, replies, stats = run(scenario())
+    assert len(handled) == 2
+    assert stats["rate_limited"] == 4
+    # Пользователи 1 и 2 получили по одному ответу, остальные отказы — молча
+    assert len(replies) == 2
+
+
+def test_captions_and_non_text_messages_are_rate_limited():
+    async def scenario():
+        scheduler = Scheduler(user_rate=0.001, user_burst=1, chat_rate=0)
+        middleware = SchedulerMiddleware(scheduler, notice_cooldown=60)
+        replies, handled = [], []
+
+        async def handler(event, data):
+            handled.append(event)
+
+        events = [
+            Message(text=None, caption="/ctx вопрос", from_user=SimpleNamespace(id=1), chat=SimpleNamespace(id=1)),
+            Message(text=None, caption=None, from_user=SimpleNamespace(id=1), chat=SimpleNamespace(id=1)),
+            Message(text=None, caption=None, from_user=None, chat=SimpleNamespace(id=-100)),
+            Message(text=None, caption=None, from_user=None, chat=SimpleNamespace(id=-100)),
+        ]
+        for event in events:
+            event.replies = replies
+            await middleware(handler, event, {})
+        return handled, events, scheduler.stats
+
+    handled, events, stats = run(scenario())
+    # Подпись с командой и сообщение без текста расходуют один токен пользователя,
+    # сообщения без from_user ограничиваются по чату
+    assert handled == [events[0], events[2]]
+    assert stats["rate_limited"] == 2
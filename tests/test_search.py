@@ -0,0 +1,122 @@
+"""SearchGateway: объединение одинаковых запросов, TTL кэша и token bucket (против TavilyStub)"""
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.stubs import TavilyStub
+from bot_core.ratelimit import TokenBucket
+from bot_core.search import SearchGateway
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_identical_queries_share_one_request():
+    async def scenario():
+        async with TavilyStub(latency=0.1) as stub:
+            gateway = SearchGateway("test", base_url=stub.url, rate=0)
+            queries = ["Swisstronik news", "swisstronik  NEWS", " Swisstronik news "] * 4
+            results = await asyncio.gather(*(gateway.search(query) for query in queries))
+            await gateway.aclose()
+            return stub.requests, gateway.stats, results
+
+    requests, stats, results = run(scenario())
+    assert requests == 1
+    assert stats["requests"] == 1
+    assert stats["coalesced"] == 11
+    assert all(result == results[0] for result in results)
+
+
+def test_different_parameters_are_not_coalesced():
+    async def scenario():
+        async with TavilyStub(latency=0.05) as stub:
+            gateway = SearchGateway("test", base_url=stub.url, rate=0)
+            await asyncio.gather(gateway.search("swisstronik"), gateway.search("swisstronik", max_results=3),
+                                 gateway.search("swisstronik", search_depth="advanced"))
+            await gateway.aclose()
+            return stub.requests
+
+    assert run(scenario()) == 3
+
+
+def test_cached_result_is_served_until_ttl_expires():
+    async def scenario():
+        async with TavilyStub(latency=0) as stub:
+            gateway = SearchGateway("test", base_url=stub.url, rate=0, ttl_basic=0.2, ttl_advanced=60)
+            await gateway.search("swisstronik")
+            await gateway.search("Swisstronik")
+            await gateway.search("swisstronik", search_depth="advanced")
+            cached = stub.requests
+            await asyncio.sleep(0.3)
+            await gateway.search("swisstronik")
+            await gateway.search("swisstronik", search_depth="advanced")
+            await gateway.aclose()
+            return cached, stub.requests, gateway.stats
+
+    cached, requests, stats = run(scenario())
+    assert cached == 2
+    # Истёк только basic-результат, advanced живёт дольше
+    assert requests == 3
+    assert stats["hits"] == 2
+
+
+def test_token_bucket_throttles_requests_to_tavily():
+    async def scenario():
+        async with TavilyStub(latency=0) as stub:
+            gateway = SearchGateway("test", base_url=stub.url, rate=20, burst=2)
+            started = time.monotonic()
+            await asyncio.gather(*(gateway.search(f"query {i}") for i in range(6)))
+            elapsed = time.monotonic() - started
+            await gateway.aclose()
+            return stub.requests, elapsed
+
+    requests, elapsed = run(scenario())
+    assert requests == 6
+    # Два запроса проходят сразу (burst), остальные четыре — по одному в 1/20 с
+    assert elapsed >= 4 / 20 * 0.9
+
+
+def test_token_bucket_delay_and_try_acquire():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.delay() == pytest.approx(0.1, abs=0.02)
+    assert TokenBucket(rate=0).delay(100) == 0.0
+
+
+def run_in_abandoned_loop(coro):
+    # Так вызывает приложение Vercel: новый цикл на каждый вызов, который потом не закрывается
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+@pytest.mark.parametrize("runner", [run, run_in_abandoned_loop])
+def test_gateway_keeps_cache_across_event_loops(runner):
+    stub = TavilyStub(latency=0).start_in_thread()
+    gateway = SearchGateway("test", base_url=stub.url, rate=20, burst=1)
+    sessions = []
+
+    async def call(*queries):
+        results = [await gateway.search(query) for query in queries]
+        sessions.append(gateway._get_session())
+        return results
+
+    try:
+        first = runner(call("swisstronik"))
+        second = runner(call("Swisstronik", "swisstronik validators"))
+        third = runner(call("swisstronik"))
+        # Прежняя сессия закрывается в фоне (в своём цикле или в текущем)
+        deadline = time.monotonic() + 2
+        while not all(session.closed for session in sessions[:-1]) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        runner(gateway.aclose())
+    finally:
+        stub.stop_thread()
+
+    assert stub.requests == 2
+    assert gateway.stats["hits"] == 2
+    assert first == second[:1] == third
+    assert len({id(session) for session in sessions}) == 3
+    assert all(session.closed for session in sessions)
@@ -0,0 +1,114 @@
+"""TranslationService: пакеты, сегментация длинного текста и кэш (против DeepLStub)"""
+import asyncio
+
+import pytest
+
+from benchmarks.stubs import DeepLStub
+from bot_core.translate import TranslationService, split_sentences
+
+deepl = pytest.importorskip("deepl")
+
+SENTENCES = ("Swisstronik is an EVM-compatible network. ", "Validators run nodes inside SGX enclaves!\n",
+             "How do I deploy a contract? ", "Fees are paid in SWTR…  ", "Short one.\n\n")
+
+
+@pytest.fixture(scope="module")
+def stub():
+    # deepl.Translator синхронный и ходит в заглушку из пула потоков, поэтому у неё свой поток
+    stub = DeepLStub(latency=0.01).start_in_thread()
+    yield stub
+    stub.stop_thread()
+
+
+@pytest.fixture
+def translator(stub):
+    return deepl.Translator("test:fx", server_url=stub.url)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def translate_all(service, texts, target_lang="RU"):
+    async def gather():
+        return await asyncio.gather(*(service.translate(text, target_lang) for text in texts))
+
+    return run(gather())
+
+
+def test_concurrent_texts_go_in_one_batch(stub, translator):
+    service = TranslationService(translator, batch_window=0.05)
+    texts = [f"Message number {i}." for i in range(10)]
+    before = stub.requests
+
+    results = translate_all(service, texts)
+
+    assert results == [f"[RU] {text}" for text in texts]
+    assert stub.requests - before == 1
+    assert service.stats["batches"] == 1
+    assert service.stats["translated"] == 10
+
+
+def test_batch_is_split_by_text_limit_and_duplicates_coalesce(stub, translator):
+    service = TranslationService(translator, batch_window=0.05, max_batch_texts=4)
+    # Повторы приходят в том же окне, что и первый экземпляр текста
+    texts = ["Message number 0."] * 3 + [f"Message number {i}." for i in range(10)]
+    requests, sent = stub.requests, stub.texts
+
+    translate_all(service, texts)
+
+    assert stub.requests - requests == 3
+    assert stub.texts - sent == 10
+    assert service.stats["coalesced"] == 3
+
+
+def test_languages_are_batched_separately(stub, translator):
+    service = TranslationService(translator, batch_window=0.05)
+    before = stub.requests
+
+    async def scenario():
+        return await asyncio.gather(service.translate("Hello.", "RU"), service.translate("Hello.", "de"))
+
+    assert run(scenario()) == ["[RU] Hello.", "[DE] Hello."]
+    assert stub.requests - before == 2
+
+
+@pytest.mark.parametrize("max_chars", [10, 40, 100])
+def test_split_sentences_round_trip(max_chars):
+    text = "".join(SENTENCES) * 5 + "a" * 250 + " word" * 30 + "\n  trailing spaces   "
+    segments = split_sentences(text, max_chars)
+
+    assert "".join(segments) == text
+    assert all(0 < len(segment) <= max_chars for segment in segments)
+
+
+def test_long_text_is_translated_by_segments_and_reassembled(stub, translator):
+    service = TranslationService(translator, batch_window=0.01, segment_chars=100, max_batch_chars=300)
+    text = "".join(f"{i}. {SENTENCES[i % len(SENTENCES)]}" for i in range(40))
+    segments = split_sentences(text, 100)
+    expected = "".join(segment[:len(segment) - len(segment.lstrip())] + "[RU] " + segment.strip()
+                       + segment[len(segment.rstrip()):] for segment in segments)
+    before = stub.requests
+
+    assert run(service.translate(text)) == expected
+    # Пакет ограничен 300 символами, поэтому сегменты ушли несколькими запросами
+    assert stub.requests - before > 1
+    assert service.stats["translated"] == len(segments)
+
+
+def test_repeated_texts_are_served_from_cache(stub, translator):
+    service = TranslationService(translator, batch_window=0.01, segment_chars=100)
+    long_text = "".join(f"{i}. {SENTENCES[i % len(SENTENCES)]}" for i in range(20))
+
+    async def scenario():
+        first = [await service.translate("Cached text."), await service.translate(long_text)]
+        requests = stub.requests
+        second = [await service.translate("  Cached text.\n"), await service.translate(long_text)]
+        return first, second, stub.requests - requests
+
+    first, second, new_requests = run(scenario())
+
+    assert new_requests == 0
+    assert second == ["  " + first[0] + "\n", first[1]]
+    assert service.stats["hits"] == 2
+    assert service.hit_rate() > 0